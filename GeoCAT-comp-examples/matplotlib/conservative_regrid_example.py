@@ -0,0 +1,359 @@
+"""
+conservative_regrid_example.py
+==============================
+
+This script illustrates the following concepts:
+   - First-order conservative remapping between rectilinear lat/lon grids
+   - Building a sparse overlap-weight matrix once and persisting it to NetCDF
+   - Applying the weights to all stacked time/depth slices with a single
+     sparse matrix product
+   - Mask-aware ("fracarea") normalization for fields with missing values
+   - Throughput comparison against geocat-comp's bilinear `linint2` function
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following GitHub repositories to see further information about the function and to access data:
+    - For `linint2` function: https://github.com/NCAR/geocat-comp
+    - For "sst.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.comp
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - scipy
+    - xarray
+    - cartopy
+    - matplotlib
+    - mpl_toolkits
+"""
+
+###############################################################################
+# Import packages:
+
+import os
+import tempfile
+import time
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+import scipy.sparse as sparse
+import xarray as xr
+from cartopy.mpl.geoaxes import GeoAxes
+from matplotlib import cm
+from mpl_toolkits.axes_grid1 import AxesGrid
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.comp import linint2
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine and load the data
+# into xarray.DataArrays. All time and depth levels are kept so that the
+# weights can be applied to the whole stack at once.
+ds = xr.open_dataset(gdf.get('netcdf_files/sst.nc'))
+sst = ds.TEMP
+lat = ds.LAT[:]
+lon = ds.LON[:]
+
+###############################################################################
+# Define helper functions to build, persist and apply the remapping weights:
+#
+# A first-order conservative remapping computes each destination cell value
+# as the area-weighted average of all source cells that overlap it. On a
+# rectilinear lat/lon grid the overlap area of two cells factors into a
+# longitude part (overlap in radians) and a latitude part (overlap in
+# sin(latitude)), so the full 2-D weight matrix is the Kronecker product of
+# two small 1-D overlap matrices and never has to be built cell by cell.
+
+
+def cell_edges(centers, lower=None, upper=None):
+    """Estimate cell edges from cell centers, half-way between neighbours.
+
+    Parameters
+    ----------
+    centers : array_like
+        Monotonic 1-D cell center coordinates.
+    lower, upper : float, optional
+        Bounds the outermost edges are clipped to (e.g. -90 and 90 for
+        latitude).
+
+    Returns
+    -------
+    edges : :class:`numpy.ndarray`
+        Array of length ``len(centers) + 1``.
+    """
+    centers = np.asarray(centers, dtype=np.float64)
+    mid = 0.5 * (centers[1:] + centers[:-1])
+    edges = np.concatenate([[2 * centers[0] - mid[0]], mid,
+                            [2 * centers[-1] - mid[-1]]])
+    if lower is not None or upper is not None:
+        edges = np.clip(edges, lower, upper)
+    return edges
+
+
+def overlap_1d(src_edges, dst_edges, period=None):
+    """Compute the overlap length of every source/destination interval pair.
+
+    Parameters
+    ----------
+    src_edges, dst_edges : :class:`numpy.ndarray`
+        1-D cell edges of the source and destination axes.
+    period : float, optional
+        Period of a cyclic axis (2*pi for longitude in radians). Source
+        cells are also compared against destination cells shifted by one
+        period either way.
+
+    Returns
+    -------
+    overlap : :class:`scipy.sparse.csr_matrix`
+        Matrix of shape (n_dst, n_src).
+    """
+    src_lo = np.minimum(src_edges[:-1], src_edges[1:])
+    src_hi = np.maximum(src_edges[:-1], src_edges[1:])
+    dst_lo = np.minimum(dst_edges[:-1], dst_edges[1:])[:, np.newaxis]
+    dst_hi = np.maximum(dst_edges[:-1], dst_edges[1:])[:, np.newaxis]
+
+    shifts = [0.0] if period is None else [-period, 0.0, period]
+    overlap = np.zeros((dst_lo.shape[0], src_lo.shape[0]))
+    for shift in shifts:
+        overlap += np.clip(
+            np.minimum(dst_hi, src_hi + shift) -
+            np.maximum(dst_lo, src_lo + shift), 0, None)
+    return sparse.csr_matrix(overlap)
+
+
+def conservative_weights(src_lat, src_lon, dst_lat, dst_lon):
+    """Build the sparse matrix of source/destination cell overlap areas.
+
+    Parameters
+    ----------
+    src_lat, src_lon : array_like
+        1-D cell center coordinates of the source grid, in degrees.
+    dst_lat, dst_lon : array_like
+        1-D cell center coordinates of the destination grid, in degrees.
+
+    Returns
+    -------
+    weights : :class:`scipy.sparse.csr_matrix`
+        Overlap areas (on the unit sphere) of shape
+        (n_dst_lat * n_dst_lon, n_src_lat * n_src_lon), with cells flattened
+        in (lat, lon) row-major order.
+    """
+    src_lat_edges = np.sin(np.deg2rad(cell_edges(src_lat, -90, 90)))
+    dst_lat_edges = np.sin(np.deg2rad(cell_edges(dst_lat, -90, 90)))
+    src_lon_edges = np.deg2rad(cell_edges(src_lon))
+    dst_lon_edges = np.deg2rad(cell_edges(dst_lon))
+
+    lat_overlap = overlap_1d(src_lat_edges, dst_lat_edges)
+    lon_overlap = overlap_1d(src_lon_edges, dst_lon_edges, period=2 * np.pi)
+
+    # Destination cell (i, k) and source cell (j, l) overlap by
+    # lat_overlap[i, j] * lon_overlap[k, l], which is exactly the Kronecker
+    # product in (lat, lon) row-major order
+    weights = sparse.kron(lat_overlap, lon_overlap, format='csr')
+    weights.eliminate_zeros()
+    return weights
+
+
+def save_weights(weights, path):
+    """Persist a weight matrix to NetCDF using ESMF-style (row, col, S)
+    variables."""
+    weights = weights.tocoo()
+    xr.Dataset(
+        {
+            'row': ('n_s', weights.row.astype(np.int32)),
+            'col': ('n_s', weights.col.astype(np.int32)),
+            'S': ('n_s', weights.data)
+        },
+        attrs={
+            'n_b': weights.shape[0],
+            'n_a': weights.shape[1]
+        }).to_netcdf(path)
+
+
+def load_weights(path):
+    """Load a weight matrix written by `save_weights`."""
+    with xr.open_dataset(path) as w:
+        return sparse.csr_matrix(
+            (w.S.values, (w.row.values, w.col.values)),
+            shape=(int(w.attrs['n_b']), int(w.attrs['n_a'])))
+
+
+def conservative_regrid(da,
+                        weights,
+                        dst_lat,
+                        dst_lon,
+                        normalization='fracarea',
+                        min_fraction=0.5):
+    """Remap a DataArray whose last two dimensions are (lat, lon).
+
+    All leading dimensions (time, level, ...) are stacked into the columns
+    of one matrix so that every slice is remapped by a single sparse matrix
+    product.
+
+    Parameters
+    ----------
+    da : :class:`xarray.DataArray`
+        Field on the source grid.
+    weights : :class:`scipy.sparse.csr_matrix`
+        Overlap areas from `conservative_weights` or `load_weights`.
+    dst_lat, dst_lon : array_like
+        1-D cell center coordinates of the destination grid.
+    normalization : {'fracarea', 'destarea'}, optional
+        'destarea' divides by the full destination cell area covered by the
+        source grid and treats missing values as zero. 'fracarea' is
+        mask-aware: it only averages over valid source cells, which requires
+        one additional sparse product for the valid-cell fraction.
+    min_fraction : float, optional
+        With 'fracarea', destination cells whose valid overlap is below this
+        fraction of the covered area are set to missing.
+
+    Returns
+    -------
+    regridded : :class:`xarray.DataArray`
+    """
+    lat_dim, lon_dim = da.dims[-2:]
+    lead_shape = da.shape[:-2]
+
+    # (n_src, n_slices) view of the data
+    values = np.asarray(da.values,
+                        dtype=np.float64).reshape(-1, weights.shape[1]).T
+    valid = np.isfinite(values)
+
+    covered = np.asarray(weights.sum(axis=1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if normalization == 'destarea':
+            out = weights @ np.where(valid, values, 0.0) / covered
+        elif normalization == 'fracarea':
+            valid_area = weights @ valid.astype(np.float64)
+            out = weights @ np.where(valid, values, 0.0) / valid_area
+            out[valid_area < min_fraction * covered] = np.nan
+        else:
+            raise ValueError(
+                "normalization must be 'fracarea' or 'destarea', got "
+                "'{}'".format(normalization))
+    out[np.broadcast_to(covered == 0, out.shape)] = np.nan
+
+    out = out.T.reshape(lead_shape + (len(dst_lat), len(dst_lon)))
+    coords = {d: da[d] for d in da.dims[:-2] if d in da.coords}
+    coords[lat_dim] = np.asarray(dst_lat)
+    coords[lon_dim] = np.asarray(dst_lon)
+    return xr.DataArray(out,
+                        dims=da.dims,
+                        coords=coords,
+                        attrs=da.attrs,
+                        name=da.name)
+
+
+###############################################################################
+# Build and persist the weights:
+
+# Provide (output) regridding grid, the same coarse grid as in the
+# `linint2` example
+newlat = np.linspace(min(lat), max(lat), 24)
+newlon = np.linspace(min(lon), max(lon), 72)
+
+# The weights only depend on the two grids, so they are computed once,
+# written to disk and reloaded for any later field on the same grids
+with tempfile.TemporaryDirectory() as weights_dir:
+    weights_file = os.path.join(weights_dir, 'sst_to_coarse_weights.nc')
+    save_weights(conservative_weights(lat, lon, newlat, newlon), weights_file)
+    weights = load_weights(weights_file)
+
+###############################################################################
+# Regrid and compare throughput with `linint2`:
+
+nslices = int(np.prod(sst.shape[:-2]))
+
+start = time.perf_counter()
+newsst = conservative_regrid(sst, weights, newlat, newlon)
+conservative_time = time.perf_counter() - start
+
+start = time.perf_counter()
+newsst_bilinear = linint2(sst.chunk(), newlon, newlat, icycx=False).compute()
+bilinear_time = time.perf_counter() - start
+
+print('Conservative remap: {:10.1f} slices/s'.format(nslices /
+                                                     conservative_time))
+print('linint2:            {:10.1f} slices/s'.format(nslices / bilinear_time))
+
+# A conservative remap preserves the area-weighted mean of the valid data
+# (up to the cells dropped by `min_fraction`)
+src_area = np.cos(np.deg2rad(lat))
+dst_area = np.cos(np.deg2rad(xr.DataArray(newlat, dims=lat.dims)))
+print('Area-weighted mean, original: {:.3f}'.format(
+    float(sst[0, 0].weighted(src_area).mean())))
+print('Area-weighted mean, remapped: {:.3f}'.format(
+    float(newsst[0, 0].weighted(dst_area).mean())))
+
+###############################################################################
+# Plot:
+
+# Generate figure and set its size (width, height) in inches
+fig = plt.figure(figsize=(10, 12))
+
+# Generate Axes grid using a Cartopy projection
+projection = ccrs.PlateCarree()
+axes_class = (GeoAxes, dict(map_projection=projection))
+axgr = AxesGrid(fig,
+                111,
+                axes_class=axes_class,
+                nrows_ncols=(3, 1),
+                axes_pad=0.7,
+                cbar_location='right',
+                cbar_mode='single',
+                cbar_pad=0.5,
+                cbar_size='3%',
+                label_mode='')  # note the empty label_mode
+
+# Create a dictionary for common plotting options for all subplots
+plot_options = dict(transform=projection,
+                    cmap=cm.jet,
+                    vmin=-30,
+                    vmax=30,
+                    levels=16,
+                    extend='neither',
+                    add_colorbar=False,
+                    add_labels=False)
+
+fields = [sst[0, 0], newsst_bilinear[0, 0], newsst[0, 0]]
+titles = [
+    'Original Grid', 'Regrid (to coarse) - linint2',
+    'Regrid (to coarse) - conservative'
+]
+
+for ax, field, title in zip(axgr, fields, titles):
+
+    p = field.plot.contourf(ax=ax, **plot_options)
+    ax.set_title(title, fontsize=14, fontweight='bold', y=1.04)
+
+    # Add coastlines to the subplots
+    ax.coastlines()
+
+    # Use geocat.viz.util convenience function to add minor and major tick
+    # lines
+    gvutil.add_major_minor_ticks(ax)
+
+    # Use geocat.viz.util convenience function to set axes limits & tick
+    # values without calling several matplotlib functions
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xticks=np.linspace(-180, 180, 13),
+                                     yticks=np.linspace(-60, 60, 5))
+
+    # Use geocat.viz.util convenience function to make plots look like NCL
+    # plots by using latitude, longitude tick labels
+    gvutil.add_lat_lon_ticklabels(ax, zero_direction_label=False)
+
+# Add color bar and label details (title, size, etc.)
+cax = axgr.cbar_axes[0]
+cax.colorbar(p)
+axis = cax.axis[cax.orientation]
+axis.label.set_text(r'Temperature ($^{\circ} C$)')
+axis.label.set_size(16)
+axis.major_ticklabels.set_size(10)
+
+plt.show()
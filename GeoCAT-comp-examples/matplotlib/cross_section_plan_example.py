@@ -0,0 +1,268 @@
+"""
+cross_section_plan_example.py
+=============================
+
+This script illustrates the following concepts:
+   - Building a vertical cross-section "plan" once: the path through the
+     grid, the horizontal interpolation indices and weights, and the
+     vertical interpolation indices and weights to the output levels
+   - Applying the plan to any number of variables and time steps as
+     vectorized gathers, instead of one ``wrf.vertcross`` call per variable
+     and time step
+   - Returning the cross sections with the coordinates ``vertcross`` adds
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style example:
+    - NCL_wrf_interp_3.py in this gallery, and the original NCL script:
+      https://www.ncl.ucar.edu/Applications/Scripts/wrf_interp_3.ncl
+    - For "wrfout_d01_2003-07-15_00_00_00" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - netCDF4
+    - wrf-python
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from netCDF4 import Dataset
+from wrf import ALL_TIMES, CoordPair, getvar, ll_to_xy, to_np, vertcross
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open a WRF output file and read the height of the mass levels for all
+# time steps
+wrfin = Dataset(gdf.get("netcdf_files/wrfout_d01_2003-07-15_00_00_00"))
+z = getvar(wrfin, "z", timeidx=ALL_TIMES)
+lats = to_np(getvar(wrfin, "XLAT"))
+lons = to_np(getvar(wrfin, "XLONG"))
+
+###############################################################################
+# Define helper functions for cross-section plans:
+#
+# ``vertcross`` works out the points of the line through the grid, bilinearly
+# interpolates the field and the vertical coordinate to these points, and
+# then interpolates every column to the output levels, for every call. All
+# of that except the final weighted sums depends only on the grid, the end
+# points and the vertical coordinate. A plan stores it once: four corner
+# indices and weights per path point, and for every output level and path
+# point the model level below it and a linear weight. Applying the plan to
+# a field is then two gathers and two weighted sums, for all leading
+# dimensions (time, variable, ...) at once.
+
+
+def cross_section_path(start_xy, end_xy):
+    """Points of the straight line between two (x, y) grid locations, spaced
+    one grid length apart as in ``wrf.vertcross``."""
+    (x0, y0), (x1, y1) = start_xy, end_xy
+    npts = int(np.hypot(x1 - x0, y1 - y0)) + 1
+    frac = np.linspace(0, 1, npts)
+    return x0 + frac * (x1 - x0), y0 + frac * (y1 - y0)
+
+
+def _horizontal(field, indices, weights):
+    """Bilinear interpolation of the last two dimensions to the path."""
+    field = np.asarray(field)
+    flat = field.reshape(field.shape[:-2] + (-1,))
+    return (flat[..., indices] * weights).sum(axis=-1)
+
+
+def make_cross_section_plan(z, start_xy, end_xy, levels=None, nlevels=100):
+    """Precompute a vertical cross section.
+
+    Parameters
+    ----------
+    z : array_like
+        Vertical coordinate (e.g. height) of shape (..., nz, ny, nx),
+        increasing along nz. Leading dimensions (e.g. time) are kept, so a
+        time-varying vertical coordinate gets weights per time step.
+    start_xy, end_xy : tuple of float
+        (x, y) grid locations of the ends of the cross section.
+    levels : array_like, optional
+        Output levels. Defaults to `nlevels` levels spanning the range of `z`
+        along the path.
+    nlevels : int, optional
+        Number of automatic levels.
+
+    Returns
+    -------
+    plan : dict
+        Path locations and the horizontal and vertical interpolation indices
+        and weights, for use with `apply_cross_section_plan`.
+    """
+    z = np.asarray(z, dtype=np.float64)
+    ny, nx = z.shape[-2:]
+    x, y = cross_section_path(start_xy, end_xy)
+
+    # Bilinear corners and weights of every path point
+    i0 = np.clip(np.floor(x).astype(int), 0, nx - 2)
+    j0 = np.clip(np.floor(y).astype(int), 0, ny - 2)
+    fx, fy = x - i0, y - j0
+    base = j0 * nx + i0
+    indices = np.stack((base, base + 1, base + nx, base + nx + 1), axis=-1)
+    weights = np.stack(
+        ((1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy), axis=-1)
+
+    zpath = _horizontal(z, indices, weights)
+    if levels is None:
+        levels = np.linspace(zpath.min(), zpath.max(), nlevels)
+    levels = np.asarray(levels, dtype=np.float64)
+
+    # Model level below every output level, in every path column
+    below = zpath[..., np.newaxis, :, :] <= levels[:, np.newaxis, np.newaxis]
+    k = below.sum(axis=-2) - 1
+    valid = (k >= 0) & (levels[:, np.newaxis] <= zpath[..., -1:, :])
+    k = np.clip(k, 0, zpath.shape[-2] - 2)
+    z0 = np.take_along_axis(zpath, k, axis=-2)
+    z1 = np.take_along_axis(zpath, k + 1, axis=-2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        wz = np.where(valid, (levels[:, np.newaxis] - z0) / (z1 - z0), np.nan)
+
+    return {
+        'x': x,
+        'y': y,
+        'indices': indices,
+        'weights': weights,
+        'k': k,
+        'wz': wz,
+        'levels': levels
+    }
+
+
+def apply_cross_section_plan(plan, field):
+    """Apply a plan to a field of shape (..., nz, ny, nx), returning an
+    array of shape (..., nlevels, npts). Leading dimensions of the plan and
+    the field are broadcast against each other."""
+    col = _horizontal(field, plan['indices'], plan['weights'])
+    k, wz = plan['k'], plan['wz']
+    shape = np.broadcast(col[..., 0, 0], k[..., 0, 0]).shape
+    col = np.broadcast_to(col, shape + col.shape[-2:])
+    k = np.broadcast_to(k, shape + k.shape[-2:])
+    lo = np.take_along_axis(col, k, axis=-2)
+    hi = np.take_along_axis(col, k + 1, axis=-2)
+    return lo + wz * (hi - lo)
+
+
+def cross_section(plan, field, lats, lons):
+    """Apply a plan to a DataArray and add the coordinates of
+    ``wrf.vertcross``: 'vertical', and 'xy_loc' holding a CoordPair with the
+    grid location and latitude/longitude of every path point."""
+    values = apply_cross_section_plan(plan, field.values)
+    path_lat = _horizontal(lats, plan['indices'], plan['weights'])
+    path_lon = _horizontal(lons, plan['indices'], plan['weights'])
+    xy_loc = np.array([
+        CoordPair(x=x, y=y, lat=lat, lon=lon)
+        for x, y, lat, lon in zip(plan['x'], plan['y'], path_lat, path_lon)
+    ])
+    return xr.DataArray(values,
+                        dims=field.dims[:-3] + ('vertical', 'cross_line_idx'),
+                        coords={
+                            'vertical': plan['levels'],
+                            'xy_loc': ('cross_line_idx', xy_loc)
+                        },
+                        name=field.name,
+                        attrs={
+                            k: v
+                            for k, v in field.attrs.items()
+                            if k in ('description', 'units')
+                        })
+
+
+###############################################################################
+# Build the plan and apply it to several variables and all time steps:
+
+start_point = CoordPair(lat=26, lon=-102)
+end_point = CoordPair(lat=32, lon=-86)
+start_xy = to_np(ll_to_xy(wrfin, start_point.lat, start_point.lon))
+end_xy = to_np(ll_to_xy(wrfin, end_point.lat, end_point.lon))
+
+# Output levels every 250 m up to 15 km
+levels = np.arange(250, 15001, 250)
+
+start = time.perf_counter()
+plan = make_cross_section_plan(z, start_xy, end_xy, levels=levels)
+fields = {
+    name: getvar(wrfin, name, timeidx=ALL_TIMES)
+    for name in ('QVAPOR', 'tk', 'rh', 'theta')
+}
+sections = {
+    name: cross_section(plan, field, lats, lons)
+    for name, field in fields.items()
+}
+print('Plan: {} variables x {} time steps in {:.3f} s'.format(
+    len(fields), z.shape[0],
+    time.perf_counter() - start))
+
+# The same with one vertcross call per variable and time step
+start = time.perf_counter()
+reference = {
+    name: [
+        vertcross(field[t],
+                  z[t],
+                  wrfin=wrfin,
+                  levels=levels,
+                  start_point=start_point,
+                  end_point=end_point,
+                  latlon=True) for t in range(z.shape[0])
+    ] for name, field in fields.items()
+}
+print('vertcross: {:.3f} s'.format(time.perf_counter() - start))
+
+ref = to_np(reference['QVAPOR'][-1])
+new = sections['QVAPOR'][-1].values
+both = np.isfinite(ref) & np.isfinite(new)
+print('Largest difference to vertcross (QVAPOR): {:.2e} kg/kg'.format(
+    np.abs(ref[both] - new[both]).max()))
+
+###############################################################################
+# Plot:
+
+fig, axs = plt.subplots(2, 1, figsize=(10, 9), constrained_layout=True)
+
+coord_pairs = sections['QVAPOR'].xy_loc.values
+x_ticks = np.arange(coord_pairs.size)[::20]
+x_labels = [
+    pair.latlon_str(fmt="{:.2f}\N{DEGREE SIGN}N, \n {:.2f}\N{DEGREE SIGN}E")
+    for pair in coord_pairs[::20]
+]
+
+for ax, name, cmap in zip(axs, ('QVAPOR', 'theta'), ('magma', 'viridis')):
+    section = sections[name].isel(Time=-1)
+    cf = ax.contourf(np.arange(coord_pairs.size),
+                     section.vertical,
+                     section,
+                     levels=17,
+                     cmap=cmap)
+    fig.colorbar(cf, ax=ax)
+
+    # Use geocat.viz.util convenience function to set ticks and titles
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xticks=x_ticks,
+                                     xticklabels=x_labels,
+                                     yticks=np.arange(0, 15001, 3000))
+    gvutil.add_major_minor_ticks(ax,
+                                 x_minor_per_major=1,
+                                 y_minor_per_major=3,
+                                 labelsize=10)
+    gvutil.set_titles_and_labels(ax,
+                                 lefttitle=section.attrs.get(
+                                     'description', name),
+                                 righttitle=section.attrs.get('units', ''),
+                                 ylabel='Height (m)')
+
+plt.show()
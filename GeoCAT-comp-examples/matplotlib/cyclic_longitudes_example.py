@@ -0,0 +1,223 @@
+"""
+cyclic_longitudes_example.py
+============================
+
+This script illustrates the following concepts:
+   - Adding a cyclic longitude point to a DataArray or a whole Dataset in one
+     call
+   - Keeping the cyclic point lazy for dask-backed data
+   - Comparing the peak memory use with
+     `geocat.viz.util.xr_add_cyclic_longitudes` on the same 0.25 degree
+     global fields, NumPy- and dask-backed, and wrapping the field over 1000
+     time steps lazily
+   - Plotting a field without a seam at the longitude wrap
+
+See following URLs to see the related NCL-style examples:
+    - NCL_panel_6.py in this gallery, which uses
+      `xr_add_cyclic_longitudes`
+    - For `xr_add_cyclic_longitudes` function: https://github.com/NCAR/geocat-viz
+
+Dependencies:
+    - geocat.viz
+    - dask
+    - numpy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+import tracemalloc
+
+import cartopy.crs as ccrs
+import dask.array as dsa
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Define helper function to add the cyclic point:
+#
+# ``gvutil.xr_add_cyclic_longitudes`` loads the values of a single DataArray
+# (``da.values``), concatenates them with the first column and builds a new
+# DataArray from the result, so dask-backed data is computed in full. The
+# helper below appends the first longitude column with ``xr.concat``
+# instead:
+#
+# - For dask-backed data the result stays lazy; the cyclic column is a single
+#   one-column task and only the slices that are eventually plotted are
+#   computed. This is where the memory is saved.
+# - For NumPy-backed data the whole field is still copied into the output
+#   array, just as with ``gvutil.xr_add_cyclic_longitudes``.
+# - Datasets are handled in one call: every data variable and coordinate that
+#   has the longitude dimension is wrapped, all others are passed through.
+
+
+def add_cyclic_longitudes(obj, coord, period=360):
+    """Append the first longitude column, shifted by `period`, to the end of
+    the longitude dimension.
+
+    Unlike `gvutil.xr_add_cyclic_longitudes`, this wraps every variable of a
+    Dataset in one call and keeps dask-backed data lazy. NumPy-backed data
+    is still copied into a new array with the extra column.
+
+    Parameters
+    ----------
+    obj : :class:`xarray.DataArray` or :class:`xarray.Dataset`
+        Data with a 1-D longitude dimension coordinate named `coord`.
+    coord : str
+        Name of the longitude coordinate.
+    period : float, optional
+        Period of the longitude coordinate. The default is 360.
+
+    Returns
+    -------
+    cyclic : :class:`xarray.DataArray` or :class:`xarray.Dataset`
+        Same type as `obj`, with one more point along `coord`.
+    """
+    first = obj.isel({coord: [0]})
+    first = first.assign_coords(
+        {coord: first[coord].copy(data=first[coord].values + period)})
+
+    if isinstance(obj, xr.DataArray):
+        return xr.concat([obj, first],
+                         dim=coord,
+                         coords='minimal',
+                         compat='override')
+    return xr.concat([obj, first],
+                     dim=coord,
+                     data_vars='minimal',
+                     coords='minimal',
+                     compat='override')
+
+
+###############################################################################
+# Generate data:
+
+# 0.25 degree global grid with 20 time steps (~83 MB in float32)
+lat = np.linspace(-90, 90, 721)
+lon = np.arange(0, 360, 0.25)
+time_steps = np.arange(20)
+
+wave = (np.cos(np.deg2rad(lat))[:, np.newaxis] *
+        np.cos(np.deg2rad(3 * lon))[np.newaxis, :])
+field = xr.DataArray(
+    (wave[np.newaxis] *
+     np.cos(time_steps / 3)[:, np.newaxis, np.newaxis]).astype(np.float32),
+    dims=('time', 'lat', 'lon'),
+    coords={
+        'time': time_steps,
+        'lat': lat,
+        'lon': lon
+    },
+    name='field')
+
+# The same values backed by dask, chunked per time step as they would be
+# when opened with ``xr.open_dataset(..., chunks={'time': 1})``
+lazy_field = field.chunk({'time': 1})
+
+###############################################################################
+# Compare peak memory use:
+#
+# Both functions get the same input and the same task: wrap the field and
+# take the values of the one time step that is plotted.
+
+
+def measure(func, *args):
+    """Return the result, peak traced memory (MB) and wall time (s) of a
+    call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+functions = {
+    'xr_add_cyclic_longitudes': gvutil.xr_add_cyclic_longitudes,
+    'add_cyclic_longitudes': add_cyclic_longitudes
+}
+for backing, da in [('NumPy', field), ('dask', lazy_field)]:
+    for name, func in functions.items():
+        _, peak, elapsed = measure(
+            lambda da: func(da, 'lon').isel(time=0).values, da)
+        print('{:5s} {:24s} {:8.1f} MB {:6.3f} s'.format(
+            backing, name, peak, elapsed))
+
+###############################################################################
+# A 0.25 degree field over 1000 time steps:
+#
+# The same field over 1000 time steps (~4 GB in float32), built lazily with
+# dask. Only the helper is run on it: ``gvutil.xr_add_cyclic_longitudes``
+# would load and copy the whole field, so its memory use is only reported.
+
+long_field = xr.DataArray(
+    wave.astype(np.float32)[np.newaxis] *
+    np.cos(dsa.arange(1000, chunks=1) / 3)[:, np.newaxis, np.newaxis],
+    dims=('time', 'lat', 'lon'),
+    coords={
+        'time': np.arange(1000),
+        'lat': lat,
+        'lon': lon
+    },
+    name='field')
+
+_, peak, elapsed = measure(
+    lambda da: add_cyclic_longitudes(da, 'lon').isel(time=0).values, long_field)
+print('dask  {:24s} {:8.1f} MB {:6.3f} s (1000 time steps)'.format(
+    'add_cyclic_longitudes', peak, elapsed))
+print('dask  {:24s} {:8.1f} MB (the wrapped field alone)'.format(
+    'xr_add_cyclic_longitudes',
+    long_field.size * (lon.size + 1) / lon.size * 4 / 1e6))
+
+###############################################################################
+# Wrap many variables of a Dataset in one call:
+
+ds = xr.Dataset({
+    'u': field,
+    'v': 2 * field,
+    'lat_weights': ('lat', np.cos(np.deg2rad(lat)))
+})
+ds_cyclic = add_cyclic_longitudes(ds, 'lon')
+
+print(ds_cyclic)
+print('Cyclic column equals the first column:',
+      bool((ds_cyclic.u[..., -1] == ds_cyclic.u[..., 0]).all()))
+
+###############################################################################
+# Plot:
+
+# Without the cyclic point the contours stop one grid spacing short of the
+# wrap, leaving a gap at the prime meridian. Zoom in on it.
+fig, axs = plt.subplots(1,
+                        2,
+                        figsize=(10, 5),
+                        subplot_kw={'projection': ccrs.PlateCarree()})
+panels = {
+    'Without cyclic point': field,
+    'With cyclic point': add_cyclic_longitudes(lazy_field, 'lon')
+}
+for ax, (title, da) in zip(axs, panels.items()):
+    da.isel(time=0).plot.contourf(ax=ax,
+                                  transform=ccrs.PlateCarree(),
+                                  levels=np.linspace(-1.2, 1.2, 13),
+                                  cmap='RdBu_r',
+                                  add_colorbar=False,
+                                  add_labels=False)
+    ax.set_extent([-3, 3, -3, 3], crs=ccrs.PlateCarree())
+
+    # Use geocat.viz.util convenience functions to set ticks and titles
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xticks=np.arange(-3, 4),
+                                     yticks=np.arange(-3, 4))
+    gvutil.add_lat_lon_ticklabels(ax)
+    gvutil.set_titles_and_labels(ax, maintitle=title, maintitlefontsize=14)
+
+plt.show()
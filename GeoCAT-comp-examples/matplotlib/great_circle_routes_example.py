@@ -0,0 +1,208 @@
+"""
+great_circle_routes_example.py
+==============================
+
+This script illustrates the following concepts:
+   - Calculating great circle paths for many routes at once with NumPy
+   - Splitting paths at the antimeridian
+   - Drawing many routes as a single LineCollection
+   - Comparing against sampling every route point by point with
+     geographiclib, as NCL_polyg_14.py does
+
+See following URLs to see the related NCL-style examples:
+    - NCL_polyg_14.py in this gallery
+    - Original NCL script: https://www.ncl.ucar.edu/Applications/Scripts/polyg_14.ncl
+
+Dependencies:
+    - geocat.viz (Not necessary but for plotting convenience)
+    - geographiclib (Only for the comparison)
+    - numpy
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import matplotlib.pyplot as plt
+import numpy as np
+from geographiclib.geodesic import Geodesic
+from matplotlib.collections import LineCollection
+
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Define helper functions for great circle routes:
+#
+# NCL_polyg_14.py samples one route with a ``Geodesic.InverseLine`` and a
+# Python loop over its points. `great_circle_paths` samples any number of
+# routes in a few NumPy operations by spherical linear interpolation of the
+# unit vectors of the end points. `split_at_antimeridian` then cuts the
+# paths where they cross the map edge, so all routes can be drawn as one
+# LineCollection in PlateCarree without lines across the whole map.
+
+
+def great_circle_paths(lon0, lat0, lon1, lat1, npts):
+    """Sample great circle paths between arrays of start and end points.
+
+    The paths are computed on the sphere by spherical linear interpolation
+    of the unit vectors of the end points, for all routes at once. On the
+    WGS84 ellipsoid the true geodesic differs from these paths by well
+    under a percent of the route length.
+
+    Parameters
+    ----------
+    lon0, lat0, lon1, lat1 : array_like
+        Longitudes and latitudes (degrees) of the start and end points, one
+        value per route. Scalars are treated as a single route.
+    npts : int
+        Number of points per path, including both end points. The points
+        are equally spaced along the path.
+
+    Returns
+    -------
+    lons, lats : :class:`numpy.ndarray`
+        Arrays of shape (nroutes, npts) with longitudes in [-180, 180].
+    """
+
+    def to_xyz(lon, lat):
+        lon = np.deg2rad(np.atleast_1d(lon).astype(np.float64))
+        lat = np.deg2rad(np.atleast_1d(lat).astype(np.float64))
+        return np.stack(
+            (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)),
+            axis=-1)
+
+    p0 = to_xyz(lon0, lat0)[:, np.newaxis, :]
+    p1 = to_xyz(lon1, lat1)[:, np.newaxis, :]
+
+    # Angle between the end points of every route
+    omega = np.arccos(np.clip(np.sum(p0 * p1, axis=-1), -1, 1))
+    t = np.linspace(0, 1, npts)[np.newaxis, :]
+
+    # Spherical linear interpolation; fall back to linear interpolation for
+    # (nearly) coincident end points
+    sin_omega = np.sin(omega)
+    degenerate = sin_omega < 1e-12
+    sin_omega = np.where(degenerate, 1, sin_omega)
+    a = np.where(degenerate, 1 - t, np.sin((1 - t) * omega) / sin_omega)
+    b = np.where(degenerate, t, np.sin(t * omega) / sin_omega)
+    p = a[..., np.newaxis] * p0 + b[..., np.newaxis] * p1
+
+    lons = np.rad2deg(np.arctan2(p[..., 1], p[..., 0]))
+    lats = np.rad2deg(np.arctan2(p[..., 2], np.hypot(p[..., 0], p[..., 1])))
+    return lons, lats
+
+
+def split_at_antimeridian(lons, lats):
+    """Split paths where they cross the antimeridian.
+
+    A point on the antimeridian is inserted on both sides of every crossing
+    so that the pieces join up visually at the map edge.
+
+    Parameters
+    ----------
+    lons, lats : :class:`numpy.ndarray`
+        Arrays of shape (nroutes, npts), e.g. from `great_circle_paths`.
+
+    Returns
+    -------
+    segments : list of :class:`numpy.ndarray`
+        (n, 2) arrays of (lon, lat) vertices, ready for a LineCollection.
+    """
+    nroutes, npts = lons.shape
+    lon = lons.ravel()
+    lat = lats.ravel()
+
+    # Crossings are jumps of more than 180 degrees between consecutive
+    # points of the same route
+    jump = np.abs(np.diff(lon)) > 180
+    jump[npts - 1::npts] = False
+    i = np.flatnonzero(jump)
+
+    # Latitude where each crossing meets the antimeridian
+    edge = np.where(lon[i] > 0, 180.0, -180.0)
+    lon_next = lon[i + 1] + 2 * edge
+    frac = (edge - lon[i]) / (lon_next - lon[i])
+    lat_edge = lat[i] + frac * (lat[i + 1] - lat[i])
+
+    # Insert (edge, lat_edge) and (-edge, lat_edge) after every crossing
+    where = np.repeat(i + 1, 2)
+    lon = np.insert(lon, where, np.column_stack((edge, -edge)).ravel())
+    lat = np.insert(lat, where, np.repeat(lat_edge, 2))
+
+    # Split between the two inserted points and between routes, accounting
+    # for the points inserted before each split position
+    crossing_splits = i + 2 + 2 * np.arange(i.size)
+    route_starts = np.arange(1, nroutes) * npts
+    route_splits = route_starts + 2 * np.searchsorted(
+        i + 1, route_starts, side='right')
+    splits = np.sort(np.concatenate((crossing_splits, route_splits)))
+
+    return np.split(np.column_stack((lon, lat)), splits)
+
+
+###############################################################################
+# Sample many routes:
+
+# Random routes from three hubs
+rng = np.random.default_rng(0)
+nroutes = 2000
+npts = 50
+hubs = np.array([[-105.0, 40.0], [139.7, 35.7], [-0.5, 51.5]])
+start = hubs[rng.integers(0, len(hubs), nroutes)]
+end = np.column_stack((rng.uniform(-180, 180,
+                                   nroutes), rng.uniform(-60, 70, nroutes)))
+
+begin = time.perf_counter()
+lons, lats = great_circle_paths(start[:, 0], start[:, 1], end[:, 0], end[:, 1],
+                                npts)
+segments = split_at_antimeridian(lons, lats)
+vectorized = time.perf_counter() - begin
+
+# The point by point geographiclib loop of NCL_polyg_14.py, on the WGS84
+# ellipsoid
+begin = time.perf_counter()
+for (lon0, lat0), (lon1, lat1) in zip(start, end):
+    line = Geodesic.WGS84.InverseLine(lat0, lon0, lat1, lon1)
+    points = [
+        line.Position(s, Geodesic.STANDARD | Geodesic.LONG_UNROLL)
+        for s in np.linspace(0, line.s13, npts)
+    ]
+looped = time.perf_counter() - begin
+
+print('{} routes: {:.3f} s with NumPy, {:.3f} s with geographiclib'.format(
+    nroutes, vectorized, looped))
+
+###############################################################################
+# Plot:
+
+plt.figure(figsize=(12, 6))
+ax = plt.axes(projection=ccrs.PlateCarree())
+ax.set_global()
+ax.add_feature(cfeature.LAND, color="lightgrey")
+ax.add_collection(
+    LineCollection(segments,
+                   colors="blue",
+                   linewidths=0.3,
+                   alpha=0.3,
+                   transform=ccrs.PlateCarree()))
+
+# Use geocat.viz.util convenience function to set axes parameters
+gvutil.set_axes_limits_and_ticks(ax,
+                                 xticks=np.linspace(-180, 180, 13),
+                                 yticks=np.linspace(-90, 90, 7))
+
+# Use geocat.viz.util convenience function to make plots look like NCL plots by using latitude, longitude tick labels
+gvutil.add_lat_lon_ticklabels(ax)
+
+# Use geocat.viz.util convenience function to set titles and labels
+gvutil.set_titles_and_labels(ax,
+                             maintitle="{} Great Circle Routes".format(nroutes),
+                             maintitlefontsize=16,
+                             xlabel="",
+                             ylabel="")
+plt.show()
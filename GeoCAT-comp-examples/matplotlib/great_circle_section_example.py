@@ -0,0 +1,349 @@
+"""
+great_circle_section_example.py
+===============================
+
+This script illustrates the following concepts:
+   - Extracting a vertical cross section of rectilinear (lat/lon) model
+     output along an arbitrary great-circle path, instead of along a single
+     meridian as in NCL_h_lat_7.py and NCL_vector_5.py
+   - Gathering only the model columns on the path, so the work is
+     proportional to the path length and not to the grid size
+   - Interpolating these columns from hybrid sigma-pressure levels to
+     pressure levels (or from model levels to height levels)
+   - Projecting the wind onto the path for vectors in the section plane
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_h_lat_7.py and NCL_vector_5.py in this gallery
+    - For "atmos.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - geocat.comp (Only for the timing comparison)
+    - numpy
+    - xarray
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.comp import interp_hybrid_to_pressure
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine and load the data into
+# xarray
+ds = xr.open_dataset(gdf.get("netcdf_files/atmos.nc"), decode_times=False)
+
+###############################################################################
+# Define helper functions for great-circle cross sections:
+#
+# A section is built in three steps. `great_circle_path` places evenly spaced
+# points on the great circle between the two end points. `path_weights`
+# finds the four surrounding grid columns and their bilinear weights for
+# every point, and `sample_path` gathers exactly these columns with a single
+# vectorized ``isel`` (which also works lazily on dask or file-backed data).
+# `interp_columns` then interpolates the gathered columns to the requested
+# levels. Only npts x nlev values per variable are ever interpolated.
+
+EARTH_RADIUS = 6371.0  # km
+
+
+def _unit_vector(lat, lon):
+    lat, lon = np.deg2rad(lat), np.deg2rad(lon)
+    return np.stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)),
+        axis=-1)
+
+
+def great_circle_path(start, end, npts=100):
+    """Points along the great circle from `start` to `end`.
+
+    Parameters
+    ----------
+    start, end : tuple of float
+        (lat, lon) of the end points in degrees.
+    npts : int, optional
+        Number of points, including the end points.
+
+    Returns
+    -------
+    lats, lons, distance, bearing : :class:`numpy.ndarray`
+        Latitude and longitude (0-360) of every point, distance from `start`
+        in km and the direction of the path (degrees clockwise from north).
+    """
+    p0, p1 = _unit_vector(*start), _unit_vector(*end)
+    angle = np.arccos(np.clip(np.dot(p0, p1), -1, 1))
+    frac = np.linspace(0, 1, npts)[:, np.newaxis]
+
+    # Spherical linear interpolation of the points and of their tangents
+    points = (np.sin(
+        (1 - frac) * angle) * p0 + np.sin(frac * angle) * p1) / np.sin(angle)
+    tangents = (-np.cos(
+        (1 - frac) * angle) * p0 + np.cos(frac * angle) * p1) / np.sin(angle)
+
+    lats = np.rad2deg(np.arcsin(points[:, 2]))
+    lons = np.rad2deg(np.arctan2(points[:, 1], points[:, 0])) % 360
+    lat_r, lon_r = np.deg2rad(lats), np.deg2rad(lons)
+    east = np.stack((-np.sin(lon_r), np.cos(lon_r), np.zeros_like(lon_r)),
+                    axis=-1)
+    north = np.stack(
+        (-np.sin(lat_r) * np.cos(lon_r), -np.sin(lat_r) * np.sin(lon_r),
+         np.cos(lat_r)),
+        axis=-1)
+    bearing = np.rad2deg(
+        np.arctan2((tangents * east).sum(-1), (tangents * north).sum(-1)))
+    distance = frac[:, 0] * angle * EARTH_RADIUS
+    return lats, lons, distance, bearing
+
+
+def path_weights(lat, lon, lats, lons):
+    """Surrounding grid columns and bilinear weights of path points on a
+    rectilinear grid with increasing latitudes and a global, periodic
+    longitude axis.
+
+    Returns
+    -------
+    weights : dict
+        `lat` and `lon` index arrays and `weights`, each of shape
+        (npts, 4), for `sample_path`.
+    """
+    lat = np.asarray(lat)
+    lon = np.asarray(lon) % 360
+
+    # Fractional row and column of every point
+    y = np.interp(lats, lat, np.arange(lat.size))
+    x = np.interp(lons % 360, np.append(lon, lon[0] + 360),
+                  np.arange(lon.size + 1))
+    j0 = np.clip(np.floor(y).astype(int), 0, lat.size - 2)
+    i0 = np.floor(x).astype(int) % lon.size
+    fy, fx = y - j0, x - np.floor(x)
+
+    return {
+        'lat':
+            np.stack((j0, j0, j0 + 1, j0 + 1), axis=-1),
+        'lon':
+            np.stack((i0, (i0 + 1) % lon.size, i0, (i0 + 1) % lon.size),
+                     axis=-1),
+        'weights':
+            np.stack(
+                ((1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx),
+                axis=-1)
+    }
+
+
+def sample_path(da, weights, lat='lat', lon='lon'):
+    """Bilinearly interpolate `da` to the path points, replacing its `lat`
+    and `lon` dimensions with a `distance` dimension."""
+    dims = ('distance', 'corner')
+    corners = da.isel({
+        lat: xr.DataArray(weights['lat'], dims=dims),
+        lon: xr.DataArray(weights['lon'], dims=dims)
+    })
+    corners = corners.drop_vars([c for c in (lat, lon) if c in corners.coords])
+    return xr.dot(corners,
+                  xr.DataArray(weights['weights'], dims=dims),
+                  dim='corner')
+
+
+def _interp_levels(values, coord, levels):
+    """Linear interpolation of columns along the last axis. `coord` may
+    increase or decrease along the columns; levels outside of a column are
+    missing."""
+    if np.nanmean(coord[..., 0]) > np.nanmean(coord[..., -1]):
+        values, coord = values[..., ::-1], coord[..., ::-1]
+    k = (coord[..., np.newaxis, :] <= levels[:, np.newaxis]).sum(-1) - 1
+    valid = (k >= 0) & (levels <= coord[..., -1:])
+    k = np.clip(k, 0, coord.shape[-1] - 2)
+    c0 = np.take_along_axis(coord, k, axis=-1)
+    c1 = np.take_along_axis(coord, k + 1, axis=-1)
+    v0 = np.take_along_axis(values, k, axis=-1)
+    v1 = np.take_along_axis(values, k + 1, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid, v0 + (levels - c0) / (c1 - c0) * (v1 - v0),
+                        np.nan)
+
+
+def interp_columns(data, coord, levels, dim='lev', new_dim='plev', log=False):
+    """Interpolate `data` from its `dim` levels to `levels` of the vertical
+    coordinate `coord` (pressure or height, with the same `dim`), linearly
+    in `coord` or, with `log=True`, in its logarithm."""
+    levels = np.asarray(levels, dtype=np.float64)
+    data, coord = xr.broadcast(data, coord)
+    if log:
+        coord, target = np.log(coord), np.log(levels)
+    else:
+        target = levels
+    out = xr.apply_ufunc(
+        _interp_levels,
+        data,
+        coord,
+        input_core_dims=[[dim], [dim]],
+        output_core_dims=[[new_dim]],
+        kwargs={'levels': target},
+        dask='parallelized',
+        output_dtypes=[np.float64],
+        dask_gufunc_kwargs={'output_sizes': {
+            new_dim: levels.size
+        }})
+    return out.assign_coords({new_dim: levels})
+
+
+def great_circle_section(ds,
+                         names,
+                         start,
+                         end,
+                         levels,
+                         npts=100,
+                         vertical='pressure',
+                         height='Z3'):
+    """Vertical cross section of CAM-style output along a great circle.
+
+    Parameters
+    ----------
+    ds : :class:`xarray.Dataset`
+        Model output on (..., lev, lat, lon). For pressure levels it needs
+        `hyam`, `hybm`, `P0` and `PS`, for height levels the geopotential
+        height variable `height`.
+    names : list of str
+        Variables to extract.
+    start, end : tuple of float
+        (lat, lon) of the end points of the section.
+    levels : array_like
+        Output levels, in Pa (pressure) or m (height).
+    npts : int, optional
+        Number of points along the path.
+    vertical : {'pressure', 'height'}, optional
+        Vertical coordinate of the section.
+    height : str, optional
+        Name of the geopotential height variable.
+
+    Returns
+    -------
+    section : :class:`xarray.Dataset`
+        The variables on (..., level, distance), with `lat`, `lon` and
+        `bearing` of the path points as coordinates of `distance` (km).
+    """
+    lats, lons, distance, bearing = great_circle_path(start, end, npts)
+    weights = path_weights(ds.lat, ds.lon, lats, lons)
+
+    if vertical == 'pressure':
+        ps = sample_path(ds.PS, weights)
+        coord = ds.hyam * ds.P0 + ds.hybm * ps
+        new_dim, log = 'plev', True
+    else:
+        coord = sample_path(ds[height], weights)
+        new_dim, log = 'height', False
+
+    section = xr.Dataset({
+        name: interp_columns(sample_path(ds[name], weights),
+                             coord,
+                             levels,
+                             new_dim=new_dim,
+                             log=log) for name in names
+    })
+    section = section.assign_coords(distance=distance,
+                                    lat=('distance', lats),
+                                    lon=('distance', lons),
+                                    bearing=('distance', bearing))
+    section.distance.attrs['units'] = 'km'
+    return section.transpose(..., new_dim, 'distance')
+
+
+def along_path_wind(u, v, bearing):
+    """Horizontal wind component along the path direction."""
+    b = np.deg2rad(bearing)
+    return u * np.sin(b) + v * np.cos(b)
+
+
+###############################################################################
+# Extract a section:
+
+# From eastern Australia to the Gulf of Alaska, on pressure levels
+lev_p = np.arange(300, 1001, 25)
+start = time.perf_counter()
+section = great_circle_section(ds.isel(time=0),
+                               ['T', 'Z3', 'Q', 'U', 'V', 'OMEGA'],
+                               start=(-30, 150),
+                               end=(55, 215),
+                               levels=lev_p * 100.,
+                               npts=120).compute()
+print('Great-circle section: {:.3f} s'.format(time.perf_counter() - start))
+
+# The approach of NCL_h_lat_7.py: interpolate the whole grid, then slice it
+start = time.perf_counter()
+for name in ('T', 'Z3', 'Q', 'U', 'V', 'OMEGA'):
+    interp_hybrid_to_pressure(data=ds[name].isel(time=0),
+                              ps=ds.PS.isel(time=0) / 100,
+                              hyam=ds.hyam,
+                              hybm=ds.hybm,
+                              p0=ds.P0 * 0.01,
+                              new_levels=lev_p,
+                              method='log').sel(lon=210, method='nearest')
+print('Full-grid interpolation: {:.3f} s'.format(time.perf_counter() - start))
+
+# Moist static energy (kJ/kg) as in NCL_h_lat_7.py, and the wind along the
+# path; the vertical component is -omega, scaled for display
+h = (1004.0 * section.T + 9.81 * section.Z3 + 2.5e6 * section.Q / 1000) / 1000
+vpath = along_path_wind(section.U, section.V, section.bearing)
+wscale = -section.OMEGA * float(abs(vpath).mean() / abs(section.OMEGA).mean())
+
+###############################################################################
+# Plot:
+
+fig, ax = plt.subplots(figsize=(10, 7))
+
+levels = np.append(np.arange(300, 335, 2), 335)
+h.plot.contour(ax=ax,
+               colors='black',
+               levels=levels,
+               linewidths=0.5,
+               linestyles='solid',
+               add_labels=False)
+colors = h.plot.contourf(ax=ax,
+                         levels=levels,
+                         cmap='viridis',
+                         add_labels=False,
+                         add_colorbar=False)
+ax.quiver(section.distance[::4],
+          section.plev / 100,
+          vpath[:, ::4],
+          wscale[:, ::4],
+          color='black',
+          pivot='middle',
+          width=0.0015)
+fig.colorbar(colors, ax=ax, label='Moist Static Energy (kJ/kg)')
+
+# Label the ends of the path
+xticks = section.distance[::20]
+xticklabels = [
+    '{:.0f}\N{DEGREE SIGN}{}\n{:.0f}\N{DEGREE SIGN}E'.format(
+        abs(lat), 'N' if lat >= 0 else 'S', lon)
+    for lat, lon in zip(section.lat[::20].values, section.lon[::20].values)
+]
+
+# Use geocat.viz.util convenience functions to set ticks and titles
+gvutil.set_axes_limits_and_ticks(ax,
+                                 ylim=(1000, 300),
+                                 xticks=xticks,
+                                 xticklabels=xticklabels,
+                                 yticks=np.arange(300, 1001, 100))
+gvutil.set_titles_and_labels(ax,
+                             maintitle='Great-circle section',
+                             lefttitle='Moist Static Energy',
+                             righttitle='kJ/kg',
+                             ylabel='Pressure (mb)')
+
+plt.show()
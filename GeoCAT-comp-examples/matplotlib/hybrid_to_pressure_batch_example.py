@@ -0,0 +1,215 @@
+"""
+hybrid_to_pressure_batch_example.py
+===================================
+
+This script illustrates the following concepts:
+   - Interpolating several variables on the same hybrid sigma-pressure grid
+     to pressure levels in a single pass
+   - Computing the 3-D pressure field and the bracketing model levels once
+     and sharing them between all variables, instead of once per
+     ``interp_hybrid_to_pressure`` call
+   - Running the interpolation chunk by chunk in parallel with dask
+   - Comparing against geocat-comp's ``interp_hybrid_to_pressure``
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_vector_5.py and NCL_h_lat_7.py in this gallery
+    - For "atmos.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - geocat.comp (Only for the comparison)
+    - dask
+    - numpy
+    - xarray
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.comp import interp_hybrid_to_pressure
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine, chunked in latitude so
+# every chunk holds complete columns
+ds = xr.open_dataset(gdf.get("netcdf_files/atmos.nc"),
+                     decode_times=False,
+                     chunks={'lat': 16})
+
+###############################################################################
+# Define helper functions for the batched interpolation:
+#
+# All variables are stacked along a new `variable` dimension and passed to a
+# single ``xr.apply_ufunc`` call together with the log-pressure field. Inside
+# every chunk the bracketing model levels and the interpolation weights are
+# computed once from the pressure and then applied to all variables with
+# broadcast gathers. With dask, chunks are processed in parallel; the level
+# dimension has to be a single chunk.
+
+
+def _interp_stacked(values, logp, target):
+    """Interpolate `values` (variable, ..., lev) in log pressure `logp`
+    (..., lev) to the log pressures `target`."""
+    if np.nanmean(logp[..., 0]) > np.nanmean(logp[..., -1]):
+        values, logp = values[..., ::-1], logp[..., ::-1]
+
+    # Bracketing levels and weights, shared by all variables
+    k = (logp[..., np.newaxis, :] <= target[:, np.newaxis]).sum(-1) - 1
+    valid = (k >= 0) & (target <= logp[..., -1:])
+    k = np.clip(k, 0, logp.shape[-1] - 2)
+    p0 = np.take_along_axis(logp, k, axis=-1)
+    p1 = np.take_along_axis(logp, k + 1, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w = np.where(valid, (target - p0) / (p1 - p0), np.nan)
+
+    k = np.broadcast_to(k, values.shape[:-1] + k.shape[-1:])
+    v0 = np.take_along_axis(values, k, axis=-1)
+    v1 = np.take_along_axis(values, k + 1, axis=-1)
+    return v0 + w * (v1 - v0)
+
+
+def interp_hybrid_to_pressure_many(data,
+                                   ps,
+                                   hyam,
+                                   hybm,
+                                   p0=100000.,
+                                   new_levels=None,
+                                   lev_dim='lev'):
+    """Interpolate several variables from hybrid sigma-pressure levels to
+    pressure levels, linearly in log pressure.
+
+    Parameters
+    ----------
+    data : :class:`xarray.Dataset` or list of :class:`xarray.DataArray`
+        Variables on the same hybrid grid, all with the dimension `lev_dim`.
+        May be dask-backed, with `lev_dim` in a single chunk.
+    ps : :class:`xarray.DataArray`
+        Surface pressure, in the units of `p0`.
+    hyam, hybm : :class:`xarray.DataArray`
+        Hybrid A and B coefficients on `lev_dim`.
+    p0 : float, optional
+        Reference pressure.
+    new_levels : array_like
+        Output pressure levels, in the units of `p0`.
+    lev_dim : str, optional
+        Name of the hybrid level dimension.
+
+    Returns
+    -------
+    result : :class:`xarray.Dataset`
+        All variables, with `lev_dim` replaced by `plev`. Levels below the
+        surface or above the model top are missing.
+    """
+    if not isinstance(data, xr.Dataset):
+        data = xr.Dataset({da.name: da for da in data})
+    new_levels = np.asarray(new_levels, dtype=np.float64)
+
+    # The 3-D pressure, computed once for all variables
+    logp = np.log(hyam * p0 + hybm * ps)
+
+    stacked = data.to_array(dim='variable')
+    out = xr.apply_ufunc(
+        _interp_stacked,
+        stacked,
+        logp,
+        input_core_dims=[[lev_dim], [lev_dim]],
+        output_core_dims=[['plev']],
+        kwargs={'target': np.log(new_levels)},
+        dask='parallelized',
+        output_dtypes=[np.float64],
+        dask_gufunc_kwargs={'output_sizes': {
+            'plev': new_levels.size
+        }})
+    out = out.assign_coords(plev=new_levels).to_dataset(dim='variable')
+
+    # Restore the dimension order and the attributes of every variable
+    for name, da in data.items():
+        dims = [d if d != lev_dim else 'plev' for d in da.dims]
+        out[name] = out[name].transpose(*dims)
+        out[name].attrs = da.attrs
+    return out
+
+
+###############################################################################
+# Interpolate the variables of NCL_vector_5.py and NCL_h_lat_7.py:
+
+names = ['T', 'OMEGA', 'V', 'Z3', 'Q']
+lev_p = np.arange(200, 1001, 50)
+ps = ds.PS / 100  # Convert from Pascal to mb
+p0 = 1000.
+
+start = time.perf_counter()
+batched = interp_hybrid_to_pressure_many(ds[names],
+                                         ps,
+                                         ds.hyam,
+                                         ds.hybm,
+                                         p0=p0,
+                                         new_levels=lev_p).compute()
+print('One batched call for {} variables: {:.3f} s'.format(
+    len(names),
+    time.perf_counter() - start))
+
+# One interp_hybrid_to_pressure call per variable
+start = time.perf_counter()
+single = {
+    name: interp_hybrid_to_pressure(data=ds[name],
+                                    ps=ps,
+                                    hyam=ds.hyam,
+                                    hybm=ds.hybm,
+                                    p0=p0,
+                                    new_levels=lev_p,
+                                    method='log').compute() for name in names
+}
+print('{} interp_hybrid_to_pressure calls: {:.3f} s'.format(
+    len(names),
+    time.perf_counter() - start))
+
+for name in names:
+    print('{:6s} largest difference: {:.2e}'.format(
+        name, float(abs(batched[name] - single[name]).max())))
+
+###############################################################################
+# Plot:
+
+# Zonal mean temperature and vertical pressure velocity of the first time step
+zonal = batched.isel(time=0).mean('lon')
+
+fig, ax = plt.subplots(figsize=(9, 7))
+cf = zonal.T.plot.contourf(ax=ax,
+                           levels=np.arange(200, 301, 5),
+                           cmap='viridis',
+                           add_labels=False,
+                           add_colorbar=False)
+zonal.OMEGA.plot.contour(ax=ax,
+                         levels=np.linspace(-0.06, 0.06, 13),
+                         colors='black',
+                         linewidths=0.6,
+                         add_labels=False)
+fig.colorbar(cf, ax=ax, label='Temperature (K)')
+
+# Use geocat.viz.util convenience functions to set ticks and titles
+gvutil.set_axes_limits_and_ticks(ax,
+                                 ylim=(1000, 200),
+                                 xticks=np.arange(-60, 61, 30),
+                                 yticks=np.array(
+                                     [200, 300, 400, 500, 700, 850, 1000]),
+                                 xticklabels=['60S', '30S', '0', '30N', '60N'])
+gvutil.add_major_minor_ticks(ax, x_minor_per_major=3, labelsize=12)
+gvutil.set_titles_and_labels(ax,
+                             maintitle='Zonal mean T and OMEGA',
+                             ylabel='Pressure (mb)')
+
+plt.show()
@@ -0,0 +1,297 @@
+"""
+kdtree_resample_example.py
+==========================
+
+This script illustrates the following concepts:
+   - Resampling data on a curvilinear (WRF) grid to a regular lat/lon grid
+   - Building a 3-D unit-sphere KD-tree over the source grid once per domain
+     and caching it for later calls
+   - Nearest-neighbour and inverse-distance-weighted (IDW) resampling
+   - Applying the same neighbour indices and weights to all time steps at once
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following GitHub repositories to see further information about the function and to access data:
+    - For "wrfout_d01_2003-07-15_00_00_00" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - scipy
+    - xarray
+    - netCDF4
+    - wrf-python
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import hashlib
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from netCDF4 import Dataset
+from scipy.spatial import cKDTree
+from wrf import ALL_TIMES, getvar, latlon_coords, to_np
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open a WRF output file and read the 2 m water vapor mixing ratio for all
+# time steps. Its latitude and longitude are 2-D curvilinear arrays.
+wrfin = Dataset(gdf.get("netcdf_files/wrfout_d01_2003-07-15_00_00_00"))
+q2 = getvar(wrfin, "Q2", timeidx=ALL_TIMES)
+lats, lons = latlon_coords(q2)
+lats, lons = to_np(lats), to_np(lons)
+
+# `latlon_coords` returns the moving-nest form (time, south_north, west_east)
+# for multiple times; the grid is static here, so keep the first time only
+if lats.ndim == 3:
+    lats, lons = lats[0], lons[0]
+
+###############################################################################
+# Define helper functions for the KD-tree resampler:
+#
+# Neighbours are searched in 3-D Cartesian coordinates on the unit sphere
+# rather than in lat/lon space, so distances are correct across the poles
+# and the antimeridian. The tree depends only on the source grid, so it is
+# cached under a hash of the grid coordinates and reused for every field and
+# target grid on the same domain.
+
+_tree_cache = {}
+
+# Mean Earth radius in km
+EARTH_RADIUS = 6371.0
+
+
+def lonlat_to_xyz(lon, lat):
+    """Convert longitudes and latitudes (degrees) to points on the unit
+    sphere, returned as an array of shape (npts, 3)."""
+    lon = np.deg2rad(np.ravel(lon))
+    lat = np.deg2rad(np.ravel(lat))
+    coslat = np.cos(lat)
+    return np.column_stack(
+        (coslat * np.cos(lon), coslat * np.sin(lon), np.sin(lat)))
+
+
+def get_kdtree(lat, lon):
+    """Return the (cached) unit-sphere KD-tree of a curvilinear grid.
+
+    Parameters
+    ----------
+    lat, lon : :class:`numpy.ndarray`
+        2-D latitude and longitude of the source grid, in degrees.
+
+    Returns
+    -------
+    tree : :class:`scipy.spatial.cKDTree`
+    """
+    lat = np.ascontiguousarray(lat, dtype=np.float64)
+    lon = np.ascontiguousarray(lon, dtype=np.float64)
+    key = (lat.shape, hashlib.sha1(lat).hexdigest(),
+           hashlib.sha1(lon).hexdigest())
+    if key not in _tree_cache:
+        _tree_cache[key] = cKDTree(lonlat_to_xyz(lon, lat))
+    return _tree_cache[key]
+
+
+def resample_weights(src_lat,
+                     src_lon,
+                     dst_lat,
+                     dst_lon,
+                     method='nearest',
+                     k=4,
+                     power=2,
+                     radius_of_influence=None):
+    """Find source neighbours and weights for every target point.
+
+    Parameters
+    ----------
+    src_lat, src_lon : :class:`numpy.ndarray`
+        2-D latitude and longitude of the source grid, in degrees.
+    dst_lat, dst_lon : array_like
+        Target locations in degrees. These can be 2-D arrays (e.g. the
+        lat/lon of a projected target grid) or arrays of any other shape.
+    method : {'nearest', 'idw'}, optional
+        Nearest neighbour, or inverse-distance weighting of the `k` closest
+        source points.
+    k : int, optional
+        Number of neighbours used by 'idw'.
+    power : float, optional
+        Power of the inverse distance used by 'idw'.
+    radius_of_influence : float, optional
+        Maximum distance in km. Target points without a source point within
+        this distance are set to missing.
+
+    Returns
+    -------
+    indices : :class:`numpy.ndarray`
+        Flat source indices of shape (npts, k).
+    weights : :class:`numpy.ndarray`
+        Weights of shape (npts, k) that sum to one for every valid target
+        point and are zero otherwise.
+    """
+    if method not in ('nearest', 'idw'):
+        raise ValueError(
+            "method must be 'nearest' or 'idw', got '{}'".format(method))
+    k = 1 if method == 'nearest' else k
+    tree = get_kdtree(src_lat, src_lon)
+
+    # Convert the great-circle radius to a chord length on the unit sphere
+    max_chord = np.inf
+    if radius_of_influence is not None:
+        max_chord = 2 * np.sin(radius_of_influence / (2 * EARTH_RADIUS))
+
+    dist, indices = tree.query(lonlat_to_xyz(dst_lon, dst_lat),
+                               k=k,
+                               distance_upper_bound=max_chord)
+    dist = dist.reshape(-1, k)
+    indices = indices.reshape(-1, k)
+
+    # Neighbours beyond the radius are returned with an infinite distance and
+    # an out-of-range index
+    found = np.isfinite(dist)
+    indices = np.where(found, indices, 0)
+
+    with np.errstate(divide='ignore'):
+        weights = np.where(found, 1.0 / np.maximum(dist, 1e-12)**power, 0.0)
+    total = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights,
+                        total,
+                        out=np.zeros_like(weights),
+                        where=total > 0)
+    return indices, weights
+
+
+def apply_resample(data, indices, weights, dst_shape):
+    """Apply precomputed neighbours and weights to all leading dimensions
+    (time, level, ...) of a field in one vectorized gather.
+
+    Parameters
+    ----------
+    data : array_like
+        Field whose last two dimensions are the source grid.
+    indices, weights : :class:`numpy.ndarray`
+        Output of `resample_weights`.
+    dst_shape : tuple
+        Shape of the target grid.
+
+    Returns
+    -------
+    resampled : :class:`numpy.ndarray`
+        Array of shape ``data.shape[:-2] + dst_shape``.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    flat = data.reshape(data.shape[:-2] + (-1,))
+
+    # (..., npts, k) gather followed by a weighted sum over neighbours.
+    # Missing source values are dropped and the remaining weights rescaled.
+    values = flat[..., indices]
+    w = np.where(np.isnan(values), 0.0, weights)
+    total = w.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.nansum(values * w, axis=-1) / total
+    out[total == 0] = np.nan
+    return out.reshape(data.shape[:-2] + tuple(dst_shape))
+
+
+###############################################################################
+# Resample to a regular lat/lon grid:
+
+# Regular 0.25 degree target grid covering the WRF domain
+newlat = np.arange(np.ceil(lats.min()), np.floor(lats.max()) + 0.01, 0.25)
+newlon = np.arange(np.ceil(lons.min()), np.floor(lons.max()) + 0.01, 0.25)
+dst_lon, dst_lat = np.meshgrid(newlon, newlat)
+
+# The tree is built on the first call only; the second call reuses it.
+# Target points further than two 30 km grid cells away from the domain are
+# left missing.
+nn_idx, nn_wgt = resample_weights(lats,
+                                  lons,
+                                  dst_lat,
+                                  dst_lon,
+                                  method='nearest',
+                                  radius_of_influence=60)
+idw_idx, idw_wgt = resample_weights(lats,
+                                    lons,
+                                    dst_lat,
+                                    dst_lon,
+                                    method='idw',
+                                    k=4,
+                                    radius_of_influence=60)
+
+# Resample every time step at once
+q2_nn = xr.DataArray(apply_resample(q2, nn_idx, nn_wgt, dst_lat.shape),
+                     dims=q2.dims[:-2] + ('lat', 'lon'),
+                     coords={
+                         'lat': newlat,
+                         'lon': newlon
+                     })
+q2_idw = xr.DataArray(apply_resample(q2, idw_idx, idw_wgt, dst_lat.shape),
+                      dims=q2.dims[:-2] + ('lat', 'lon'),
+                      coords={
+                          'lat': newlat,
+                          'lon': newlon
+                      })
+
+###############################################################################
+# Plot:
+
+# Generate figure (set its size (width, height) in inches)
+fig = plt.figure(figsize=(14, 6))
+
+projection = ccrs.PlateCarree()
+titles = ['Nearest neighbour', 'Inverse distance (k=4)']
+
+for i, (field, title) in enumerate(zip([q2_nn, q2_idw], titles)):
+
+    ax = fig.add_subplot(1, 2, i + 1, projection=projection)
+    ax.coastlines(linewidth=0.5, zorder=5)
+
+    p = ax.contourf(newlon,
+                    newlat,
+                    field.isel({d: 0 for d in field.dims[:-2]}),
+                    levels=np.linspace(0.01125, 0.05, 32),
+                    cmap='magma',
+                    transform=projection)
+
+    # Use geocat.viz.util convenience function to add minor and major tick
+    # lines
+    gvutil.add_major_minor_ticks(ax)
+
+    # Use geocat.viz.util convenience function to set axes limits & tick
+    # values without calling several matplotlib functions
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xlim=(newlon[0], newlon[-1]),
+                                     ylim=(newlat[0], newlat[-1]),
+                                     xticks=np.arange(-105, -80, 5),
+                                     yticks=np.arange(18, 35, 4))
+
+    # Use geocat.viz.util convenience function to make plots look like NCL
+    # plots by using latitude, longitude tick labels
+    gvutil.add_lat_lon_ticklabels(ax)
+
+    # Use geocat.viz.util convenience function to add titles
+    gvutil.set_titles_and_labels(ax,
+                                 maintitle=title,
+                                 lefttitle="QV at 2 M",
+                                 maintitlefontsize=14,
+                                 lefttitlefontsize=12)
+
+# Add a colorbar shared by both panels
+fig.colorbar(p,
+             ax=fig.axes,
+             orientation='horizontal',
+             ticks=np.arange(0.0125, 0.0476, 0.0075),
+             shrink=0.6,
+             pad=0.1)
+
+plt.show()
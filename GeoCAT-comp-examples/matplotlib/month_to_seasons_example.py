@@ -0,0 +1,197 @@
+"""
+month_to_seasons_example.py
+===========================
+
+This script illustrates the following concepts:
+   - Computing several seasonal means (DJF, MAM, JJA, SON) in a single pass
+     over the time axis, as an alternative to calling geocat-comp's
+     `month_to_season` once per season
+   - Handling the December-January year boundary of DJF
+   - Returning all seasons stacked along a `season` dimension
+   - Getting all twelve running 3-month means from the same computation
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following GitHub repositories to see further information about the function and to access data:
+    - For `month_to_season` function: https://github.com/NCAR/geocat-comp
+    - For "slp.mon.mean.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.comp
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.comp import month_to_season
+from geocat.viz import cmaps as gvcmaps
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine, chunked along time as
+# large model output would be, and limit it to the years 1979-2003
+ds = xr.open_dataset(gdf.get('netcdf_files/slp.mon.mean.nc'),
+                     chunks={'time': 60})
+ds = ds.sel(time=slice('1979-01-01', '2003-12-31'))
+
+###############################################################################
+# Define helper function to compute many seasons at once:
+#
+# A 3-month seasonal mean is the centred 3-month running mean sampled at the
+# middle month of the season (e.g. January for DJF). The running mean is
+# computed once for the whole (lazily chunked) time axis, and every requested
+# season is then just a selection of it, so adding seasons does not add
+# passes over the data. Because the running mean runs over the contiguous
+# monthly axis, DJF labelled with year Y uses December of year Y-1, like NCL's
+# `month_to_season`. Seasons whose three months are not all available (e.g.
+# the first DJF) are set to missing rather than averaged over fewer months.
+
+# Middle month of every 3-month season
+SEASON_CENTERS = {
+    'DJF': 1,
+    'JFM': 2,
+    'FMA': 3,
+    'MAM': 4,
+    'AMJ': 5,
+    'MJJ': 6,
+    'JJA': 7,
+    'JAS': 8,
+    'ASO': 9,
+    'SON': 10,
+    'OND': 11,
+    'NDJ': 12
+}
+
+
+def month_to_seasons(obj,
+                     seasons=('DJF', 'MAM', 'JJA', 'SON'),
+                     time_coord_name='time'):
+    """Compute 3-month seasonal means for several seasons in one pass.
+
+    Parameters
+    ----------
+    obj : :class:`xarray.DataArray` or :class:`xarray.Dataset`
+        Contiguous monthly data. May be dask-backed.
+    seasons : sequence of str, optional
+        Seasons to compute, any of the keys of `SEASON_CENTERS`. Passing all
+        twelve returns every running 3-month mean.
+    time_coord_name : str, optional
+        Name of the time coordinate.
+
+    Returns
+    -------
+    seasonal : :class:`xarray.DataArray` or :class:`xarray.Dataset`
+        Seasonal means with the time dimension replaced by `year` and a new
+        `season` dimension, ordered as in `seasons`.
+    """
+    unknown = [s for s in seasons if s not in SEASON_CENTERS]
+    if unknown:
+        raise ValueError('Unknown season(s): {}'.format(unknown))
+
+    time_coord = obj[time_coord_name]
+    year = time_coord.dt.year.values
+    month = time_coord.dt.month.values
+
+    # The running mean is only a seasonal mean on a gap-free monthly axis
+    if np.any(np.diff(year * 12 + month) != 1):
+        raise ValueError('month_to_seasons requires contiguous monthly data')
+
+    running = obj.rolling({time_coord_name: 3}, center=True).mean()
+
+    years = np.unique(year)
+    stacked = []
+    for season in seasons:
+        idx = np.flatnonzero(month == SEASON_CENTERS[season])
+        sea = running.isel({time_coord_name: idx})
+        sea = sea.assign_coords(year=(time_coord_name, year[idx]))
+        sea = sea.swap_dims({time_coord_name: 'year'})
+        stacked.append(sea.drop_vars(time_coord_name).reindex(year=years))
+
+    return xr.concat(stacked, dim=xr.DataArray(list(seasons), dims='season'))
+
+
+###############################################################################
+# Compare with one `month_to_season` call per season:
+
+seasons = ['DJF', 'MAM', 'JJA', 'SON']
+
+start = time.perf_counter()
+per_season = [month_to_season(ds, s).slp.compute() for s in seasons]
+print('month_to_season x {}: {:.3f} s'.format(len(seasons),
+                                              time.perf_counter() - start))
+
+start = time.perf_counter()
+slp_seasons = month_to_seasons(ds.slp, seasons).compute()
+print('month_to_seasons:     {:.3f} s'.format(time.perf_counter() - start))
+
+# All twelve running 3-month means come out of the same single pass
+slp_running = month_to_seasons(ds.slp, list(SEASON_CENTERS))
+print(slp_running.sizes)
+
+###############################################################################
+# Plot:
+
+# Seasonal climatology over all years with a complete season
+climatology = slp_seasons.mean('year')
+
+# Generate figure and axes using Cartopy projection and set figure size
+# (width, height) in inches
+fig, axs = plt.subplots(2,
+                        2,
+                        subplot_kw={'projection': ccrs.PlateCarree()},
+                        figsize=(12, 7))
+
+for ax, season in zip(axs.flat, seasons):
+    cplot = ax.contourf(climatology.lon,
+                        climatology.lat,
+                        climatology.sel(season=season),
+                        levels=np.arange(980, 1036, 5),
+                        cmap=gvcmaps.BlWhRe,
+                        extend='both',
+                        transform=ccrs.PlateCarree())
+    ax.coastlines(linewidth=0.5)
+
+    # Use geocat.viz.util convenience function to set axes tick values
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xticks=np.linspace(-180, 180, 7),
+                                     yticks=np.linspace(-90, 90, 7))
+
+    # Use geocat.viz.util convenience function to make plots look like NCL
+    # plots, using latitude & longitude tick labels
+    gvutil.add_lat_lon_ticklabels(ax)
+
+    # Use geocat.viz.util convenience function to add titles to left and
+    # right of the plot axis
+    gvutil.set_titles_and_labels(ax,
+                                 lefttitle='SLP: ' + season,
+                                 lefttitlefontsize=12,
+                                 righttitle='hPa',
+                                 righttitlefontsize=12)
+
+# Add horizontal colorbar
+cbar = plt.colorbar(cplot,
+                    ax=axs,
+                    orientation='horizontal',
+                    shrink=0.7,
+                    pad=0.08,
+                    fraction=.04)
+cbar.ax.tick_params(labelsize=10)
+
+# Show the plot
+plt.show()
@@ -0,0 +1,279 @@
+"""
+wrf_diagnostic_cache_example.py
+===============================
+
+This script illustrates the following concepts:
+   - Memoizing derived WRF fields (height, pressure, reflectivity, ...) so
+     several plots of the same run reuse them instead of re-deriving them
+   - Keying the cache by file, variable, time index and spatial window
+   - Bounding the cache by memory size, and optionally spilling evicted
+     fields to local disk
+   - Computing a diagnostic for many time steps, optionally in forked worker
+     processes
+   - Usage of geocat-datafiles for accessing NetCDF files
+
+See following URLs to see the related NCL-style examples:
+    - NCL_WRF_zoom_1_2.py, NCL_dataonmap_10.py, NCL_wrf_interp_3.py and
+      NCL_overlay_12.py in this gallery
+    - For "wrfout_d01_2003-07-15_00_00_00" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - numpy
+    - xarray
+    - netCDF4
+    - wrf-python
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import hashlib
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from netCDF4 import Dataset
+from wrf import get_cartopy, getvar, latlon_coords, to_np
+
+import geocat.datafiles as gdf
+
+###############################################################################
+# Define the diagnostic cache:
+#
+# Derived fields are kept in a process-wide, least-recently-used dict keyed
+# by (file, modification time, variable, time index, window, options). When
+# the fields held exceed `CACHE_MAX_BYTES`, the least recently used ones are
+# evicted; with a spill directory they are pickled to disk on eviction and
+# read back from there on the next request, which is still much cheaper than
+# re-deriving them. `getvar_times` computes the time steps of one variable
+# serially, or, in a standalone script on Linux, optionally in forked worker
+# processes; every worker has its own cache, and the results are added to the
+# cache of the calling process.
+#
+# A window is cut from the diagnostic of the whole domain, so that only the
+# window is kept in the cache. Computing only the window, for diagnostics
+# where that is exact, is shown in wrf_window_diagnostics_example.py.
+
+# Upper bound of the memory held by cached fields
+CACHE_MAX_BYTES = 512 * 1024**2
+
+_diag_cache = OrderedDict()
+_cache_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'nbytes': 0}
+
+
+def _hashable(value):
+    """`value`, or its repr for unhashable values such as lists."""
+    try:
+        hash(value)
+    except TypeError:
+        return repr(np.asarray(value).tolist())
+    return value
+
+
+def _cache_key(path, varname, timeidx, window, kwargs):
+    path = os.path.abspath(path)
+    window = tuple(
+        sorted((dim, (s.start, s.stop)) for dim, s in (window or {}).items()))
+    return (path, os.path.getmtime(path), _hashable(varname),
+            _hashable(timeidx), window,
+            tuple(sorted((k, _hashable(v)) for k, v in kwargs.items())))
+
+
+def _spill_path(spill_dir, key):
+    return os.path.join(spill_dir,
+                        hashlib.sha1(repr(key).encode()).hexdigest() + '.pkl')
+
+
+def _cache_store(key, value, spill_dir):
+    _diag_cache[key] = value
+    _cache_stats['nbytes'] += value.nbytes
+    while _cache_stats['nbytes'] > CACHE_MAX_BYTES and len(_diag_cache) > 1:
+        old_key, old_value = _diag_cache.popitem(last=False)
+        _cache_stats['nbytes'] -= old_value.nbytes
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            with open(_spill_path(spill_dir, old_key), 'wb') as f:
+                pickle.dump(old_value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def cached_getvar(path,
+                  varname,
+                  timeidx=0,
+                  window=None,
+                  spill_dir=None,
+                  **kwargs):
+    """Memoized ``wrf.getvar``.
+
+    Parameters
+    ----------
+    path : str
+        Path of the wrfout file.
+    varname : str
+        Any variable or diagnostic name accepted by ``wrf.getvar``.
+    timeidx : int, optional
+        Time index.
+    window : dict of slice, optional
+        Window of the result, as slices of its dimensions by name.
+    spill_dir : str, optional
+        Directory evicted fields are written to and read back from.
+    **kwargs
+        Further arguments of ``wrf.getvar`` (e.g. ``units``); they are part
+        of the cache key.
+
+    Returns
+    -------
+    field : :class:`xarray.DataArray`
+        The diagnostic. It is shared with later calls, so it should not be
+        modified in place.
+    """
+    key = _cache_key(path, varname, timeidx, window, kwargs)
+    if key in _diag_cache:
+        _cache_stats['hits'] += 1
+        _diag_cache.move_to_end(key)
+        return _diag_cache[key]
+
+    spilled = None if spill_dir is None else _spill_path(spill_dir, key)
+    if spilled is not None and os.path.exists(spilled):
+        _cache_stats['disk_hits'] += 1
+        with open(spilled, 'rb') as f:
+            value = pickle.load(f)
+    else:
+        _cache_stats['misses'] += 1
+        wrfin = Dataset(path)
+        value = getvar(wrfin, varname, timeidx=timeidx, **kwargs)
+        wrfin.close()
+        if window:
+            # A copy, so that the whole domain is not kept alive by the cache
+            value = value.isel({
+                dim: s for dim, s in window.items() if dim in value.dims
+            }).copy()
+
+    _cache_store(key, value, spill_dir)
+    return value
+
+
+def getvar_times(path,
+                 varname,
+                 timeidxs,
+                 window=None,
+                 max_workers=1,
+                 spill_dir=None,
+                 **kwargs):
+    """Compute one diagnostic for many time steps.
+
+    Cached time steps are taken from the cache; the others are computed and
+    added to it. Returns the time steps concatenated along a new 'Time'
+    dimension.
+
+    By default the time steps are computed one after the other. With
+    `max_workers` > 1 they are computed in forked worker processes, which
+    start from the state of this script instead of importing and running it
+    again. Forking is only safe in a standalone script on Linux: it is unsafe
+    on macOS and in processes that already run threads (e.g. of dask or
+    BLAS), so elsewhere the time steps are still computed serially.
+    """
+    fields = {}
+    todo = []
+    for t in timeidxs:
+        if _cache_key(path, varname, t, window, kwargs) in _diag_cache:
+            fields[t] = cached_getvar(path, varname, t, window, spill_dir,
+                                      **kwargs)
+        else:
+            todo.append(t)
+
+    if todo and (max_workers <= 1 or not sys.platform.startswith('linux')):
+        for t in todo:
+            fields[t] = cached_getvar(path, varname, t, window, spill_dir,
+                                      **kwargs)
+    elif todo:
+        with multiprocessing.get_context('fork').Pool(max_workers) as pool:
+            results = [
+                pool.apply_async(cached_getvar,
+                                 (path, varname, t, window, spill_dir), kwargs)
+                for t in todo
+            ]
+            results = [result.get() for result in results]
+        for t, field in zip(todo, results):
+            fields[t] = field
+            _cache_stats['misses'] += 1
+            _cache_store(_cache_key(path, varname, t, window, kwargs), field,
+                         spill_dir)
+
+    return xr.concat([fields[t] for t in timeidxs], dim='Time')
+
+
+###############################################################################
+# Simulate the plots of a post-processing run:
+
+path = gdf.get("netcdf_files/wrfout_d01_2003-07-15_00_00_00")
+spill_dir = tempfile.mkdtemp()
+
+# Every plot asks for the fields it needs; height and pressure are shared
+plots = [
+    ['z', 'pressure', 'HGT'],  # cross sections
+    ['dbz', 'HGT', 'XLAT', 'XLONG'],  # reflectivity overlay
+    ['td2', 'XLAT', 'XLONG'],  # dewpoint map
+    ['z', 'pressure', 'tk'],  # height/temperature on pressure levels
+]
+
+for n, names in enumerate(plots):
+    start = time.perf_counter()
+    for name in names:
+        cached_getvar(path, name, spill_dir=spill_dir)
+    print('Plot {}: {:.3f} s'.format(n + 1, time.perf_counter() - start))
+print(_cache_stats)
+
+# A window is cached separately from the whole domain
+zoom = dict(south_north=slice(10, 40), west_east=slice(10, 50))
+td2_zoom = cached_getvar(path, 'td2', window=zoom, spill_dir=spill_dir)
+
+###############################################################################
+# Compute all time steps:
+
+with Dataset(path) as wrfin:
+    ntimes = len(wrfin.dimensions['Time'])
+start = time.perf_counter()
+slp = getvar_times(path, 'slp', list(range(ntimes)), spill_dir=spill_dir)
+print('slp for {} time steps: {:.3f} s'.format(ntimes,
+                                               time.perf_counter() - start))
+
+# The second request is served from the cache
+start = time.perf_counter()
+getvar_times(path, 'slp', list(range(ntimes)), spill_dir=spill_dir)
+print('again, from the cache: {:.3f} s'.format(time.perf_counter() - start))
+
+# Remove the spill directory
+shutil.rmtree(spill_dir)
+
+###############################################################################
+# Plot:
+
+fig = plt.figure(figsize=(14, 6))
+
+for i, (field, title) in enumerate([(slp.isel(Time=-1), 'Sea level pressure'),
+                                    (td2_zoom, '2m Dewpoint (window)')]):
+    lats, lons = latlon_coords(field)
+    ax = fig.add_subplot(1, 2, i + 1, projection=get_cartopy(field))
+    cf = ax.contourf(to_np(lons),
+                     to_np(lats),
+                     to_np(field),
+                     levels=13,
+                     cmap='viridis',
+                     transform=ccrs.PlateCarree())
+    ax.coastlines('50m', linewidth=0.8)
+    fig.colorbar(cf, ax=ax, orientation='horizontal', shrink=0.8, pad=0.05)
+    ax.set_title(title, loc='left', size=12)
+
+plt.show()
@@ -0,0 +1,237 @@
+"""
+wrf_window_diagnostics_example.py
+=================================
+
+This script illustrates the following concepts:
+   - Computing WRF diagnostics with wrf-python on a spatial window, a
+     subset of levels or a subset of times only, instead of on the whole
+     domain followed by slicing
+   - Reading only the window of the raw variables, including the matching
+     windows of staggered dimensions, into an in-memory netCDF4 Dataset
+     that is passed to ``wrf.getvar``
+   - Checking the windowed diagnostics against the whole-domain ones
+   - Usage of geocat-datafiles for accessing NetCDF files
+
+See following URLs to see the related NCL-style examples:
+    - NCL_WRF_zoom_1_2.py and NCL_overlay_12.py in this gallery
+    - For the wrfout files: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data files)
+    - numpy
+    - netCDF4
+    - wrf-python
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+from netCDF4 import Dataset
+from wrf import get_cartopy, getvar, latlon_coords, to_np
+
+import geocat.datafiles as gdf
+
+###############################################################################
+# Define helper function for windowed reads:
+#
+# wrf-python reads its input through ``netCDF4.Dataset``. `wrf_window` reads
+# only a window of the variables a diagnostic needs and writes it to a
+# diskless (in-memory) ``netCDF4.Dataset`` with the same dimensions and
+# attributes, which is then passed to ``wrf.getvar`` like the file itself.
+#
+# Most WRF diagnostics are computed column by column from variables at the
+# same grid point, so computing them on a window of the raw variables gives
+# exactly the window of the full-domain result. For a horizontal window the
+# staggered dimensions keep one extra point, so that de-staggering at the
+# window edges is also exact. Selecting levels is only exact for diagnostics
+# that do not integrate or interpolate in the vertical (e.g. 'dbz', 'tk',
+# 'rh', 'td', but not 'z', 'slp' or 'cape_2d'), and diagnostics using
+# horizontal derivatives (e.g. 'avo', 'pvo') differ at the window edges.
+
+# Unstaggered dimension of every staggered WRF dimension
+STAGGERED_DIMS = {
+    'south_north_stag': 'south_north',
+    'west_east_stag': 'west_east',
+    'bottom_top_stag': 'bottom_top'
+}
+
+
+def wrf_window(wrfin, variables=None, **window):
+    """Read a window of a WRF file into an in-memory netCDF4 Dataset.
+
+    Parameters
+    ----------
+    wrfin : :class:`netCDF4.Dataset`
+        Open wrfout file.
+    variables : list of str, optional
+        Raw variables the diagnostic is computed from, e.g. ['PSFC', 'Q2']
+        for 'td2'. 'Times' and the variables named in their 'coordinates'
+        attributes, which wrf-python uses for the metadata, are added. All
+        variables are copied if not given.
+    **window : slice
+        Slices with step 1 of any of the dimensions 'Time', 'bottom_top',
+        'south_north' and 'west_east'. The matching staggered dimensions
+        are extended by one point.
+
+    Returns
+    -------
+    windowed : :class:`netCDF4.Dataset`
+        Diskless Dataset with the window of the variables, to be passed to
+        ``wrf.getvar`` and closed afterwards.
+    """
+    slices = dict(window)
+    for stag, dim in STAGGERED_DIMS.items():
+        if dim in window and stag in wrfin.dimensions:
+            start, stop, _ = window[dim].indices(len(wrfin.dimensions[dim]))
+            slices[stag] = slice(start, stop + 1)
+
+    names = list(wrfin.variables)
+    if variables is not None:
+        needed = {'Times'}
+        for name in variables:
+            needed.add(name)
+            needed.update(
+                getattr(wrfin.variables[name], 'coordinates', '').split())
+        names = [name for name in names if name in needed]
+
+    # wrf-python caches coordinates by file path, so every window gets its own
+    windowed = Dataset('{}{}{}'.format(wrfin.filepath(), sorted(slices.items()),
+                                       names),
+                       mode='w',
+                       diskless=True)
+    windowed.setncatts(wrfin.__dict__)
+    for name, dim in wrfin.dimensions.items():
+        size = len(dim)
+        if name in slices:
+            size = len(range(*slices[name].indices(size)))
+        windowed.createDimension(name, None if dim.isunlimited() else size)
+
+    for name in names:
+        var = wrfin.variables[name]
+        attrs = var.__dict__
+        out = windowed.createVariable(name,
+                                      var.dtype,
+                                      var.dimensions,
+                                      fill_value=attrs.pop('_FillValue', None))
+        out.setncatts(attrs)
+        # Only the window is read from the file
+        out[...] = var[tuple(
+            slices.get(d, slice(None)) for d in var.dimensions)]
+    return windowed
+
+
+# Raw variables of the diagnostics used below. wrf-python also takes the
+# metadata of 'ua', 'va' and 'z' from 'P'.
+RAW_VARIABLES = {
+    'td2': ['PSFC', 'Q2'],
+    'tk': ['T', 'P', 'PB'],
+    'rh': ['T', 'P', 'PB', 'QVAPOR'],
+    'ua': ['U', 'P'],
+    'va': ['V', 'P'],
+    'z': ['PH', 'PHB', 'HGT', 'P'],
+    'slp': ['T', 'P', 'PB', 'QVAPOR', 'PH', 'PHB'],
+    'dbz': ['T', 'P', 'PB', 'QVAPOR', 'QRAIN', 'QSNOW', 'QGRAUP']
+}
+
+###############################################################################
+# Zoomed 2 m dewpoint (NCL_WRF_zoom_1_2.py):
+
+path = gdf.get("netcdf_files/wrfout_d03_2012-04-22_23_00_00_subset.nc")
+wrfin = Dataset(path)
+
+# The north-western quarter of the domain, as in NCL_WRF_zoom_1_2.py
+ny, nx = len(wrfin.dimensions['south_north']), len(
+    wrfin.dimensions['west_east'])
+zoom = dict(south_north=slice(ny // 2, ny - 1), west_east=slice(0, nx // 2))
+
+# Whole domain first, then the window
+start = time.perf_counter()
+td2_full = getvar(wrfin, "td2")[zoom['south_north'], zoom['west_east']]
+full_time = time.perf_counter() - start
+
+# Window first
+start = time.perf_counter()
+windowed = wrf_window(wrfin, RAW_VARIABLES['td2'], **zoom)
+td2_zoom = getvar(windowed, "td2")
+window_time = time.perf_counter() - start
+windowed.close()
+wrfin.close()
+
+print('td2: whole domain {:.3f} s, window first {:.3f} s, identical: {}'.format(
+    full_time, window_time, np.allclose(to_np(td2_full), to_np(td2_zoom))))
+
+###############################################################################
+# Check windowed diagnostics against the whole domain:
+#
+# Every diagnostic is computed on the whole domain and sliced to the window,
+# and computed on a window of its raw variables only. 'ua' and 'va'
+# de-stagger U and V, so they depend on the extra point of the staggered
+# dimensions; 'z' and 'slp' need whole columns.
+
+path = gdf.get("netcdf_files/wrfout_d01_2003-07-15_00_00_00")
+wrfin = Dataset(path)
+
+ny, nx = len(wrfin.dimensions['south_north']), len(
+    wrfin.dimensions['west_east'])
+box = dict(south_north=slice(ny // 4, 3 * ny // 4),
+           west_east=slice(nx // 4, 3 * nx // 4))
+
+for name, variables in RAW_VARIABLES.items():
+    full = getvar(wrfin, name)
+    full = full.isel({dim: box[dim] for dim in full.dims if dim in box})
+    windowed = wrf_window(wrfin, variables, **box)
+    window = getvar(windowed, name)
+    print('{:4s} {:2d} of {} variables read, largest difference to the whole '
+          'domain: {:.2e}'.format(
+              name, len(windowed.variables), len(wrfin.variables),
+              float(np.nanmax(np.abs(to_np(full) - to_np(window))))))
+    windowed.close()
+
+###############################################################################
+# Lowest-level reflectivity (NCL_overlay_12.py):
+
+start = time.perf_counter()
+dbz_full = getvar(wrfin, "dbz")[0, :, :]
+full_time = time.perf_counter() - start
+
+# Only the lowest levels of the raw variables are read. Two are kept, since
+# wrf-python drops a vertical dimension of length one.
+start = time.perf_counter()
+windowed = wrf_window(wrfin, RAW_VARIABLES['dbz'], bottom_top=slice(0, 2))
+dbz_sfc = getvar(windowed, "dbz")[0, :, :]
+window_time = time.perf_counter() - start
+windowed.close()
+wrfin.close()
+
+print('dbz: all levels {:.3f} s, lowest two levels {:.3f} s, identical: {}'.
+      format(full_time, window_time, np.allclose(to_np(dbz_full),
+                                                 to_np(dbz_sfc))))
+
+###############################################################################
+# Plot:
+
+fig = plt.figure(figsize=(14, 6))
+
+for i, (field, title,
+        cmap) in enumerate([(td2_zoom, '2m Dewpoint (C)', 'magma'),
+                            (dbz_sfc, 'Lowest level dBZ', 'viridis')]):
+    lats, lons = latlon_coords(field)
+    ax = fig.add_subplot(1, 2, i + 1, projection=get_cartopy(field))
+    cf = ax.contourf(to_np(lons),
+                     to_np(lats),
+                     to_np(field),
+                     levels=13,
+                     cmap=cmap,
+                     transform=ccrs.PlateCarree())
+    ax.coastlines('50m', linewidth=0.8)
+    fig.colorbar(cf, ax=ax, orientation='horizontal', shrink=0.8, pad=0.05)
+    ax.set_title(title, loc='left', size=12)
+
+plt.show()
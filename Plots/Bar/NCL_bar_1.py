@@ -32,12 +32,8 @@ dsoik = ds.DSOI_KET
 # Dates in the file are represented by year and month (YYYYMM)
 # representing them fractionally will make plotting the data easier
 # This produces the same results as NCL's yyyymm_to_yyyyfrac() function
-num_months = np.shape(date)[0]
-date_frac = np.empty_like(date)
-for n in np.arange(0, num_months, 1):
-    yyyy = int(date[n] / 100)
-    mon = (date[n] / 100 - yyyy) * 100
-    date_frac[n] = yyyy + (mon - 1) / 12
+yyyy, mm = np.divmod(np.rint(date.values).astype(np.int64), 100)
+date_frac = yyyy + (mm - 1) / 12
 
 ###############################################################################
 # Plot 1 (Bar chart)
@@ -15,6 +15,7 @@ See following URLs to see the reproduced NCL plot & script:
 ###############################################################################
 # Import packages
 
+import cftime
 import numpy as np
 import xarray as xr
 import matplotlib.pyplot as plt
@@ -33,15 +34,98 @@ date = ds.date
 #scale the sst variable to range from around -1 to 1
 sst = sst * .1
 
+###############################################################################
+# Define helper functions to decode dates and extract event windows:
+
+
+def decode_integer_dates(dates, units='frac'):
+    """Decode integer YYYYMM or YYYYMMDD dates in one vectorized call.
+
+    Parameters
+    ----------
+    dates : array_like
+        Integer dates. Values of eight digits are read as YYYYMMDD, shorter
+        values as YYYYMM.
+    units : {'frac', 'datetime64', 'cftime'}, optional
+        'frac' returns fractional years, the same as NCL's yyyymm_to_yyyyfrac()
+        and yyyymmdd_to_yyyyfrac() functions. 'datetime64' returns
+        :class:`numpy.datetime64` dates and 'cftime' returns
+        :class:`cftime.datetime` dates of the standard calendar, which
+        xarray and matplotlib use directly.
+
+    Returns
+    -------
+    decoded : :class:`numpy.ndarray`
+    """
+    dates = np.rint(np.asarray(dates)).astype(np.int64)
+    daily = dates >= 10000101
+    yyyymm = np.where(daily, dates // 100, dates)
+    dd = np.where(daily, dates % 100, 1)
+    yyyy, mm = np.divmod(yyyymm, 100)
+
+    if units == 'frac':
+        # Months are twelfths of a year; days are fractions of their year
+        frac = yyyy + (mm - 1) / 12
+        if daily.any():
+            year = (yyyy - 1970).astype('datetime64[Y]')
+            day = (year.astype('datetime64[M]') +
+                   (mm - 1)).astype('datetime64[D]') + (dd - 1)
+            start = year.astype('datetime64[D]')
+            ndays = (year + 1).astype('datetime64[D]') - start
+            frac = np.where(daily, yyyy + (day - start) / ndays, frac)
+        return frac
+
+    if units in ('datetime64', 'cftime'):
+        month = (yyyy - 1970
+                ).astype('datetime64[Y]').astype('datetime64[M]') + (mm - 1)
+        day = month.astype('datetime64[D]') + (dd - 1)
+        if units == 'datetime64':
+            return day
+        return cftime.num2date(day.astype(np.int64),
+                               'days since 1970-01-01',
+                               calendar='standard')
+
+    raise ValueError(
+        "units must be 'frac', 'datetime64' or 'cftime', got '{}'".format(
+            units))
+
+
+def event_windows(times, starts, length):
+    """Return the indices of many equal-length windows of a sorted time axis.
+
+    Parameters
+    ----------
+    times : array_like
+        Sorted time coordinate, e.g. fractional years.
+    starts : array_like
+        Start time of each window. Every start time must be on the time
+        axis.
+    length : int
+        Number of time steps per window.
+
+    Returns
+    -------
+    index : :class:`numpy.ndarray`
+        Integer array of shape (len(starts), length). Indexing any array on
+        the same time axis with it returns all windows stacked at once.
+    """
+    times, starts = np.asarray(times), np.asarray(starts)
+
+    # A small tolerance absorbs round-off in fractional years
+    first = np.searchsorted(times, starts - 1e-6)
+    found = np.minimum(first, len(times) - 1)
+    missing = (first == len(times)) | (np.abs(times[found] - starts) > 1e-6)
+    if missing.any():
+        raise ValueError('start times not found in the data: {}'.format(
+            starts[missing]))
+    if np.any(first + length > len(times)):
+        raise ValueError('event window extends past the end of the data')
+    return first[:, np.newaxis] + np.arange(length)
+
+
 # Dates in the file are represented by year and month (YYYYMM)
 # representing them fractionally will make plotting the data easier
-# This produces the same results as NCL's yyyymm_to_yyyyfrac() function
-num_months = np.shape(date)[0]
-date_frac = np.empty_like(date)
-for n in np.arange(0, num_months, 1):
-    yyyy = int(date[n] / 100)
-    mon = (date[n] / 100 - yyyy) * 100
-    date_frac[n] = yyyy + (mon - 1) / 12
+date_frac = decode_integer_dates(date)
 
 ###############################################################################
 # Plot:
@@ -68,25 +152,22 @@ for height in heights_list:
     ax_dict["ax" + str(i)] = fig.add_axes([0.003, height, 0.984, 0.0658])
     i = i + 1
 
-# Loop through the axes created in ax_dict and years in warm to make a bar plot for each set
-for ax, year in zip(ax_dict, warm):
-    # Find year limits of each bar chart
-    year_start = year - 1
-    year_end = year + 3
+# Extract the 4-year window (January of the year before each warm event up to
+# January three years later) of all warm events at once
+windows = event_windows(date_frac, np.array(warm) - 1, 48)
+date_windows = date_frac[windows]
+sst_windows = sst.values[windows]
 
-    # Find the indices for each of the year limits
-    year_istart = int(np.where(np.round(date_frac, 3) == year_start)[0])
-    year_iend = int(np.where(np.round(date_frac, 3) == year_end)[0])
+# Bars are red if they are above 0 and blue if below
+color_windows = np.where(sst_windows > 0, 'red', 'blue')
 
-    # Create each bar chart where it is red if it is above 0 and blue if below
-    ax_dict[ax].bar(date_frac[year_istart:year_iend],
-                    sst[year_istart:year_iend],
+# Loop through the axes created in ax_dict and the event windows to make a bar plot for each set
+for i, ax in enumerate(ax_dict):
+    ax_dict[ax].bar(date_windows[i],
+                    sst_windows[i],
                     align='edge',
                     edgecolor='black',
-                    color=[
-                        'red' if (value > 0) else 'blue'
-                        for value in sst[year_istart:year_iend]
-                    ],
+                    color=color_windows[i],
                     width=.08,
                     linewidth=1)
     # Turn off axis so it is not visible
@@ -168,34 +249,22 @@ plt.plot()
 # Create the figure with figure size (width, height) in inches
 fig2, ax2 = plt.subplots(11, 1, figsize=(6, 8))
 
-# Loop through all of the years and plot them as a bar chart
-i = 0
-for year in warm:
-    # Find year limits of each bar chart
-    year_start = year - 1
-    year_end = year + 3
-
-    # Find the indices for each of the year limits
-    year_istart = int(np.where(np.round(date_frac, 3) == year_start)[0])
-    year_iend = int(np.where(np.round(date_frac, 3) == year_end)[0])
-
+# Loop through all of the years and plot the event windows as a bar chart
+for i, year in enumerate(warm):
     # Create each bar chart where it is red if it is above 0 and blue if below
-    ax2[i].bar(date_frac[year_istart:year_iend],
-               sst[year_istart:year_iend],
+    ax2[i].bar(date_windows[i],
+               sst_windows[i],
                align='edge',
                edgecolor='black',
-               color=[
-                   'red' if (value > 0) else 'blue'
-                   for value in sst[year_istart:year_iend]
-               ],
+               color=color_windows[i],
                width=.08,
                linewidth=1)
 
     # Set ticks and limits for axes using convenience function
     gvutil.set_axes_limits_and_ticks(ax2[i],
-                                     xlim=((year_start), year_end),
-                                     xticks=np.linspace(year_start, year_end,
-                                                        5),
+                                     xlim=(date_windows[i, 0],
+                                           date_windows[i, 0] + 4),
+                                     xticks=date_windows[i, 0] + np.arange(5),
                                      ylim=(-3, 3.5),
                                      yticks=np.linspace(-2, 2, 3))
 
@@ -213,8 +282,6 @@ for year in warm:
     ax2[i].tick_params(axis="x", size=5, labelsize=5)
     ax2[i].tick_params(axis="y", size=7, labelsize=6)
 
-    i = i + 1
-
 # Adjust the white space between each subplot
 plt.subplots_adjust(hspace=1)
 
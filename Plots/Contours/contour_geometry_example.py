@@ -0,0 +1,335 @@
+"""
+contour_geometry_example.py
+===========================
+
+This script illustrates the following concepts:
+   - Computing the polygons and lines of a contour plot once for a field
+     and a set of levels
+   - Drawing filled, hatched, re-coloured and line versions of the same
+     contours from the stored geometry, without contouring the field again
+   - Comparing against repeated ``contourf``/``contour`` calls as made by
+     NCL_hov_3.py, CB_Rain.py and NCL_panel_6.py
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_hov_3.py, CB_Rain.py and NCL_panel_6.py in this gallery
+    - For "chi200_ud_smooth.nc" and "pre.8912.mon.nc" files: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from matplotlib.artist import Artist
+from matplotlib.collections import PathCollection
+from matplotlib.colors import BoundaryNorm
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.viz import cmaps as gvcmaps
+
+try:
+    # Contouring library of matplotlib 3.6 and later
+    import contourpy
+except ImportError:
+    contourpy = None
+
+###############################################################################
+# Read in data:
+
+# Open netCDF data files using xarray default engine and load the data into
+# xarray
+chi = xr.open_dataset(gdf.get('netcdf_files/chi200_ud_smooth.nc')).CHI / 1e6
+pre = xr.open_dataset(gdf.get("netcdf_files/pre.8912.mon.nc")).pre[0, :]
+
+###############################################################################
+# Define helper functions for contour geometry:
+#
+# The expensive part of ``contourf`` and ``contour`` is tracing the polygons
+# and lines through the field. `contour_geometry` does that once, with the
+# contourpy library behind matplotlib's contouring (or, for matplotlib
+# versions before 3.6, on a figure that is never drawn), and keeps one
+# compound path per filled band and per line level. `draw_filled` and
+# `draw_lines` turn these paths into ordinary collections, so the same
+# geometry can be drawn with any colormap, colours, hatches or line styles,
+# on any number of axes.
+
+
+def _level_paths(cs):
+    """One compound path per level of a ContourSet. Before matplotlib 3.8
+    the paths of every level are held by a separate collection."""
+    if isinstance(cs, Artist):
+        return list(cs.get_paths())
+    return [Path.make_compound_path(*c.get_paths()) for c in cs.collections]
+
+
+def _compound(points, codes):
+    """One path from the point and code arrays of several polygons or
+    lines."""
+    if len(points) == 0:
+        return Path(np.empty((0, 2)))
+    return Path(np.concatenate(points), np.concatenate(codes))
+
+
+def contour_geometry(x, y, z, levels, filled=True, lines=True):
+    """Trace the filled bands and the lines of `z` once.
+
+    Parameters
+    ----------
+    x, y : array_like
+        1-D or 2-D coordinates of `z`, as for ``contourf``.
+    z : array_like
+        2-D field. Missing values are left out of the contours.
+    levels : array_like
+        Increasing contour levels.
+    filled, lines : bool, optional
+        Whether to trace the filled bands and the lines.
+
+    Returns
+    -------
+    geometry : dict
+        `levels`, `filled` (one path per band between consecutive levels)
+        and `lines` (one path per level).
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    z = np.ma.masked_invalid(np.asarray(z, dtype=np.float64))
+    levels = np.asarray(levels, dtype=np.float64)
+    geometry = {'levels': levels}
+
+    if contourpy is None:
+        # Older matplotlib: trace on a figure that is never drawn
+        ax = Figure().add_subplot(111)
+        if filled:
+            geometry['filled'] = _level_paths(ax.contourf(x, y, z, levels))
+        if lines:
+            geometry['lines'] = _level_paths(ax.contour(x, y, z, levels))
+        return geometry
+
+    if x.ndim == 1:
+        x, y = np.meshgrid(x, y)
+    generator = contourpy.contour_generator(x,
+                                            y,
+                                            z,
+                                            fill_type='OuterCode',
+                                            line_type='SeparateCode')
+    if filled:
+        geometry['filled'] = [
+            _compound(*generator.filled(lower, upper))
+            for lower, upper in zip(levels[:-1], levels[1:])
+        ]
+    if lines:
+        geometry['lines'] = [
+            _compound(*generator.lines(level)) for level in levels
+        ]
+    return geometry
+
+
+def draw_filled(ax, geometry, cmap=None, colors=None, hatches=None, **kwargs):
+    """Draw the filled bands of a contour geometry.
+
+    Bands are coloured from `cmap` with a BoundaryNorm on the levels (the
+    returned collection can be passed to ``colorbar``), or with one colour
+    per band from `colors` ('none' leaves a band empty). With `hatches` (one
+    pattern or None per band) every band is its own collection, because a
+    collection has a single hatch. Other keyword arguments, such as
+    `transform` or `zorder`, are passed to the collections.
+    """
+    paths = geometry['filled']
+    levels = geometry['levels']
+    kwargs.setdefault('linewidths', 0)
+    if hatches is None:
+        if colors is None:
+            norm = BoundaryNorm(levels, plt.get_cmap(cmap).N)
+            collection = PathCollection(paths,
+                                        array=0.5 * (levels[:-1] + levels[1:]),
+                                        cmap=cmap,
+                                        norm=norm,
+                                        **kwargs)
+        else:
+            collection = PathCollection(paths, facecolors=colors, **kwargs)
+        ax.add_collection(collection)
+        ax.autoscale_view()
+        return collection
+
+    if colors is None:
+        colors = ['none'] * len(paths)
+    collections = []
+    for path, color, hatch in zip(paths, colors, hatches):
+        if hatch is None and color == 'none':
+            continue
+        collection = PathCollection([path],
+                                    facecolors=color,
+                                    hatch=hatch,
+                                    **kwargs)
+        ax.add_collection(collection)
+        collections.append(collection)
+    ax.autoscale_view()
+    return collections
+
+
+def draw_lines(ax, geometry, colors='black', linewidths=1, **kwargs):
+    """Draw the lines of a contour geometry as one collection. `colors` and
+    `linewidths` may be given per level."""
+    collection = PathCollection(geometry['lines'],
+                                facecolors='none',
+                                edgecolors=colors,
+                                linewidths=linewidths,
+                                **kwargs)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+###############################################################################
+# Benchmark:
+
+days = np.arange(chi.shape[0])
+chi_levels = np.arange(-6, 12, 2)
+
+
+def render(fig):
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+# NCL_hov_3.py: two hatched contourf calls and a contour call on one field
+start = time.perf_counter()
+for i in range(5):
+    fig, ax = plt.subplots(figsize=(7, 7.5))
+    ax.contourf(chi.lon,
+                days,
+                chi,
+                levels=[4, 12],
+                colors='none',
+                hatches=['....'])
+    ax.contourf(chi.lon,
+                days,
+                chi,
+                levels=[-7, -6],
+                colors='none',
+                hatches=['///'])
+    ax.contour(chi.lon,
+               days,
+               chi,
+               levels=chi_levels,
+               colors='black',
+               linewidths=.2)
+    render(fig)
+repeated = (time.perf_counter() - start) / 5
+
+start = time.perf_counter()
+hov = contour_geometry(chi.lon, days, chi, levels=[-7, -6, 4, 12])
+hov_lines = contour_geometry(chi.lon, days, chi, chi_levels, filled=False)
+for i in range(5):
+    fig, ax = plt.subplots(figsize=(7, 7.5))
+    draw_filled(ax, hov, hatches=['///', None, '....'], edgecolors='lightgray')
+    draw_lines(ax, hov_lines, linewidths=.2)
+    render(fig)
+cached = (time.perf_counter() - start) / 5
+print(
+    'NCL_hov_3.py-style plot: {:.3f} s repeated, {:.3f} s from geometry'.format(
+        repeated, cached))
+
+# CB_Rain.py: the same field contoured once per colormap
+colormaps = [gvcmaps.BlAqGrYeOrRe, 'viridis', 'magma', 'cividis']
+pre_levels = np.linspace(0, 240, 13)
+
+start = time.perf_counter()
+fig, axs = plt.subplots(2, 2, figsize=(12, 12))
+for ax, cmap in zip(axs.flat, colormaps):
+    ax.contourf(pre.lon, pre.lat, pre, levels=pre_levels, cmap=cmap)
+render(fig)
+repeated = time.perf_counter() - start
+
+start = time.perf_counter()
+geometry = contour_geometry(pre.lon, pre.lat, pre, pre_levels, lines=False)
+fig, axs = plt.subplots(2, 2, figsize=(12, 12))
+for ax, cmap in zip(axs.flat, colormaps):
+    draw_filled(ax, geometry, cmap=cmap)
+render(fig)
+cached = time.perf_counter() - start
+print(
+    'CB_Rain.py-style panels: {:.3f} s repeated, {:.3f} s from geometry'.format(
+        repeated, cached))
+
+# NCL_panel_6.py: contourf and contour at the same levels on every panel
+start = time.perf_counter()
+fig, axs = plt.subplots(2, 2, figsize=(12, 12))
+for ax in axs.flat:
+    ax.contourf(pre.lon, pre.lat, pre, levels=pre_levels, cmap='magma')
+    ax.contour(pre.lon,
+               pre.lat,
+               pre,
+               levels=pre_levels,
+               colors='black',
+               linewidths=0.5)
+render(fig)
+repeated = time.perf_counter() - start
+
+start = time.perf_counter()
+geometry = contour_geometry(pre.lon, pre.lat, pre, pre_levels)
+fig, axs = plt.subplots(2, 2, figsize=(12, 12))
+for ax in axs.flat:
+    draw_filled(ax, geometry, cmap='magma')
+    draw_lines(ax, geometry, linewidths=0.5)
+render(fig)
+cached = time.perf_counter() - start
+print('NCL_panel_6.py-style panels: {:.3f} s repeated, {:.3f} s from geometry'.
+      format(repeated, cached))
+
+###############################################################################
+# Plot:
+
+# The NCL_hov_3.py plot, and the same geometry re-coloured
+fig, axs = plt.subplots(1, 2, figsize=(13, 7.5))
+
+draw_filled(axs[0], hov, hatches=['///', None, '....'], edgecolors='lightgray')
+draw_lines(axs[0], hov_lines, linewidths=np.where(chi_levels == 0, 1, .2))
+
+fill = draw_filled(axs[1],
+                   contour_geometry(chi.lon,
+                                    days,
+                                    chi,
+                                    np.arange(-8, 14, 2),
+                                    lines=False),
+                   cmap='RdBu_r')
+draw_lines(axs[1], hov_lines, linewidths=.2)
+fig.colorbar(fill, ax=axs[1], ticks=chi_levels)
+
+for ax, title in zip(axs, ['Hatched', 'Re-coloured']):
+    # Use geocat.viz.util convenience functions to set ticks and titles
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xlim=[100, 220],
+                                     ylim=[0, days[-1]],
+                                     xticks=[135, 180],
+                                     yticks=np.linspace(0, days[-1], 7),
+                                     xticklabels=['135E', '180'],
+                                     yticklabels=np.linspace(0,
+                                                             days[-1],
+                                                             7,
+                                                             dtype='int'))
+    gvutil.add_major_minor_ticks(ax,
+                                 x_minor_per_major=3,
+                                 y_minor_per_major=3,
+                                 labelsize=14)
+    gvutil.set_titles_and_labels(ax,
+                                 maintitle=title,
+                                 lefttitle="Velocity Potential",
+                                 righttitle="m2/s",
+                                 ylabel="elapsed time")
+
+plt.show()
@@ -0,0 +1,334 @@
+"""
+contour_label_placement_example.py
+==================================
+
+This script illustrates the following concepts:
+   - Choosing contour label positions automatically, instead of passing
+     hand-tuned coordinates to ``clabel`` as NCL_conLab_4.py, NCL_polyg_4.py,
+     NCL_meteo_1.py and NCL_sat_1.py do
+   - Scoring candidate positions along all contour lines at once by how
+     straight the line is under the label, in display space
+   - Spacing the labels so they do not collide with each other and are
+     spread over the lines, and drawing them as rotated texts on white boxes
+   - Labelling a batch of charts and timing it against matplotlib's own
+     automatic placement
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_conLab_4.py, NCL_polyg_4.py, NCL_meteo_1.py and NCL_sat_1.py in
+      this gallery
+    - For "uv300.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from matplotlib.artist import Artist
+from matplotlib.path import Path
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.viz import cmaps as gvcmaps
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine and load the data into
+# xarray
+ds = xr.open_dataset(gdf.get("netcdf_files/uv300.nc"), decode_times=False)
+
+###############################################################################
+# Define helper functions for label placement:
+#
+# All contour lines are transformed to display coordinates and laid end to
+# end along one arc-length axis, so candidate positions every few pixels on
+# every line can be interpolated with a single ``np.interp`` call. A
+# candidate is scored by how straight its line is over the width of the
+# label (the chord between the two ends of the label divided by the label
+# width); curved spots and spots near the edge of the axes are dropped. The
+# best candidate of every line is considered first, then the others by
+# score, and a candidate is kept if it is far enough from every kept label
+# and from the other labels on its own line. The labels are then added as
+# rotated texts on white boxes, as ``clabel(manual=...)`` would spend most
+# of its time searching the contours again for the line under every label.
+
+
+def _level_paths(cs):
+    """One compound path per level of a ContourSet. Before matplotlib 3.8
+    the paths of every level are held by a separate collection."""
+    if isinstance(cs, Artist):
+        return list(cs.get_paths())
+    return [Path.make_compound_path(*c.get_paths()) for c in cs.collections]
+
+
+def _polylines(path):
+    """Split a compound path into its lines."""
+    if len(path.vertices) == 0:
+        return []
+    if path.codes is None:
+        return [path.vertices]
+    starts = np.flatnonzero(path.codes == Path.MOVETO)
+    return [
+        line for line in np.split(path.vertices, starts[1:]) if len(line) > 1
+    ]
+
+
+def label_positions(ax,
+                    cs,
+                    fmt='%d',
+                    fontsize=10,
+                    step=10,
+                    min_straightness=0.95,
+                    min_spacing=None,
+                    line_spacing=None,
+                    levels=None):
+    """Choose contour label positions.
+
+    Parameters
+    ----------
+    ax : :class:`matplotlib.axes.Axes`
+        Axes holding the contours.
+    cs : :class:`matplotlib.contour.ContourSet`
+        Contour lines to label.
+    fmt : str, optional
+        Label format, used to estimate the size of the labels.
+    fontsize : float, optional
+        Label font size in points.
+    step : float, optional
+        Distance between candidate positions along the lines, in pixels.
+    min_straightness : float, optional
+        Smallest accepted ratio of the chord under a label to its width.
+    min_spacing : float, optional
+        Smallest distance between any two labels, in pixels. Defaults to
+        twice the width of the widest label.
+    line_spacing : float, optional
+        Smallest distance between labels on the same line, in pixels.
+        Defaults to six times the width of the widest label.
+    levels : array_like, optional
+        Levels to label. Defaults to all levels of `cs`.
+
+    Returns
+    -------
+    labels : dict
+        `x`, `y` (label centres in data coordinates), `rotation` (angle of
+        the line under each label on the plot, in degrees) and `level`.
+    """
+    ax.apply_aspect()
+    to_display = cs.get_transform()
+    bbox = ax.bbox
+    scale = ax.figure.dpi / 72
+
+    # Label sizes in pixels, from the formatted text
+    height = fontsize * scale
+    widths = {
+        level: (len(fmt % level) * 0.6 + 1) * fontsize * scale
+        for level in cs.levels
+    }
+    widest = max(widths.values())
+    min_spacing = 2 * widest if min_spacing is None else min_spacing
+    line_spacing = 6 * widest if line_spacing is None else line_spacing
+
+    # All lines in display coordinates, with the level and label width
+    lines, line_level = [], []
+    for level, path in zip(cs.levels, _level_paths(cs)):
+        if levels is not None and not np.isclose(level, levels).any():
+            continue
+        for line in _polylines(path):
+            lines.append(to_display.transform(line))
+            line_level.append(level)
+    line_level = np.array(line_level)
+    if not lines:
+        return {key: np.array([]) for key in ('x', 'y', 'rotation', 'level')}
+    width = np.array([widths[level] for level in line_level])
+
+    # Arc length along each line, laid end to end with a gap between lines
+    arc = [
+        np.concatenate(([0], np.cumsum(np.hypot(*np.diff(line, axis=0).T))))
+        for line in lines
+    ]
+    length = np.array([a[-1] for a in arc])
+    offset = np.concatenate(([0], np.cumsum(length + 1)[:-1]))
+    arc = np.concatenate([a + o for a, o in zip(arc, offset)])
+    points = np.concatenate(lines)
+
+    # Candidates every `step` pixels, at least half a label from the ends
+    count = np.maximum(np.floor((length - width) / step).astype(int) + 1, 0)
+    line_id = np.repeat(np.arange(len(lines)), count)
+    k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    s = offset[line_id] + width[line_id] / 2 + k * step
+    half = width[line_id] / 2
+
+    def at(position):
+        return np.column_stack(
+            (np.interp(position, arc,
+                       points[:, 0]), np.interp(position, arc, points[:, 1])))
+
+    # Straightness: the chord under the label relative to the label width
+    centre = at(s)
+    chord = at(s + half) - at(s - half)
+    score = np.hypot(*chord.T) / (2 * half)
+    inside = ((centre[:, 0] > bbox.x0 + half) &
+              (centre[:, 0] < bbox.x1 - half) &
+              (centre[:, 1] > bbox.y0 + height) &
+              (centre[:, 1] < bbox.y1 - height))
+    keep = inside & (score >= min_straightness)
+    centre, chord = centre[keep], chord[keep]
+    score, line_id = score[keep], line_id[keep]
+
+    # The best candidate of every line first, then by score
+    order = np.lexsort((-score, line_id))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = np.diff(line_id[order]) != 0
+    rank = np.empty(order.size, dtype=int)
+    rank[order] = np.arange(order.size) - np.maximum.accumulate(
+        np.where(first, np.arange(order.size), 0))
+    order = np.lexsort((-score, rank > 0))
+
+    chosen = np.empty(order.size, dtype=int)
+    n = 0
+    for c in order:
+        d = np.hypot(*(centre[chosen[:n]] - centre[c]).T)
+        same = line_id[chosen[:n]] == line_id[c]
+        if (d >= min_spacing).all() and (d[same] >= line_spacing).all():
+            chosen[n] = c
+            n += 1
+    chosen = chosen[:n]
+
+    # Text angles kept upright, positions back in data coordinates
+    rotation = np.degrees(np.arctan2(chord[chosen, 1], chord[chosen, 0]))
+    rotation = (rotation + 90) % 180 - 90
+    x, y = ax.transData.inverted().transform(centre[chosen]).T
+    return {
+        'x': x,
+        'y': y,
+        'rotation': rotation,
+        'level': line_level[line_id[chosen]]
+    }
+
+
+def draw_labels(ax, labels, fmt='%d', fontsize=10, horizontal=False, **kwargs):
+    """Add contour labels at the positions chosen by `label_positions`.
+
+    Every label is drawn on a white box that hides the line underneath.
+    Other keyword arguments are passed to ``ax.text``.
+    """
+    kwargs.setdefault('bbox', dict(facecolor='white', edgecolor='none', pad=1))
+    texts = []
+    for x, y, rotation, level in zip(labels['x'], labels['y'],
+                                     labels['rotation'], labels['level']):
+        texts.append(
+            ax.text(x,
+                    y,
+                    fmt % level,
+                    fontsize=fontsize,
+                    rotation=0 if horizontal else rotation,
+                    rotation_mode='anchor',
+                    ha='center',
+                    va='center',
+                    clip_on=True,
+                    **kwargs))
+    return texts
+
+
+def auto_clabel(ax, cs, fmt='%d', fontsize=10, **kwargs):
+    """Label contour lines at automatically chosen positions, like
+    ``ax.clabel``. Keyword arguments are passed to `label_positions`."""
+    labels = label_positions(ax, cs, fmt=fmt, fontsize=fontsize, **kwargs)
+    return draw_labels(ax, labels, fmt=fmt, fontsize=fontsize)
+
+
+###############################################################################
+# Label a batch of charts:
+
+levels = np.arange(-16, 48, 4)
+
+
+def make_chart(t):
+    """An NCL_conLab_4.py-style chart of the zonal wind, without labels."""
+    fig = plt.figure(figsize=(8, 8))
+    ax = plt.axes(projection=ccrs.PlateCarree())
+    ax.set_extent([0, 70, -30, 30], crs=ccrs.PlateCarree())
+    U = ds.U.isel(time=t).sel(lon=slice(0, 71), lat=slice(-33, 33))
+    fill = U.plot.contourf(ax=ax,
+                           cmap=gvcmaps.gui_default,
+                           levels=levels,
+                           add_colorbar=False,
+                           add_labels=False)
+    lines = U.plot.contour(ax=ax,
+                           colors='black',
+                           levels=levels,
+                           linewidths=0.5,
+                           linestyles='solid',
+                           add_labels=False)
+    return fig, ax, fill, lines
+
+
+methods = {
+    'matplotlib clabel':
+        lambda ax, cs: ax.clabel(cs, fmt='%d', fontsize=12, inline=True),
+    'auto_clabel':
+        lambda ax, cs: auto_clabel(ax, cs, fontsize=12)
+}
+
+# Label the same charts with both methods. The charts are drawn once before
+# labelling, so only the labelling itself (for clabel including the inline
+# gaps cut into the lines) is timed.
+ncharts = 4
+for name, label in methods.items():
+    elapsed = 0
+    for i in range(ncharts):
+        fig, ax, fill, lines = make_chart(i % ds.time.size)
+        fig.canvas.draw()
+        start = time.perf_counter()
+        texts = label(ax, lines)
+        elapsed += time.perf_counter() - start
+        plt.close(fig)
+    print('{}: {:.3f} s per chart, {} labels on the last chart'.format(
+        name, elapsed / ncharts, len(texts)))
+
+###############################################################################
+# Plot:
+
+fig, ax, fill, lines = make_chart(1)
+
+# Use geocat.viz.util convenience functions to set ticks and titles
+gvutil.set_axes_limits_and_ticks(ax,
+                                 yticks=np.linspace(-20, 20, 3),
+                                 xticks=np.linspace(0, 60, 3))
+gvutil.add_lat_lon_ticklabels(ax)
+gvutil.add_major_minor_ticks(ax,
+                             x_minor_per_major=3,
+                             y_minor_per_major=4,
+                             labelsize=14)
+gvutil.set_titles_and_labels(ax,
+                             lefttitle=ds.U.long_name,
+                             righttitle=ds.U.units)
+
+plt.colorbar(fill,
+             ticks=np.arange(-12, 44, 4),
+             orientation='horizontal',
+             drawedges=True,
+             aspect=12,
+             shrink=0.8,
+             pad=0.075)
+
+# Label the lines without hand-picked coordinates, once the colorbar has
+# taken its space from the axes
+auto_clabel(ax, lines, fontsize=12)
+
+plt.show()
@@ -0,0 +1,360 @@
+"""
+meteogram_batch_example.py
+==========================
+
+This script illustrates the following concepts:
+   - Building the scaffold of an NCL_meteo_1.py-style meteogram (axes, ticks,
+     labels, colormap, bar and line artists) once and reusing it for many
+     stations
+   - Replacing only the contours, wind barbs, rain bars and temperature
+     line of every station
+   - Placing contour labels automatically instead of at hard-coded
+     coordinates
+   - Rendering blocks of stations, optionally in forked worker processes
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style example:
+    - NCL_meteo_1.py in this gallery, and the original NCL script:
+      https://www.ncl.ucar.edu/Applications/Scripts/meteo_1.ncl
+    - For "meteo_data.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from matplotlib.artist import Artist
+from matplotlib.colors import BoundaryNorm, ListedColormap
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine and load the data into
+# xarray
+ds = xr.open_dataset(gdf.get("netcdf_files/meteo_data.nc"), decode_times=False)
+taus = ds.taus.values
+levels = ds.levels.values
+
+###############################################################################
+# Define helper functions for the meteogram template:
+#
+# Everything that is the same for all stations (the figure, axes, colormap,
+# ticks and tick labels, axis labels, the rain bars and the temperature
+# line) is created once by `create_meteogram`. `update_meteogram` then
+# removes the previous station's contours and wind barbs, draws the new ones
+# with automatically placed labels, and updates the bar heights, line data
+# and title in place. A worker process builds one template and renders a
+# whole block of stations with it.
+
+# Colormap and levels of the relative humidity contours
+RH_CMAP = ListedColormap([
+    'white', 'white', 'white', 'white', 'white', 'mintcream', "#DAF6D3",
+    "#B2FAB9", "#B2FAB9", 'springgreen', 'lime', "#54A63F"
+])
+RH_LEVELS = [-20, -10, 0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+RH_NORM = BoundaryNorm(boundaries=RH_LEVELS, ncolors=12)
+TEMP_LEVELS = [-20, -10, 0, 10, 20, 30, 40, 50, 60]
+
+# Tick labels of the 3-hourly time axis
+XTICKLABELS = [
+    '12z', '15z', '18z', '21z', 'Apr29', '03z', '06z', '09z', '12z', '15z',
+    '18z', '21z', 'Apr30', '03z', '06z', '09z', '12z', '15z', '18z', '21z',
+    'May01', '03z', '06z', '09z', '12z'
+]
+
+
+def _remove_contours(cs):
+    """Remove a contour set and its labels. Before matplotlib 3.8 a
+    ContourSet is not an Artist and its parts have to be removed one by
+    one."""
+    if isinstance(cs, Artist):
+        cs.remove()
+        return
+    for collection in cs.collections:
+        collection.remove()
+    for text in cs.labelTexts:
+        text.remove()
+
+
+def create_meteogram(taus, levels):
+    """Create the station-independent parts of a meteogram.
+
+    Parameters
+    ----------
+    taus : :class:`numpy.ndarray`
+        Forecast hours of the time axis.
+    levels : :class:`numpy.ndarray`
+        Pressure levels (hPa) of the upper panel, bottom first. As in
+        NCL_meteo_1.py they are evenly spaced on the axis.
+
+    Returns
+    -------
+    meteogram : dict
+        The figure, axes and the artists that are updated per station.
+    """
+    fig = plt.figure(figsize=(6, 9))
+    spec = fig.add_gridspec(ncols=1,
+                            nrows=3,
+                            height_ratios=[4, 1, 1],
+                            hspace=0.6)
+    ax = fig.add_subplot(spec[0, 0])
+    rain_ax = fig.add_subplot(spec[1, 0])
+    temp_ax = fig.add_subplot(spec[2, 0])
+
+    # Upper panel: pressure levels against time
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xlim=[taus[0], taus[-1]],
+                                     ylim=[0, len(levels) - 1],
+                                     xticks=taus,
+                                     yticks=np.arange(len(levels)),
+                                     xticklabels=XTICKLABELS,
+                                     yticklabels=np.asarray(levels, dtype=int))
+    gvutil.set_titles_and_labels(ax, ylabel='Pressure (mb)', labelfontsize=12)
+    ax.tick_params(axis="x", direction="in", length=8, labelrotation=90)
+    ax.tick_params(axis="y", direction="in", length=8, labelsize=9)
+    ax.text(1.0,
+            -0.22,
+            "CONTOUR FROM -20 TO 60 BY 10",
+            horizontalalignment='right',
+            transform=ax.transAxes,
+            bbox=dict(boxstyle='square, pad=0.15',
+                      facecolor='white',
+                      edgecolor='black'))
+
+    # Short tick labels of the lower panels
+    short_labels = [
+        label if i % 2 == 0 else '' for i, label in enumerate(XTICKLABELS)
+    ]
+
+    # Middle panel: rain bars, created once with zero height
+    bars = rain_ax.bar(taus,
+                       np.zeros(len(taus)),
+                       width=3,
+                       color='limegreen',
+                       edgecolor='black',
+                       linewidth=.2)
+    gvutil.set_titles_and_labels(rain_ax,
+                                 ylabel='3hr rain total',
+                                 labelfontsize=12)
+    gvutil.set_axes_limits_and_ticks(rain_ax,
+                                     xlim=[0, 72],
+                                     xticks=np.arange(0, 75, 3),
+                                     xticklabels=short_labels)
+
+    # Lower panel: temperature line, created once without data
+    line, = temp_ax.plot(taus, np.full(len(taus), np.nan), color='red')
+    gvutil.set_titles_and_labels(temp_ax, ylabel='Temp at 2m', labelfontsize=12)
+    gvutil.set_axes_limits_and_ticks(temp_ax,
+                                     xlim=[0, 72],
+                                     xticks=np.arange(0, 75, 3),
+                                     xticklabels=short_labels)
+
+    for panel in (rain_ax, temp_ax):
+        # Use the geocat.viz function to add minor ticks
+        gvutil.add_major_minor_ticks(panel,
+                                     y_minor_per_major=5,
+                                     labelsize="small")
+        panel.tick_params(bottom=True, left=True, right=True, top=False)
+        panel.tick_params(which='minor', top=False, bottom=False)
+
+    return {
+        'fig': fig,
+        'ax': ax,
+        'rain_ax': rain_ax,
+        'temp_ax': temp_ax,
+        'bars': bars,
+        'line': line,
+        'dynamic': []
+    }
+
+
+def update_meteogram(meteogram, station):
+    """Draw the data of one station into a meteogram template.
+
+    Parameters
+    ----------
+    meteogram : dict
+        Template returned by `create_meteogram`.
+    station : dict
+        `name`, and the arrays `rh`, `tempisobar` (level, time), `ugrid`,
+        `vgrid` (barb level, time), `rain03` and `tempht` (time).
+    """
+    ax = meteogram['ax']
+    for artist in meteogram['dynamic']:
+        _remove_contours(artist)
+
+    # The fields span the whole upper panel
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    ny, nx = station['rh'].shape
+    x, y = np.linspace(x0, x1, nx), np.linspace(y0, y1, ny)
+
+    fill = ax.contourf(x,
+                       y,
+                       station['rh'],
+                       cmap=RH_CMAP,
+                       norm=RH_NORM,
+                       levels=RH_LEVELS,
+                       zorder=2)
+    rh_lines = ax.contour(x,
+                          y,
+                          station['rh'],
+                          colors='black',
+                          levels=RH_LEVELS,
+                          linewidths=0.1,
+                          zorder=3)
+    temp_lines = ax.contour(x,
+                            y,
+                            station['tempisobar'],
+                            colors='red',
+                            levels=TEMP_LEVELS,
+                            linewidths=0.7,
+                            linestyles='solid',
+                            zorder=4)
+
+    # Let matplotlib place the contour labels along the lines
+    for cs, color in ((rh_lines, None), (temp_lines, 'black')):
+        for text in ax.clabel(cs,
+                              fmt='%d',
+                              inline=True,
+                              fontsize=7,
+                              colors=color):
+            text.set_bbox(dict(facecolor='white', edgecolor='none', pad=.5))
+
+    ub = station['ugrid']
+    barbs = ax.barbs(x,
+                     np.linspace(y0, y1, ub.shape[0]),
+                     ub,
+                     station['vgrid'],
+                     color='black',
+                     lw=0.1,
+                     length=5,
+                     zorder=5)
+    meteogram['dynamic'] = [fill, rh_lines, temp_lines, barbs]
+
+    # Bars and line are updated in place
+    rain = station['rain03']
+    for bar, height in zip(meteogram['bars'], rain):
+        bar.set_height(height)
+    meteogram['rain_ax'].set_ylim(0, max(0.5, np.nanmax(rain) * 1.1))
+
+    temp = station['tempht']
+    meteogram['line'].set_ydata(temp)
+    meteogram['temp_ax'].set_ylim(
+        np.floor(np.nanmin(temp)) - 0.5,
+        np.ceil(np.nanmax(temp)) + 0.5)
+
+    ax.set_title('Meteogram for {}, 28/12Z'.format(station['name']),
+                 fontsize=18)
+
+
+def render_stations(stations, taus, levels, outdir):
+    """Render a block of stations with one template; returns the file
+    names."""
+    meteogram = create_meteogram(taus, levels)
+    paths = []
+    for station in stations:
+        update_meteogram(meteogram, station)
+        path = os.path.join(outdir, 'meteo_{}.png'.format(station['name']))
+        meteogram['fig'].savefig(path)
+        paths.append(path)
+    plt.close(meteogram['fig'])
+    return paths
+
+
+def render_stations_parallel(stations,
+                             taus,
+                             levels,
+                             outdir,
+                             max_workers=1,
+                             block_size=8):
+    """Render stations in blocks, optionally on a pool of worker processes.
+    Matplotlib is not thread-safe, so each worker process has its own
+    template.
+
+    By default the stations are rendered one after the other. With
+    `max_workers` > 1 the blocks are rendered in forked worker processes,
+    which start from the state of this script instead of importing and
+    running it again. Forking is only safe in a standalone script on Linux:
+    it is unsafe on macOS and in processes that already run threads (e.g. of
+    dask or BLAS), so elsewhere the stations are still rendered serially.
+    """
+    if max_workers <= 1 or not sys.platform.startswith('linux'):
+        return render_stations(stations, taus, levels, outdir)
+
+    blocks = [
+        stations[i:i + block_size] for i in range(0, len(stations), block_size)
+    ]
+    with multiprocessing.get_context('fork').Pool(max_workers) as pool:
+        results = pool.starmap(
+            render_stations,
+            [(block, taus, levels, outdir) for block in blocks])
+    return [path for paths in results for path in paths]
+
+
+###############################################################################
+# Build a set of stations:
+
+# The data file holds a single station; shift and perturb it to stand in for
+# the stations of a forecast cycle
+rng = np.random.default_rng(0)
+stations = []
+for i in range(32):
+    shift = i % len(taus)
+    stations.append({
+        'name': 'LGSA' if i == 0 else 'S{:03d}'.format(i),
+        'rh': np.roll(ds.rh.values, shift, axis=-1),
+        'tempisobar': ds.tempisobar.values + rng.normal(0, 3),
+        'ugrid': np.roll(ds.ugrid.values, shift, axis=-1),
+        'vgrid': np.roll(ds.vgrid.values, shift, axis=-1),
+        'rain03': ds.rain03.values * rng.uniform(0.5, 1.5),
+        'tempht': ds.tempht.values + rng.normal(0, 2)
+    })
+
+###############################################################################
+# Render all stations:
+
+outdir = tempfile.mkdtemp()
+
+start = time.perf_counter()
+render_stations(stations[:8], taus, levels, outdir)
+print('One template, serial:   {:.3f} s per station'.format(
+    (time.perf_counter() - start) / 8))
+
+# Serial in the gallery build; pass e.g. max_workers=4 in a standalone
+# script on Linux to render the blocks in worker processes
+start = time.perf_counter()
+paths = render_stations_parallel(stations, taus, levels, outdir)
+print('All {} stations:        {:.3f} s per station'.format(
+    len(paths), (time.perf_counter() - start) / len(paths)))
+
+# Remove the rendered meteograms
+shutil.rmtree(outdir)
+
+###############################################################################
+# Plot:
+
+# The meteogram of the first station
+meteogram = create_meteogram(taus, levels)
+update_meteogram(meteogram, stations[0])
+plt.show()
@@ -32,21 +32,21 @@ sigma = 50
 normalpdf = stats.norm.rvs(mu, sigma, size=(64, 128))
 normalhist, normalbins = np.histogram(normalpdf,
                                       bins=np.linspace(-200, 200, 25))
-normalhist = normalhist / (64 * 128) * 100
+normalhist = normalhist / normalpdf.size * 100
 normalbincenters = 0.5 * (normalbins[1:] + normalbins[:-1])
 
 # Chi-squared distribution
 df = 2
 chipdf = stats.chi2.rvs(df, size=1000)
 chihist, chibins = np.histogram(chipdf, bins=25)
-chihist = chihist / 1000 * 100
+chihist = chihist / chipdf.size * 100
 chibincenters = 0.5 * (chibins[1:] + chibins[:-1])
 
 # Gamma distribution
 a = 2
 gammapdf = stats.gamma.rvs(a, size=(50, 100))
 gammahist, gammabins = np.histogram(gammapdf, bins=25)
-gammahist = gammahist / (50 * 100) * 100
+gammahist = gammahist / gammapdf.size * 100
 gammabincenters = 0.5 * (gammabins[1:] + gammabins[:-1])
 
 ###############################################################################
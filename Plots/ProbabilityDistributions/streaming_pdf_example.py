@@ -0,0 +1,251 @@
+"""
+streaming_pdf_example.py
+========================
+
+This script illustrates the following concepts:
+   - Accumulating 1-D and 2-D (joint) histograms chunk by chunk, so the data
+     never has to fit in memory
+   - Computing partial histograms of dask chunks in parallel and merging them
+   - Accumulating histograms from a plain iterator of arrays (e.g. one file
+     at a time)
+   - Percent-normalized PDFs and bin centers identical to ``np.histogram`` on
+     the full array
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style example:
+    - NCL_pdf_1.py in this gallery, and the original NCL script:
+      https://www.ncl.ucar.edu/Applications/Scripts/pdf_1.ncl
+
+Dependencies:
+    - geocat.viz (Not necessary but for plotting convenience)
+    - dask
+    - numpy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import dask
+import dask.array as dsa
+import matplotlib.pyplot as plt
+import numpy as np
+
+from geocat.viz import util as gvutil
+
+###############################################################################
+# Define helper functions for streaming histograms:
+#
+# A histogram over fixed bin edges is a sum of the histograms of any split of
+# the data, so each chunk is reduced to a small count array independently and
+# the partial counts are merged by addition. The counts are integers, so the
+# merged result is exactly the in-memory result. Automatic bins (a number of
+# bins spanning the data range, as ``np.histogram(x, bins=25)`` does) only
+# need the global minimum and maximum first, which is one cheap reduction.
+
+
+def histogram_edges(bins, data_range):
+    """Return bin edges from either explicit edges or a number of bins and a
+    (min, max) range, following the rules of ``np.histogram``."""
+    if np.ndim(bins) == 1:
+        return np.asarray(bins, dtype=np.float64)
+    lo, hi = data_range
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, int(bins) + 1)
+
+
+def partial_histogram(edges, *chunks):
+    """Histogram of one chunk.
+
+    Parameters
+    ----------
+    edges : list of :class:`numpy.ndarray`
+        Bin edges, one array per variable.
+    *chunks : :class:`numpy.ndarray`
+        One array per variable, all of the same shape.
+
+    Returns
+    -------
+    counts : :class:`numpy.ndarray`
+        Counts per bin (1-D or N-D).
+    nvalid : int
+        Number of samples where all variables are finite, whether or not they
+        fall into a bin. This is the normalization of the PDF.
+    """
+    values = [np.ravel(c) for c in chunks]
+    valid = np.logical_and.reduce([np.isfinite(v) for v in values])
+    values = [v[valid] for v in values]
+    if len(values) == 1:
+        counts = np.histogram(values[0], bins=edges[0])[0]
+    else:
+        counts = np.histogramdd(np.column_stack(values), bins=edges)[0]
+    return counts.astype(np.int64), int(valid.sum())
+
+
+def merge_histograms(partials):
+    """Merge (counts, nvalid) pairs from any number of chunks or workers."""
+    counts, nvalid = 0, 0
+    for c, n in partials:
+        counts = counts + c
+        nvalid += n
+    return counts, nvalid
+
+
+def to_pdf(counts, nvalid, edges):
+    """Convert merged counts to a percent PDF and bin centers."""
+    pdf = counts / nvalid * 100
+    centers = [0.5 * (e[1:] + e[:-1]) for e in edges]
+    return pdf, (centers[0] if len(centers) == 1 else centers)
+
+
+def streaming_pdf(*arrays, bins=25, value_range=None):
+    """Percent PDF of one or two dask arrays, computed chunk by chunk.
+
+    Parameters
+    ----------
+    *arrays : :class:`dask.array.Array`
+        One array for a univariate PDF, two for a joint PDF. Multiple arrays
+        must have the same shape and chunks.
+    bins : int or array_like or list, optional
+        Number of bins or bin edges shared by all arrays, or a list with one
+        number of bins or array of edges per array.
+    value_range : tuple or list of tuple, optional
+        (min, max) used with a number of bins, shared by all arrays or one
+        per array (None for a range computed from the data). Computed from
+        the data if not given.
+
+    Returns
+    -------
+    pdf : :class:`numpy.ndarray`
+        PDF in percent of all valid samples.
+    centers : :class:`numpy.ndarray` or list of :class:`numpy.ndarray`
+        Bin centers.
+    """
+    nvar = len(arrays)
+
+    # A list is only taken per array if it has one number of bins or array
+    # of edges per array; any other list holds bin edges, as in np.histogram
+    if not (isinstance(bins, list) and len(bins) == nvar and all(
+            isinstance(b, (int, np.integer)) or np.ndim(b) == 1 for b in bins)):
+        bins = [bins] * nvar
+    if (isinstance(value_range, list) and len(value_range) == nvar and
+            all(r is None or np.ndim(r) == 1 for r in value_range)):
+        # Copied, as the missing ranges are filled in below
+        ranges = list(value_range)
+    else:
+        ranges = [value_range] * nvar
+
+    # One pass for the ranges of all variables that need one
+    need = [
+        i for i, b in enumerate(bins) if np.ndim(b) == 0 and ranges[i] is None
+    ]
+    if need:
+        extrema = dask.compute(
+            *[(dsa.nanmin(arrays[i]), dsa.nanmax(arrays[i])) for i in need])
+        for i, ext in zip(need, extrema):
+            ranges[i] = (float(ext[0]), float(ext[1]))
+    edges = [histogram_edges(b, r) for b, r in zip(bins, ranges)]
+
+    # Partial histograms of all chunks are computed in parallel by dask and
+    # then merged
+    blocks = zip(*[a.to_delayed().ravel() for a in arrays])
+    partials = [dask.delayed(partial_histogram)(edges, *b) for b in blocks]
+    counts, nvalid = merge_histograms(dask.compute(*partials))
+    return to_pdf(counts, nvalid, edges)
+
+
+###############################################################################
+# Univariate PDF of a chunked (dask) field:
+
+# A chunked normal field standing in for one read from many files; the
+# chunks are only generated when the histogram is computed. It is kept small
+# here so that the in-memory check below stays cheap.
+sigma = 50
+normal = dsa.random.RandomState(0).normal(0,
+                                          sigma,
+                                          size=(40, 128, 256),
+                                          chunks=(1, 128, 256))
+
+normalpdf, normalcenters = streaming_pdf(normal,
+                                         bins=np.linspace(-200, 200, 25))
+
+# The result is identical to `np.histogram` of the full array in memory
+values = normal.compute()
+hist, edges = np.histogram(values, bins=np.linspace(-200, 200, 25))
+print('Identical to in-memory histogram:',
+      np.allclose(normalpdf, hist / values.size * 100))
+
+###############################################################################
+# Univariate PDF from an iterator of arrays:
+
+# Each item could be the data of one file; only one is in memory at a time.
+# With automatic bins, the range has to be known before the counting pass.
+
+
+def gamma_chunks(nchunks=10):
+    rng = np.random.default_rng(1)
+    for _ in range(nchunks):
+        yield rng.gamma(2, size=(100, 1000))
+
+
+gamma_range = (np.inf, -np.inf)
+for chunk in gamma_chunks():
+    gamma_range = (min(gamma_range[0],
+                       chunk.min()), max(gamma_range[1], chunk.max()))
+
+gamma_edges = [histogram_edges(25, gamma_range)]
+counts, nvalid = merge_histograms(
+    partial_histogram(gamma_edges, chunk) for chunk in gamma_chunks())
+gammapdf, gammacenters = to_pdf(counts, nvalid, gamma_edges)
+
+all_gamma = np.concatenate(list(gamma_chunks()))
+hist, edges = np.histogram(all_gamma, bins=25)
+print(
+    'Identical to in-memory histogram:',
+    np.allclose(gammapdf, hist / all_gamma.size * 100) and
+    np.allclose(gammacenters, 0.5 * (edges[1:] + edges[:-1])))
+
+###############################################################################
+# Joint PDF of two chunked fields:
+
+rs = dsa.random.RandomState(2)
+x = rs.normal(0, 1, size=(20, 128, 256), chunks=(1, 128, 256))
+y = 0.6 * x + 0.8 * rs.normal(0, 1, size=x.shape, chunks=x.chunks)
+
+jointpdf, (xcenters, ycenters) = streaming_pdf(x, y, bins=40)
+
+###############################################################################
+# Plot:
+
+fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 4.5))
+
+ax1.plot(normalcenters, normalpdf, color='k', linewidth=0.5)
+ax2.plot(gammacenters, gammapdf, color='k', linewidth=0.5)
+cf = ax3.contourf(xcenters, ycenters, jointpdf.T, levels=12, cmap='Greys')
+fig.colorbar(cf, ax=ax3, label='PDF (%)')
+
+# Use the geocat.viz function to set titles and labels
+gvutil.set_titles_and_labels(ax1,
+                             maintitle='Streaming PDF: Normal (dask)',
+                             maintitlefontsize=10,
+                             ylabel='PDF (%)',
+                             labelfontsize=10)
+gvutil.set_titles_and_labels(ax2,
+                             maintitle='Streaming PDF: Gamma (iterator)',
+                             maintitlefontsize=10,
+                             ylabel='PDF (%)',
+                             labelfontsize=10)
+gvutil.set_titles_and_labels(ax3,
+                             maintitle='Streaming joint PDF',
+                             maintitlefontsize=10,
+                             xlabel='x',
+                             ylabel='y',
+                             labelfontsize=10)
+
+# Use geocat.viz.util convenience function to add minor and major tick lines
+for ax in (ax1, ax2, ax3):
+    gvutil.add_major_minor_ticks(ax, labelsize=10)
+
+plt.tight_layout()
+plt.show()
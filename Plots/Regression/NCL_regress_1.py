@@ -44,7 +44,7 @@ x, y = np.loadtxt(gdf.get("ascii_files/regress_1.txt"),
 
 # Now that we have a y = ax + b, we can evaluate this model over a range,
 # which will give us points to plot
-x_regress = range(int(min(x)), int(max(x)))
+x_regress = np.arange(int(x.min()), int(x.max()))
 y_regress = a * x_regress + b
 
 ###############################################################################
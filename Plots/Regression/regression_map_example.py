@@ -0,0 +1,224 @@
+"""
+regression_map_example.py
+=========================
+
+This script illustrates the following concepts:
+   - Computing the least-squares slope, intercept, correlation and p-value of
+     a linear trend at every grid point at once, instead of one `np.polyfit`
+     call per series
+   - Reducing chunked (dask) data to a handful of time-axis moments in a
+     single pass
+   - Handling missing values with masked sums, so every grid point uses only
+     its own valid time steps
+   - Optional rolling-mean pre-smoothing, as done in NCL_scatter_4.py
+   - Stippling grid points whose trend is significant
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_regress_1.py and NCL_scatter_4.py in this gallery, and the original
+      NCL script: https://www.ncl.ucar.edu/Applications/Scripts/regress_1.ncl
+    - For "b003_TS_200-299.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - dask
+    - numpy
+    - scipy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from scipy import special, stats
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+from geocat.viz import cmaps as gvcmaps
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine, chunked in latitude so
+# every chunk holds complete time series
+ds = xr.open_dataset(gdf.get("netcdf_files/b003_TS_200-299.nc"),
+                     decode_times=False,
+                     chunks={'lat': 16})
+ts = ds.TS
+
+###############################################################################
+# Define helper function for the regression map:
+#
+# The least-squares line through (x, y) only depends on the sums n, Sx, Sy,
+# Sxx, Sxy and Syy over the time axis. These are computed for all grid points
+# at once as dot products with the (1-D) time axis, which is one pass over
+# the data and keeps dask chunks independent. Missing values are handled by
+# masking: the x sums of every grid point are taken over its own valid time
+# steps only. The time axis is centred before the sums are taken, which keeps
+# them well conditioned for large time values.
+
+
+def regression_map(y, dim='time', smooth=None, min_valid=3):
+    """Least-squares linear regression of `y` against its `dim` coordinate at
+    every point of the other dimensions.
+
+    Parameters
+    ----------
+    y : :class:`xarray.DataArray`
+        Data with a numeric `dim` coordinate. May be dask-backed.
+    dim : str, optional
+        Dimension to regress along.
+    smooth : int, optional
+        Width of a centred rolling mean applied to `y` first. The incomplete
+        windows at both ends are treated as missing values.
+    min_valid : int, optional
+        Grid points with fewer valid time steps are set to missing.
+
+    Returns
+    -------
+    result : :class:`xarray.Dataset`
+        `slope`, `intercept`, `rvalue` and two-sided `pvalue` (of the null
+        hypothesis that the slope is zero), and the number of valid time
+        steps `nvalid`.
+    """
+    if smooth is not None:
+        y = y.rolling({dim: smooth}, center=True).mean()
+    y = y.astype(np.float64)
+
+    x = y[dim].astype(np.float64)
+    xmean = float(x.mean())
+    x = x - xmean
+
+    valid = y.notnull()
+    y0 = y.fillna(0)
+
+    # Time-axis moments, masked with each grid point's valid time steps
+    n = valid.sum(dim)
+    sx = xr.dot(valid, x, dim=dim)
+    sxx = xr.dot(valid, x * x, dim=dim)
+    sy = y0.sum(dim)
+    sxy = xr.dot(y0, x, dim=dim)
+    syy = (y0 * y0).sum(dim)
+
+    n = n.where(n >= min_valid)
+    vxx = sxx - sx * sx / n
+    vyy = syy - sy * sy / n
+    vxy = sxy - sx * sy / n
+
+    slope = vxy / vxx
+    intercept = (sy - slope * sx) / n - slope * xmean
+    r = (vxy / np.sqrt(vxx * vyy)).clip(-1, 1)
+
+    # Two-sided p-value of the t statistic with n - 2 degrees of freedom
+    dof = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tstat = r * np.sqrt(dof / (1 - r * r))
+    pvalue = xr.apply_ufunc(lambda df, t: 2 * special.stdtr(df, -np.abs(t)),
+                            dof,
+                            tstat,
+                            dask='parallelized',
+                            output_dtypes=[np.float64])
+
+    return xr.Dataset({
+        'slope': slope,
+        'intercept': intercept,
+        'rvalue': r,
+        'pvalue': pvalue,
+        'nvalid': n
+    })
+
+
+###############################################################################
+# Compute the regression maps:
+
+start = time.perf_counter()
+trend = regression_map(ts).compute()
+print('Regression map of {} grid points: {:.3f} s'.format(
+    trend.slope.size,
+    time.perf_counter() - start))
+
+# The same map on the rolling-mean smoothed series of NCL_scatter_4.py
+trend_smooth = regression_map(ts, smooth=40).compute()
+
+###############################################################################
+# Check a single grid point against scipy:
+
+point = dict(lat=60, lon=180, method='nearest')
+series = ts.sel(**point).load()
+ref = stats.linregress(series.time, series.values)
+print('scipy.stats.linregress:', ref.slope, ref.intercept, ref.rvalue,
+      ref.pvalue)
+print(
+    'regression_map:        ', *[
+        float(trend[v].sel(**point))
+        for v in ('slope', 'intercept', 'rvalue', 'pvalue')
+    ])
+
+###############################################################################
+# Plot:
+
+# Generate figure and axes using Cartopy projection and set figure size
+# (width, height) in inches
+fig, axs = plt.subplots(2,
+                        1,
+                        subplot_kw={'projection': ccrs.PlateCarree()},
+                        figsize=(9, 9))
+
+# Trend per 100 years (the time coordinate is in days)
+for ax, result, title in zip(axs, [trend, trend_smooth],
+                             ['Monthly TS', '40-month running mean']):
+    cf = ax.contourf(result.lon,
+                     result.lat,
+                     result.slope * 365 * 100,
+                     levels=np.linspace(-2, 2, 21),
+                     cmap=gvcmaps.BlWhRe,
+                     extend='both',
+                     transform=ccrs.PlateCarree())
+
+    # Stipple grid points where the trend is significant at the 5% level
+    lon2d, lat2d = np.meshgrid(result.lon, result.lat)
+    significant = (result.pvalue < 0.05).values
+    ax.scatter(lon2d[significant][::4],
+               lat2d[significant][::4],
+               s=0.5,
+               color='black',
+               transform=ccrs.PlateCarree())
+    ax.coastlines(linewidth=0.5)
+
+    # Use geocat.viz.util convenience function to set axes tick values
+    gvutil.set_axes_limits_and_ticks(ax,
+                                     xticks=np.linspace(-180, 180, 7),
+                                     yticks=np.linspace(-90, 90, 7))
+
+    # Use geocat.viz.util convenience function to make plots look like NCL
+    # plots, using latitude & longitude tick labels
+    gvutil.add_lat_lon_ticklabels(ax)
+
+    # Use geocat.viz.util convenience function to add titles
+    gvutil.set_titles_and_labels(ax,
+                                 maintitle='TS trend, stippled where p < 0.05',
+                                 lefttitle=title,
+                                 righttitle='K per 100 years',
+                                 maintitlefontsize=14,
+                                 lefttitlefontsize=11,
+                                 righttitlefontsize=11)
+
+fig.colorbar(cf,
+             ax=axs,
+             orientation='horizontal',
+             shrink=0.7,
+             pad=0.08,
+             fraction=.04,
+             label='TS trend (K per 100 years)')
+
+plt.show()
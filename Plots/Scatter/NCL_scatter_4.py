@@ -43,7 +43,7 @@ ts_rolled = ts.rolling(time=40, center=True).mean().dropna('time')
 
 # Calculate regression line
 m, b = np.polyfit(ts_rolled.time, ts_rolled.values, 1)
-regline_vals = [m * x + b for x in ts.time]
+regline_vals = m * ts.time + b
 
 ###############################################################################
 # Plot:
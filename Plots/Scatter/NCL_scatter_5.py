@@ -44,6 +44,55 @@ markers = ['+', '*', 'o', 'x', 's', '^', 'v', 'D']
 # This line cycles which color is used to plot the markers
 plt.rcParams['axes.prop_cycle'] = cycler(color=colors)
 
+##############################################################################
+# Define helper function to plot binned series:
+
+
+def plot_binned(ax, x, y, edges, markers, label="{start:g}:{end:g}"):
+    """Plot points grouped into classes of `y` values, one artist per class.
+
+    All points are classified with a single call to `np.digitize` and sorted
+    by class once; each class is then drawn from a slice of the sorted
+    arrays, so no per-class masked copies of the full data are made.
+
+    Parameters
+    ----------
+    ax : :class:`matplotlib.axes.Axes`
+        Axes to draw on.
+    x, y : :class:`numpy.ndarray`
+        Point coordinates. Points are classified by their `y` value.
+    edges : array_like
+        Monotonically increasing class edges; class ``k`` holds
+        ``edges[k] <= y < edges[k + 1]``. Points outside the edges are not
+        drawn.
+    markers : list of str
+        One marker per class.
+    label : str, optional
+        Format of the legend label, given the class ``start`` and ``end``.
+
+    Returns
+    -------
+    lines : list of :class:`matplotlib.lines.Line2D`
+    """
+    nbins = len(edges) - 1
+    classes = np.digitize(y, edges) - 1
+
+    order = np.argsort(classes, kind='stable')
+    bounds = np.searchsorted(classes[order], np.arange(nbins + 1))
+    x_sorted, y_sorted = x[order], y[order]
+
+    lines = []
+    for k in range(nbins):
+        members = slice(bounds[k], bounds[k + 1])
+        lines += ax.plot(x_sorted[members],
+                         y_sorted[members],
+                         marker=markers[k],
+                         fillstyle='none',
+                         linewidth=0,
+                         label=label.format(start=edges[k], end=edges[k + 1]))
+    return lines
+
+
 ##############################################################################
 # Plot
 fig = plt.figure(figsize=(8, 8))
@@ -52,22 +101,9 @@ ax = plt.axes([0.15, 0.2, 0.75, 0.70])
 
 # Divide data into 8 bins and plot
 numBins = 8
-indices = np.arange(0, 300)
+indices = np.arange(0, npts)
 partitions = np.linspace(0, 20, numBins + 1)
-label = "{start:g}:{end:g}"
-for x in range(0, numBins):
-    bins = np.where(data > partitions[x], data, np.nan)
-    with np.errstate(
-            invalid='ignore'
-    ):  # Indeed not needed, just to get rid of warnings about numpy's NaN comparisons
-        bins = np.where(bins < partitions[x + 1], bins, np.nan)
-    indices = np.where(bins != np.nan, indices, np.nan)
-    plt.plot(indices,
-             bins,
-             marker=markers[x],
-             fillstyle='none',
-             linewidth=0,
-             label=label.format(start=partitions[x], end=partitions[x + 1]))
+plot_binned(ax, indices, data, partitions, markers)
 
 # `ncol` being equal to the number of labels makes it appear horizontal
 legend = ax.legend(bbox_to_anchor=(-0.075, -0.2),
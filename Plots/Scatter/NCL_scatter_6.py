@@ -46,18 +46,19 @@ colors = ("limegreen", "orange", "green", "red", "yellow", "purple", "blue",
 # Create array of marker sizes
 bins = np.linspace(100, 2000, 10)
 
-# Plot all points
+# Plot all points with a single scatter call, cycling through the colors and
+# sizes by point index
 # longitude points must be transformed from degrees to radians
 # to be plotted on polar projection
-for x in range(numpoints):
-    ax.scatter((np.pi / 180.0) * lon[x],
-               lat[x],
-               color=colors[x % 10],
-               s=bins[x % 10],
-               edgecolors='black',
-               linewidths=1,
-               alpha=0.9,
-               zorder=2)
+point_class = np.arange(numpoints) % 10
+ax.scatter(np.deg2rad(lon),
+           lat,
+           color=np.array(colors)[point_class],
+           s=bins[point_class],
+           edgecolors='black',
+           linewidths=1,
+           alpha=0.9,
+           zorder=2)
 
 # set the labels and locations of the angular gridlines
 linelabels = ('0', '30E', '60E', '90E', '120E', '150E', '180', '150W', '120W',
@@ -0,0 +1,420 @@
+"""
+batch_soundings_example.py
+==========================
+
+This script illustrates the following concepts:
+   - Loading many soundings of different lengths into padded 2-D
+     (station x level) arrays
+   - Computing wind components, lifted-parcel profiles, LCL, CAPE, CIN and the
+     lifted index for all soundings at once with plain NumPy arrays (no pint
+     units in the inner loops)
+   - Splitting a large batch of soundings over a thread pool
+   - Checking the batch results against MetPy for a single sounding
+   - Usage of geocat-datafiles for accessing the sounding files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_skewt_2_2.py and NCL_skewt_3_2.py in this gallery
+    - For "sounding.testdata" and "sounding_ATS.csv" files: https://github.com/NCAR/geocat-datafiles/tree/main/ascii_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the data files)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - metpy
+    - numpy
+    - pandas
+    - xarray
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import metpy.calc as mpcalc
+import numpy as np
+import pandas as pd
+import xarray as xr
+from metpy.constants import Cp_d, Lv, Rd, epsilon
+from metpy.plots import SkewT
+from metpy.units import units
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open the two ascii sounding files used by the Skew-T examples using pandas'
+# read_csv function and give their columns common names
+ats = pd.read_csv(gdf.get('ascii_files/sounding_ATS.csv'), header=None)
+ats = pd.DataFrame({
+    'pressure': ats[0],  # [hPa]
+    'temperature': ats[1],  # [C]
+    'dewpoint': ats[2],  # [C]
+    'speed': ats[5],  # [knots]
+    'direction':
+        ats[6]  # [degrees]
+})
+
+raob = pd.read_csv(gdf.get('ascii_files/sounding.testdata'),
+                   delimiter='\\s+',
+                   header=None)
+raob = pd.DataFrame({
+    'pressure': raob[1],
+    'temperature': raob[5] + 2,
+    'dewpoint': raob[9],
+    'speed': np.linspace(0, 150, len(raob)),
+    'direction': np.linspace(0, 360, len(raob))
+})
+
+###############################################################################
+# Define helper functions for batches of soundings:
+#
+# The soundings of a batch are stored as (station, level) arrays, surface
+# first, and padded at the top with missing values, so every operation works
+# on whole columns of stations at once. The functions take plain NumPy arrays
+# in fixed units (hPa, degrees Celsius, knots, degrees); the physical
+# constants are MetPy's, with their units stripped once at import time.
+# Lifting the parcel above the LCL is the only part that has to step through
+# the levels, and each step advances all stations together.
+
+RD = Rd.m_as('J/(kg K)')
+CP_D = Cp_d.m_as('J/(kg K)')
+LV = Lv.m_as('J/kg')
+EPSILON = epsilon.m_as('')
+KAPPA = RD / CP_D
+
+# Variables read from every sounding, in hPa, degC, degC, knots and degrees
+SOUNDING_VARIABLES = ('pressure', 'temperature', 'dewpoint', 'speed',
+                      'direction')
+
+
+def load_soundings(profiles, stations=None):
+    """Pad soundings of different lengths into (station, level) arrays.
+
+    Parameters
+    ----------
+    profiles : sequence of :class:`pandas.DataFrame`
+        One table per sounding, surface first, with the columns named in
+        `SOUNDING_VARIABLES`.
+    stations : sequence, optional
+        Station labels. Defaults to 0, 1, 2, ...
+
+    Returns
+    -------
+    soundings : :class:`xarray.Dataset`
+        One (station, level) variable per column, padded with missing
+        values above the top of each sounding.
+    """
+    nlev = max(len(prof) for prof in profiles)
+    data = {
+        name: np.full((len(profiles), nlev), np.nan)
+        for name in SOUNDING_VARIABLES
+    }
+    for i, prof in enumerate(profiles):
+        for name in SOUNDING_VARIABLES:
+            data[name][i, :len(prof)] = prof[name].values
+
+    if stations is None:
+        stations = np.arange(len(profiles))
+    return xr.Dataset(
+        {name: (('station', 'level'), values) for name, values in data.items()},
+        coords={'station': stations})
+
+
+def wind_components(speed, direction):
+    """u and v from wind speed and meteorological direction in degrees."""
+    rad = np.deg2rad(direction)
+    return -speed * np.sin(rad), -speed * np.cos(rad)
+
+
+def lcl(p0, t0, td0):
+    """Pressure (hPa) and temperature (K) of the lifting condensation level
+    from pressure (hPa), temperature and dewpoint (K), using the closed form
+    of Bolton (1980, eq. 15) instead of an iterative solution."""
+    t_lcl = 1 / (1 / (td0 - 56) + np.log(t0 / td0) / 800) + 56
+    return p0 * (t_lcl / t0)**(1 / KAPPA), t_lcl
+
+
+def saturation_mixing_ratio(p, t):
+    """Saturation mixing ratio (kg/kg) at pressure (hPa) and temperature
+    (K)."""
+    es = 6.112 * np.exp(17.67 * (t - 273.15) / (t - 29.65))
+    return EPSILON * es / (p - es)
+
+
+def virtual_temperature(t, r):
+    """Virtual temperature (degC) from temperature (degC) and mixing ratio."""
+    tk = t + 273.15
+    return tk * (r + EPSILON) / (EPSILON * (1 + r)) - 273.15
+
+
+def _moist_lapse_rate(p, t):
+    """dT/dp (K/hPa) along a saturated pseudo-adiabat."""
+    rs = saturation_mixing_ratio(p, t)
+    return ((RD * t + LV * rs) / (CP_D + LV * LV * rs * EPSILON /
+                                  (RD * t * t)) / p)
+
+
+def _moist_step(p0, t0, p1, nsub=4):
+    """Integrate the moist adiabat from (p0, t0) to p1 with RK4 steps."""
+    h = (p1 - p0) / nsub
+    p, t = p0, t0
+    for _ in range(nsub):
+        k1 = _moist_lapse_rate(p, t)
+        k2 = _moist_lapse_rate(p + h / 2, t + h / 2 * k1)
+        k3 = _moist_lapse_rate(p + h / 2, t + h / 2 * k2)
+        k4 = _moist_lapse_rate(p + h, t + h * k3)
+        t = t + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        p = p + h
+    return t
+
+
+def parcel_profiles(p, t_sfc, td_sfc):
+    """Temperature of a surface parcel lifted through every sounding.
+
+    Parameters
+    ----------
+    p : :class:`numpy.ndarray`
+        Pressure (hPa) of shape (station, level), decreasing along levels
+        and padded with NaN.
+    t_sfc, td_sfc : :class:`numpy.ndarray`
+        Surface temperature and dewpoint (degC) of every station.
+
+    Returns
+    -------
+    profile : :class:`numpy.ndarray`
+        Parcel temperature (degC), same shape as `p`.
+    p_lcl, t_lcl : :class:`numpy.ndarray`
+        LCL pressure (hPa) and temperature (degC) of every station.
+    """
+    p0 = p[:, 0]
+    t0 = t_sfc + 273.15
+    p_lcl, t_lcl = lcl(p0, t0, td_sfc + 273.15)
+
+    profile = np.full(p.shape, np.nan)
+    cur_p, cur_t = p_lcl.copy(), t_lcl.copy()
+    for k in range(p.shape[1]):
+        pk = p[:, k]
+
+        # Dry adiabat below the LCL
+        dry = pk >= p_lcl
+        profile[dry, k] = t0[dry] * (pk[dry] / p0[dry])**KAPPA
+
+        # Moist adiabat above it, continued from the previous level (or the
+        # LCL) of every station that is above its LCL here
+        moist = pk < p_lcl
+        if moist.any():
+            cur_t[moist] = _moist_step(cur_p[moist], cur_t[moist], pk[moist])
+            cur_p[moist] = pk[moist]
+            profile[moist, k] = cur_t[moist]
+
+    return profile - 273.15, p_lcl, t_lcl - 273.15
+
+
+def interp_to_pressure(p, values, level):
+    """Interpolate (station, level) `values` linearly in log-pressure to one
+    pressure level; stations not reaching the level get NaN."""
+    above = p <= level
+    k = np.argmax(above, axis=1)
+    valid = above.any(axis=1) & (k > 0)
+    k = np.where(valid, k, 1)
+    rows = np.arange(p.shape[0])
+    p_lo, p_hi = p[rows, k - 1], p[rows, k]
+    w = np.log(p_lo / level) / np.log(p_lo / p_hi)
+    out = values[rows, k - 1] + w * (values[rows, k] - values[rows, k - 1])
+    return np.where(valid, out, np.nan)
+
+
+def cape_cin(p, t_env, td_env, t_parcel, p_lcl):
+    """Convective available potential energy and convective inhibition
+    (J/kg) of every station.
+
+    Buoyancy uses virtual temperatures, with the parcel keeping its surface
+    mixing ratio below the LCL and saturated above it. CAPE is the positive
+    buoyancy area of the whole profile, CIN the negative area below the first
+    positively buoyant layer above the LCL (the level of free convection).
+    Layers are integrated with the trapezoidal rule in log-pressure;
+    crossings within a layer are not refined.
+    """
+    r_env = saturation_mixing_ratio(p, td_env + 273.15)
+    r_parcel = np.where(p >= p_lcl[:, None], r_env[:, :1],
+                        saturation_mixing_ratio(p, t_parcel + 273.15))
+    buoyancy = (virtual_temperature(t_parcel, r_parcel) -
+                virtual_temperature(t_env, r_env))
+    layer = 0.5 * (buoyancy[:, 1:] + buoyancy[:, :-1])
+    area = RD * layer * np.log(p[:, :-1] / p[:, 1:])
+    area = np.where(np.isfinite(area), area, 0.0)
+
+    cape = np.where(area > 0, area, 0.0).sum(axis=1)
+
+    free = (area > 0) & (p[:, 1:] < p_lcl[:, None])
+    lfc = np.where(free.any(axis=1), np.argmax(free, axis=1), -1)
+    below_lfc = np.arange(area.shape[1]) < lfc[:, None]
+    cin = np.where(below_lfc & (area < 0), area, 0.0).sum(axis=1)
+    return cape, cin
+
+
+def process_soundings(soundings):
+    """Compute wind components, parcel profiles and stability indices of a
+    batch of soundings loaded with `load_soundings`."""
+    p = soundings.pressure.values
+    t = soundings.temperature.values
+    td = soundings.dewpoint.values
+
+    u, v = wind_components(soundings.speed.values, soundings.direction.values)
+    profile, p_lcl, t_lcl = parcel_profiles(p, t[:, 0], td[:, 0])
+    cape, cin = cape_cin(p, t, td, profile, p_lcl)
+    li = (interp_to_pressure(p, t, 500) - interp_to_pressure(p, profile, 500))
+
+    dims = ('station', 'level')
+    return xr.Dataset(
+        {
+            'u': (dims, u),
+            'v': (dims, v),
+            'parcel': (dims, profile),
+            'lcl_pressure': ('station', p_lcl),
+            'lcl_temperature': ('station', t_lcl),
+            'cape': ('station', cape),
+            'cin': ('station', cin),
+            'lifted_index': ('station', li)
+        },
+        coords={'station': soundings.station})
+
+
+def process_soundings_parallel(soundings, max_workers=4, block_size=None):
+    """Run `process_soundings` on blocks of stations in a thread pool.
+
+    NumPy releases the GIL in the array operations that dominate the
+    runtime, so threads avoid the cost of copying the batch to processes.
+    By default the stations are split into one block per worker.
+    """
+    nst = soundings.sizes['station']
+    if block_size is None:
+        block_size = max(1, -(-nst // max_workers))
+    blocks = [
+        soundings.isel(station=slice(i, i + block_size))
+        for i in range(0, nst, block_size)
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(process_soundings, blocks))
+    return xr.concat(results, dim='station')
+
+
+###############################################################################
+# Build a network of soundings:
+
+# Perturb the two observed soundings to get a batch of soundings with
+# different surface temperatures and tops. A few hundred keep the gallery
+# build quick.
+rng = np.random.default_rng(0)
+nstations = 300
+profiles = []
+for i in range(nstations):
+    base = (ats, raob)[i % 2]
+    top = rng.integers(len(base) * 3 // 4, len(base) + 1)
+    prof = base.iloc[:top].copy()
+    offset = rng.normal(0, 2)
+    prof['temperature'] += offset
+    prof['dewpoint'] = np.minimum(prof['dewpoint'] + offset,
+                                  prof['temperature'])
+    profiles.append(prof)
+
+soundings = load_soundings(profiles)
+print(soundings.sizes)
+
+###############################################################################
+# Process the batch and compare with MetPy:
+
+start = time.perf_counter()
+result = process_soundings_parallel(soundings)
+elapsed = time.perf_counter() - start
+print('Batch of {} soundings: {:.3f} s'.format(nstations, elapsed))
+
+# MetPy with pint units, one sounding at a time, on a few soundings
+nref = 10
+start = time.perf_counter()
+for prof in profiles[:nref]:
+    p = prof['pressure'].values * units.hPa
+    tc = prof['temperature'].values * units.degC
+    tdc = prof['dewpoint'].values * units.degC
+    mpcalc.wind_components(prof['speed'].values * units.knots,
+                           prof['direction'].values * units.degrees)
+    parcel_prof = mpcalc.parcel_profile(p, tc[0], tdc[0])
+    mpcalc.cape_cin(p, tc, tdc, parcel_prof)
+elapsed = (time.perf_counter() - start) / nref
+print('MetPy, one sounding at a time: {:.3f} s per sounding, '
+      '~{:.1f} s for the batch'.format(elapsed, elapsed * nstations))
+
+# Compare the first sounding
+prof = profiles[0]
+p = prof['pressure'].values * units.hPa
+tc = prof['temperature'].values * units.degC
+tdc = prof['dewpoint'].values * units.degC
+ref_lcl_p, _ = mpcalc.lcl(p[0], tc[0], tdc[0])
+ref_parcel = mpcalc.parcel_profile(p, tc[0], tdc[0]).to('degC')
+ref_cape, _ = mpcalc.cape_cin(p, tc, tdc, ref_parcel)
+print('LCL pressure, batch vs MetPy: {:.1f} hPa vs {:.1f}'.format(
+    float(result.lcl_pressure[0]), ref_lcl_p.m_as('hPa')))
+print('Largest parcel temperature difference: {:.2f} K'.format(
+    np.nanmax(
+        np.abs(result.parcel[0, :len(prof)].values - ref_parcel.m_as('degC')))))
+print('CAPE, batch vs MetPy: {:.0f} J/kg vs {:.0f}'.format(
+    float(result.cape[0]), ref_cape.m_as('J/kg')))
+
+###############################################################################
+# Plot:
+
+fig = plt.figure(figsize=(14, 7))
+
+# Skew-T of the first sounding with the batch parcel profile
+skew = SkewT(fig, rotation=45, subplot=(1, 2, 1))
+first = soundings.isel(station=0)
+skew.plot(first.pressure, first.temperature, color='black')
+skew.plot(first.pressure, first.dewpoint, color='blue')
+skew.plot(first.pressure,
+          result.parcel.isel(station=0),
+          color='red',
+          linestyle='--')
+skew.plot_barbs(first.pressure.values[::3],
+                result.u.isel(station=0).values[::3],
+                result.v.isel(station=0).values[::3],
+                xloc=1.05)
+
+# Use geocat.viz utility functions to set axes limits, ticks and titles
+gvutil.set_axes_limits_and_ticks(
+    ax=skew.ax,
+    xlim=[-30, 50],
+    ylim=[1000, 100],
+    yticks=[1000, 850, 700, 500, 400, 300, 250, 200, 150, 100])
+gvutil.set_titles_and_labels(skew.ax,
+                             maintitle='Station 0',
+                             maintitlefontsize=14,
+                             xlabel='Temperature (C)',
+                             ylabel='P (hPa)',
+                             labelfontsize=12)
+
+# Stability indices of the whole network
+ax = fig.add_subplot(1, 2, 2)
+sc = ax.scatter(result.lifted_index,
+                result.cape,
+                c=result.lcl_pressure,
+                s=4,
+                cmap='viridis')
+fig.colorbar(sc, ax=ax, label='LCL pressure (hPa)')
+
+# Use geocat.viz utility functions to add ticks and titles
+gvutil.add_major_minor_ticks(ax, labelsize=12)
+gvutil.set_titles_and_labels(ax,
+                             maintitle='{} soundings'.format(nstations),
+                             maintitlefontsize=14,
+                             xlabel='Lifted index (K)',
+                             ylabel='CAPE (J/kg)',
+                             labelfontsize=12)
+
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,331 @@
+"""
+skewt_background_example.py
+===========================
+
+This script illustrates the following concepts:
+   - Computing the reference curves of an NCL-style Skew-T background (dry
+     adiabats, moist adiabats and mixing ratio lines) once and caching them
+     on disk
+   - Drawing the cached background with a few collections instead of
+     recomputing it for every diagram
+   - Rendering many soundings into one figure, only replacing the
+     temperature, dewpoint and wind barb artists between diagrams
+   - Usage of geocat-datafiles for accessing the sounding file
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_skewt_1.py, NCL_skewt_2_2.py and NCL_skewt_3_2.py in this gallery
+    - For "sounding_ATS.csv" file: https://github.com/NCAR/geocat-datafiles/tree/main/ascii_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - metpy
+    - numpy
+    - pandas
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import matplotlib.lines as mlines
+import matplotlib.pyplot as plt
+import metpy.calc as mpcalc
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection, PolyCollection
+from metpy.plots import SkewT
+from metpy.units import units
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open a ascii data file using pandas' read_csv function
+ds = pd.read_csv(gdf.get('ascii_files/sounding_ATS.csv'), header=None)
+
+# Extract the data
+p = ds[0].values * units.hPa  # Pressure [mb/hPa]
+tc = ds[1].values * units.degC  # Temperature [C]
+tdc = ds[2].values * units.degC  # Dew pt temp  [C]
+wspd = ds[5].values * units.knots  # Wind speed   [knots or m/s]
+wdir = ds[6].values * units.degrees  # Meteorological wind dir
+u, v = mpcalc.wind_components(wspd, wdir)  # Calculate wind components
+
+###############################################################################
+# Define helper functions for the cached background:
+#
+# The reference curves of a Skew-T background only depend on the pressure
+# range and the chosen starting temperatures and mixing ratios, not on the
+# sounding, so they are computed once, stored in a ``.npz`` file named after
+# a hash of these parameters, and read back by every later figure (or
+# script run) with the same parameters. The skew angle is not part of the
+# key: the curves are stored in (temperature, pressure) coordinates and the
+# skew is applied by the axes transform. Drawing uses one collection per kind
+# of curve, including one PolyCollection for all shaded isotherm bands.
+
+# The NCL-style background of NCL_skewt_3_2.py
+NCL_BACKGROUND = dict(p_range=(1000, 100),
+                      dry_t0=np.arange(243.15, 473.15, 10),
+                      moist_t0=np.arange(281.15, 306.15, 4),
+                      mixing_ratios=(0.001, 0.002, 0.003, 0.005, 0.008, 0.012,
+                                     0.020),
+                      mixing_p=np.linspace(1000, 400, 7))
+
+
+def skewt_background(p_range,
+                     dry_t0,
+                     moist_t0,
+                     mixing_ratios,
+                     mixing_p,
+                     npts=50,
+                     cache_dir=None):
+    """Compute (or load from the cache) the reference curves of a Skew-T
+    background.
+
+    Parameters
+    ----------
+    p_range : tuple of float
+        (bottom, top) pressure of the adiabats in hPa.
+    dry_t0, moist_t0 : array_like
+        Temperatures (K) of the dry and moist adiabats at 1000 hPa.
+    mixing_ratios : array_like
+        Mixing ratios (kg/kg) of the mixing ratio lines.
+    mixing_p : array_like
+        Pressures (hPa) the mixing ratio lines are drawn over.
+    npts : int, optional
+        Number of pressure levels of the adiabats.
+    cache_dir : str, optional
+        Directory of the cache files. Defaults to a `skewt_background`
+        directory in the system's temporary directory.
+
+    Returns
+    -------
+    background : dict
+        `pressure`, `dry` and `moist` (degC, one row per adiabat) and
+        `mixing_p`, `mixing` (degC, one row per mixing ratio line).
+    """
+    params = [
+        np.asarray(p_range, dtype=np.float64),
+        np.asarray(dry_t0, dtype=np.float64),
+        np.asarray(moist_t0, dtype=np.float64),
+        np.asarray(mixing_ratios, dtype=np.float64),
+        np.asarray(mixing_p, dtype=np.float64),
+        np.asarray([npts], dtype=np.float64)
+    ]
+    key = hashlib.sha1(b''.join(a.tobytes() for a in params)).hexdigest()
+
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(), 'skewt_background')
+    path = os.path.join(cache_dir, key + '.npz')
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return dict(cached)
+
+    pressure = units.hPa * np.linspace(p_range[0], p_range[1], npts)
+    ref = units.Quantity(1000., 'hPa')
+    dry = mpcalc.dry_lapse(pressure, units.K * params[1][:, np.newaxis], ref)
+    moist = mpcalc.moist_lapse(pressure, units.K * params[2], ref)
+    mix_p = units.hPa * params[4]
+    mixing = mpcalc.dewpoint(
+        mpcalc.vapor_pressure(mix_p, params[3][:, np.newaxis] * units('kg/kg')))
+
+    background = {
+        'pressure': pressure.m,
+        'dry': dry.m_as('degC'),
+        'moist': moist.m_as('degC'),
+        'mixing_p': mix_p.m,
+        'mixing': mixing.m_as('degC')
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(path, **background)
+    return background
+
+
+def _lines(x, y):
+    """Segments of a LineCollection from rows of x and a shared y."""
+    return np.stack((x, np.broadcast_to(y, x.shape)), axis=-1)
+
+
+def draw_skewt_background(skew, background, shade_color='limegreen'):
+    """Draw a cached background onto a :class:`metpy.plots.SkewT`, styled
+    like NCL_skewt_3_2.py, using one collection per kind of curve."""
+    ax = skew.ax
+
+    # Every other band between isotherms, from -100 to 50 degC
+    x1 = np.linspace(-100, 40, 8)
+    x2 = x1 + 10
+    y0, y1 = 1050, 100
+    bands = [[(a, y0), (b, y0), (b, y1), (a, y1)] for a, b in zip(x1, x2)]
+    ax.add_collection(
+        PolyCollection(bands,
+                       facecolors=shade_color,
+                       edgecolors='none',
+                       alpha=0.25,
+                       zorder=1))
+
+    ax.add_collection(
+        LineCollection(_lines(background['dry'], background['pressure']),
+                       colors='gray',
+                       linewidths=1.5,
+                       zorder=1.5))
+    ax.add_collection(
+        LineCollection(_lines(background['moist'], background['pressure']),
+                       colors='lime',
+                       linewidths=1.5,
+                       zorder=1.5))
+    ax.add_collection(
+        LineCollection(_lines(background['mixing'], background['mixing_p']),
+                       colors='lime',
+                       linestyles='dashed',
+                       linewidths=1,
+                       zorder=1.5))
+
+    # Draw line underneath wind barbs
+    ax.add_line(
+        mlines.Line2D([1.05, 1.05], [0, 1],
+                      color='gray',
+                      linewidth=0.5,
+                      transform=ax.transAxes,
+                      clip_on=False,
+                      zorder=0))
+
+    # Use geocat.viz utility functions to set axes limits and ticks
+    gvutil.set_axes_limits_and_ticks(
+        ax=ax,
+        xlim=[-30, 50],
+        ylim=[1000, 100],
+        yticks=[1000, 850, 700, 500, 400, 300, 250, 200, 150, 100])
+    gvutil.set_titles_and_labels(ax, xlabel='Temperature (C)', ylabel='P (hPa)')
+
+    # Change the style of the gridlines
+    ax.grid(True,
+            which='major',
+            axis='both',
+            color='tan',
+            linewidth=1.5,
+            alpha=0.5)
+
+
+def draw_sounding(skew, p, tc, tdc, u, v, title):
+    """Add the artists of one sounding and return them, so they can be
+    removed before the next sounding is drawn. The title is replaced in
+    place."""
+    artists = skew.plot(p, tc, 'black') + skew.plot(p, tdc, 'blue')
+    artists.append(
+        skew.plot_barbs(pressure=p[::3],
+                        u=u[::3],
+                        v=v[::3],
+                        xloc=1.05,
+                        fill_empty=True,
+                        sizes=dict(emptybarb=0.075, width=0.1, height=0.2)))
+    gvutil.set_titles_and_labels(skew.ax, maintitle=title)
+    return artists
+
+
+def render_soundings(skew, soundings, paths):
+    """Write one image per sounding without re-rendering the background.
+
+    The figure is rendered once and its pixels saved; for every sounding the
+    saved pixels are restored and only the sounding's own artists are drawn
+    on top. This needs a canvas that supports blitting, such as Agg. The
+    artists of the last sounding are kept in the figure.
+
+    Parameters
+    ----------
+    skew : :class:`metpy.plots.SkewT`
+        Skew-T with its background already drawn.
+    soundings : sequence of tuple
+        (p, tc, tdc, u, v, title) of every sounding, as for `draw_sounding`.
+    paths : sequence of str
+        Output image file of every sounding.
+    """
+    canvas = skew.ax.figure.canvas
+    canvas.draw()
+    rendered = canvas.copy_from_bbox(skew.ax.figure.bbox)
+
+    for i, (sounding, path) in enumerate(zip(soundings, paths)):
+        canvas.restore_region(rendered)
+        artists = draw_sounding(skew, *sounding)
+        for artist in artists + [skew.ax.title]:
+            skew.ax.draw_artist(artist)
+        plt.imsave(path, np.asarray(canvas.buffer_rgba()))
+        if i < len(soundings) - 1:
+            for artist in artists:
+                artist.remove()
+
+
+###############################################################################
+# Render a batch of diagrams:
+
+# A batch of soundings, here the observed one with different temperature
+# offsets
+offsets = np.arange(-6, 6.1, 1)
+outdir = tempfile.mkdtemp()
+
+# Full redraw of the NCL_skewt_3_2.py background for every diagram
+start = time.perf_counter()
+for i, offset in enumerate(offsets[:4]):
+    fig = plt.figure(figsize=(12, 12))
+    skew = SkewT(fig, rotation=45)
+    for j in range(0, 8):
+        skew.shade_area(y=[1050, 100],
+                        x1=-100 + 20 * j,
+                        x2=-90 + 20 * j,
+                        color='limegreen',
+                        alpha=0.25,
+                        zorder=1)
+    skew.plot_dry_adiabats(t0=units.K * NCL_BACKGROUND['dry_t0'],
+                           linestyles='solid',
+                           colors='gray',
+                           linewidth=1.5)
+    skew.plot_moist_adiabats(t0=units.K * NCL_BACKGROUND['moist_t0'],
+                             linestyles='solid',
+                             colors='lime',
+                             linewidths=1.5)
+    skew.plot_mixing_lines(mixing_ratio=np.reshape(
+        NCL_BACKGROUND['mixing_ratios'], (-1, 1)),
+                           pressure=units.hPa * NCL_BACKGROUND['mixing_p'],
+                           colors='lime')
+    draw_sounding(skew, p, tc + offset * units.delta_degC,
+                  tdc + offset * units.delta_degC, u, v, 'Sounding')
+    fig.savefig(os.path.join(outdir, 'full_{}.png'.format(i)))
+    plt.close(fig)
+full = (time.perf_counter() - start) / 4
+
+# Cached background: one figure, rendered once; every diagram only draws its
+# own artists over a copy of the rendered background
+start = time.perf_counter()
+background = skewt_background(**NCL_BACKGROUND)
+fig = plt.figure(figsize=(12, 12))
+skew = SkewT(fig, rotation=45)
+draw_skewt_background(skew, background)
+soundings = [
+    (p, tc + offset * units.delta_degC, tdc + offset * units.delta_degC, u, v,
+     'ATS Rawinsonde: {:+.0f} C'.format(offset)) for offset in offsets
+]
+render_soundings(skew, soundings, [
+    os.path.join(outdir, 'cached_{}.png'.format(i)) for i in range(len(offsets))
+])
+cached = (time.perf_counter() - start) / len(offsets)
+
+print('Full redraw:       {:.3f} s per diagram'.format(full))
+print('Cached background: {:.3f} s per diagram'.format(cached))
+
+# Remove the rendered diagrams
+shutil.rmtree(outdir)
+
+###############################################################################
+# Plot:
+
+# The figure of the last sounding of the batch
+plt.show()
@@ -0,0 +1,403 @@
+"""
+streamline_cache_example.py
+===========================
+
+This script illustrates the following concepts:
+   - Integrating streamlines once per wind field and seed set, and caching
+     the resulting lines
+   - Integrating all seed points together as vectorized numpy operations,
+     instead of one trajectory at a time as ``streamplot`` does
+   - Drawing cached streamlines as a colour-mapped ``LineCollection``, so
+     restyling a plot does not integrate them again
+   - Reusing one set of seed points for all time steps of a storm loop
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_stream_1.py and NCL_stream_9.py in this gallery
+    - For "U500storm.cdf" and "V500storm.cdf" files: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import hashlib
+import time
+
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import matplotlib.colors as mcolors
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from matplotlib.collections import LineCollection
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open netCDF data files using xarray default engine and load the data into
+# xarray
+ds1 = xr.open_dataset(gdf.get('netcdf_files/U500storm.cdf'))
+ds2 = xr.open_dataset(gdf.get('netcdf_files/V500storm.cdf'))
+
+###############################################################################
+# Define helper functions for cached streamlines:
+#
+# As in ``streamplot``, trajectories are integrated in grid index space along
+# the normalized velocity, seeded from the cells of a coarse occupancy grid
+# whose size is set by `density`, and stopped where they enter a cell that
+# another line already occupies. Unlike ``streamplot``, a whole block of
+# seeds is advanced together, one vectorized midpoint step at a time, in
+# both directions. A cheap sequential pass then applies the occupancy rule
+# within the block, and the next block skips seeds in occupied cells. The
+# lines (in longitude and latitude) and the speed along them are cached
+# under a hash of the grid, the wind, the density and the seeds. Drawing
+# them, in any style, is then a single ``LineCollection``.
+
+_streamline_cache = {}
+
+
+def seed_points(shape, density=2.0):
+    """Seed points (in grid index coordinates) at the centres of the cells
+    of the occupancy grid of a field of `shape` (ny, nx). They only depend
+    on the grid, so the same seeds serve every time step."""
+    ny, nx = shape
+    my, mx = int(30 * density), int(30 * density)
+    cy, cx = np.meshgrid((np.arange(my) + 0.5) / my * (ny - 1),
+                         (np.arange(mx) + 0.5) / mx * (nx - 1),
+                         indexing='ij')
+    return np.column_stack((cx.ravel(), cy.ravel()))
+
+
+def _interp_grid(field, x, y):
+    """Bilinear interpolation at grid index coordinates; missing outside."""
+    ny, nx = field.shape
+    inside = (x >= 0) & (x <= nx - 1) & (y >= 0) & (y <= ny - 1)
+    x, y = np.where(inside, x, 0), np.where(inside, y, 0)
+    i = np.minimum(x.astype(int), nx - 2)
+    j = np.minimum(y.astype(int), ny - 2)
+    fx, fy = x - i, y - j
+    value = ((1 - fy) * ((1 - fx) * field[j, i] + fx * field[j, i + 1]) + fy *
+             ((1 - fx) * field[j + 1, i] + fx * field[j + 1, i + 1]))
+    return np.where(inside, value, np.nan)
+
+
+def _cells(points, shape, occupied):
+    """Occupancy grid cells of points (inside the grid) in grid index
+    coordinates."""
+    (ny, nx), (my, mx) = shape, occupied.shape
+    cy = np.minimum((points[:, 1] / (ny - 1) * my).astype(int), my - 1)
+    cx = np.minimum((points[:, 0] / (nx - 1) * mx).astype(int), mx - 1)
+    return cy, cx
+
+
+def _integrate(u, v, seeds, direction, step, max_steps, occupied, visited):
+    """Advance all seeds together along the normalized velocity. Returns
+    the points (max_steps + 1, nseeds, 2), missing after a trajectory
+    leaves the grid, reaches calm air, enters a cell occupied by another
+    line or comes back to a cell it has left before. `visited` holds the
+    cells of every trajectory (nseeds, my, mx) and is updated in place."""
+    points = np.full((max_steps + 1,) + seeds.shape, np.nan)
+    points[0] = seeds
+    p = seeds.copy()
+    alive = np.ones(len(seeds), dtype=bool)
+
+    def heading(q):
+        du = _interp_grid(u, q[:, 0], q[:, 1])
+        dv = _interp_grid(v, q[:, 0], q[:, 1])
+        speed = np.hypot(du, dv)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return direction * np.column_stack((du, dv)) / speed[:, np.newaxis]
+
+    for n in range(1, max_steps + 1):
+        index = np.flatnonzero(alive)
+        k1 = heading(p[index])
+        k2 = heading(p[index] + 0.5 * step * k1)
+        new = p[index] + step * k2
+        ok = np.isfinite(new).all(axis=1)
+        index, new = index[ok], new[ok]
+        alive[np.flatnonzero(alive)[~ok]] = False
+
+        # Stop in occupied cells and in own cells left earlier
+        cy, cx = _cells(new, u.shape, occupied)
+        py, px = _cells(p[index], u.shape, occupied)
+        moved = (cy != py) | (cx != px)
+        stop = occupied[cy, cx] | (moved & visited[index, cy, cx])
+        alive[index[stop]] = False
+        index, new, cy, cx = index[~stop], new[~stop], cy[~stop], cx[~stop]
+
+        visited[index, cy, cx] = True
+        p[index] = new
+        points[n, index] = new
+        if not alive.any():
+            break
+    return points
+
+
+def _occupancy_filter(forward, backward, shape, occupied, min_points):
+    """Apply the ``streamplot`` occupancy rule to a block of integrated
+    trajectories, marking the cells of the kept lines as occupied."""
+    lines = []
+    for n in range(forward.shape[1]):
+        fw = forward[:, n][np.isfinite(forward[:, n, 0])]
+        bw = backward[1:, n][np.isfinite(backward[1:, n, 0])]
+        if occupied[_cells(fw[:1], shape, occupied)][0]:
+            continue
+
+        # Cut each half where it first enters an occupied cell
+        halves = []
+        for half in (fw, bw):
+            taken = occupied[_cells(half, shape, occupied)]
+            halves.append(half[:np.argmax(taken)] if taken.any() else half)
+        line = np.concatenate((halves[1][::-1], halves[0]))
+        if len(line) < min_points:
+            continue
+        occupied[_cells(line, shape, occupied)] = True
+        lines.append(line)
+    return lines
+
+
+def streamlines(lon,
+                lat,
+                u,
+                v,
+                density=2.0,
+                seeds=None,
+                step=0.5,
+                max_steps=200,
+                min_points=5,
+                block_size=256):
+    """Integrate (or load from the cache) the streamlines of a wind field.
+
+    Parameters
+    ----------
+    lon, lat : array_like
+        1-D axes of the grid, in degrees.
+    u, v : array_like
+        Wind components on (lat, lon).
+    density : float, optional
+        Density of the lines, as in ``streamplot``.
+    seeds : :class:`numpy.ndarray`, optional
+        Seed points in grid index coordinates (x, y). Defaults to
+        `seed_points` of the grid.
+    step : float, optional
+        Integration step in grid lengths.
+    max_steps : int, optional
+        Maximum number of steps in each direction.
+    min_points : int, optional
+        Shorter lines are dropped.
+    block_size : int, optional
+        Number of seeds integrated together. Seeds in cells occupied by the
+        lines of earlier blocks are skipped.
+
+    Returns
+    -------
+    result : dict
+        `lines`, a list of (npts, 2) longitude/latitude arrays, and `speed`,
+        the wind speed along every line.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    u = np.asarray(u, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    if seeds is None:
+        seeds = seed_points(u.shape, density)
+
+    key = hashlib.sha1(b''.join(
+        np.ascontiguousarray(a).tobytes()
+        for a in (lon, lat, u, v, seeds))).hexdigest()
+    key = (key, density, step, max_steps, min_points)
+    if key in _streamline_cache:
+        return _streamline_cache[key]
+
+    # Velocity in grid lengths per unit time
+    ug = u / np.gradient(lon)[np.newaxis, :]
+    vg = v / np.gradient(lat)[:, np.newaxis]
+    occupied = np.zeros((int(30 * density), int(30 * density)), dtype=bool)
+    lines = []
+    for first in range(0, len(seeds), block_size):
+        block = seeds[first:first + block_size]
+        block = block[~occupied[_cells(block, u.shape, occupied)]]
+        if len(block) == 0:
+            continue
+        visited = np.zeros((len(block),) + occupied.shape, dtype=bool)
+        visited[(np.arange(len(block)),) +
+                _cells(block, u.shape, occupied)] = True
+        forward = _integrate(ug, vg, block, 1, step, max_steps, occupied,
+                             visited)
+        backward = _integrate(ug, vg, block, -1, step, max_steps, occupied,
+                              visited)
+        lines += _occupancy_filter(forward, backward, u.shape, occupied,
+                                   min_points)
+
+    speed = np.hypot(u, v)
+    index = np.arange(lon.size), np.arange(lat.size)
+    result = {
+        'lines': [
+            np.column_stack((np.interp(line[:, 0], index[0],
+                                       lon), np.interp(line[:, 1], index[1],
+                                                       lat))) for line in lines
+        ],
+        'speed': [
+            _interp_grid(speed, line[:, 0], line[:, 1]) for line in lines
+        ]
+    }
+    _streamline_cache[key] = result
+    return result
+
+
+def draw_streamlines(ax, result, arrows=True, **kwargs):
+    """Draw cached streamlines on a GeoAxes as one LineCollection coloured
+    by wind speed, with an arrow head at the middle of every line. Keyword
+    arguments (`cmap`, `norm`, `linewidths`, `alpha`, ...) are passed to
+    the LineCollection."""
+    lines = result['lines']
+    if not lines:
+        # Nothing to draw, e.g. for a calm field
+        collection = LineCollection([], **kwargs)
+        ax.add_collection(collection)
+        return collection
+
+    sizes = [len(line) for line in lines]
+    points = ax.projection.transform_points(ccrs.PlateCarree(),
+                                            *np.concatenate(lines).T)[:, :2]
+    lines = np.split(points, np.cumsum(sizes)[:-1])
+
+    segments = np.concatenate(
+        [np.stack((line[:-1], line[1:]), axis=1) for line in lines])
+    speed = np.concatenate([0.5 * (s[:-1] + s[1:]) for s in result['speed']])
+    collection = LineCollection(segments, array=speed, **kwargs)
+    ax.add_collection(collection)
+
+    if arrows:
+        # Colour the arrow heads like the lines under them
+        collection.autoscale_None()
+        middle = [len(line) // 2 for line in lines]
+        mid = np.array([line[m] for line, m in zip(lines, middle)])
+        heading = np.array(
+            [line[m + 1] - line[m] for line, m in zip(lines, middle)])
+        heading /= np.hypot(heading[:, 0], heading[:, 1])[:, np.newaxis]
+        mid_speed = np.array([s[m] for s, m in zip(result['speed'], middle)])
+        ax.quiver(mid[:, 0],
+                  mid[:, 1],
+                  heading[:, 0],
+                  heading[:, 1],
+                  angles='xy',
+                  pivot='middle',
+                  scale=60,
+                  width=0.002,
+                  headwidth=6,
+                  headlength=6,
+                  alpha=kwargs.get('alpha'),
+                  color=collection.get_cmap()(collection.norm(mid_speed)))
+    return collection
+
+
+###############################################################################
+# Integrate a storm loop:
+
+colormap = mcolors.ListedColormap([
+    'darkblue', 'mediumblue', 'blue', 'cornflowerblue', 'skyblue', 'aquamarine',
+    'lime', 'greenyellow', 'gold', 'orange', 'orangered', 'red', 'maroon'
+])
+colorbounds = np.arange(0, 56, 4)
+norm = mcolors.BoundaryNorm(colorbounds, colormap.N)
+projection = ccrs.LambertAzimuthalEqualArea(central_longitude=-100,
+                                            central_latitude=40)
+nsteps = 6
+
+# streamplot for every time step, as in NCL_stream_9.py
+start = time.perf_counter()
+for t in range(nsteps):
+    fig = plt.figure(figsize=(10, 10))
+    ax = fig.add_axes([.1, .2, .8, .6], projection=projection)
+    ax.set_extent([-128, -58, 18, 65], crs=ccrs.PlateCarree())
+    U, V = ds1.u.isel(timestep=t), ds2.v.isel(timestep=t)
+    ax.streamplot(U.lon,
+                  U.lat,
+                  U.data,
+                  V.data,
+                  transform=ccrs.PlateCarree(),
+                  density=2.0,
+                  color=np.hypot(U.data, V.data),
+                  cmap=colormap)
+    fig.canvas.draw()
+    plt.close(fig)
+print('streamplot: {:.3f} s per time step'.format(
+    (time.perf_counter() - start) / nsteps))
+
+# One seed set for the whole loop; every time step is integrated once
+seeds = seed_points(ds1.u.shape[-2:], density=2.0)
+start = time.perf_counter()
+results = []
+for t in range(nsteps):
+    fig = plt.figure(figsize=(10, 10))
+    ax = fig.add_axes([.1, .2, .8, .6], projection=projection)
+    ax.set_extent([-128, -58, 18, 65], crs=ccrs.PlateCarree())
+    U, V = ds1.u.isel(timestep=t), ds2.v.isel(timestep=t)
+    results.append(streamlines(U.lon, U.lat, U.data, V.data, seeds=seeds))
+    draw_streamlines(ax, results[-1], cmap=colormap, norm=norm)
+    fig.canvas.draw()
+    plt.close(fig)
+print('Cached engine, first draw: {:.3f} s per time step'.format(
+    (time.perf_counter() - start) / nsteps))
+
+# A second style of the same loop only draws the cached lines
+start = time.perf_counter()
+for t in range(nsteps):
+    fig = plt.figure(figsize=(10, 10))
+    ax = fig.add_axes([.1, .2, .8, .6], projection=projection)
+    ax.set_extent([-128, -58, 18, 65], crs=ccrs.PlateCarree())
+    U, V = ds1.u.isel(timestep=t), ds2.v.isel(timestep=t)
+    result = streamlines(U.lon, U.lat, U.data, V.data, seeds=seeds)
+    draw_streamlines(ax, result, cmap='viridis', linewidths=2, arrows=False)
+    fig.canvas.draw()
+    plt.close(fig)
+print('Cached engine, restyled: {:.3f} s per time step'.format(
+    (time.perf_counter() - start) / nsteps))
+
+###############################################################################
+# Plot:
+
+# Set figure and map, as in NCL_stream_9.py
+fig = plt.figure(figsize=(10, 10))
+ax = fig.add_axes([.1, .2, .8, .6],
+                  projection=projection,
+                  frameon=False,
+                  aspect='auto')
+ax.set_extent([-128, -58, 18, 65], crs=ccrs.PlateCarree())
+ax.add_feature(cfeature.OCEAN, color='lightblue')
+ax.add_feature(cfeature.LAKES, color='white', edgecolor='black')
+ax.add_feature(cfeature.LAND, color='tan')
+ax.coastlines()
+
+# Draw the cached streamlines of the first time step, partially transparent
+draw_streamlines(ax, results[0], cmap=colormap, norm=norm, alpha=.5)
+
+# Use geocat.viz.util convenience function to add a title
+gvutil.set_titles_and_labels(ax,
+                             maintitle='Cached streamlines',
+                             maintitlefontsize=25)
+
+# Add a colorbar
+ax2 = fig.add_axes([.1, .1, .8, .05])
+fig.colorbar(plt.cm.ScalarMappable(cmap=colormap, norm=norm),
+             cax=ax2,
+             boundaries=colorbounds,
+             ticks=np.arange(4, 52, 4),
+             spacing='uniform',
+             orientation='horizontal')
+ax2.tick_params(labelsize=20)
+
+plt.show()
@@ -20,6 +20,7 @@ import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.collections import LineCollection
 
 from geocat.viz import util as gvutil
 
@@ -31,22 +32,47 @@ ds = xr.open_dataset(gdf.get('netcdf_files/traj_data.nc'))
 sdata = ds.get('sdata')
 
 ###############################################################################
-# Define helper function to plot every n-th timestep:
-
-
-def plot_nth_timestep(nparrayy, nparrayx, n):
-
-    for x in range(0, len(nparrayx)):
-
-        # Plot green starting point of each trajectory
-        if x == 0:
-            y, x = nparrayy[x], nparrayx[x]
-            plt.scatter(x, y, color='green', s=1, zorder=2.5)
-
-        # Plot every n-th timestamp
-        if x % n == 0:
-            y, x = nparrayy[x], nparrayx[x]
-            plt.scatter(x, y, color='black', s=1, zorder=2.5)
+# Define helper function to plot trajectories:
+
+
+def plot_trajectories(ax, lon, lat, n, colors=None, cmap='viridis'):
+    """Draw all trajectories as a single LineCollection, then mark the
+    starting point and every n-th timestep of all of them with one scatter
+    call each.
+
+    Parameters
+    ----------
+    ax : :class:`matplotlib.axes.Axes`
+        Axes to draw on.
+    lon, lat : :class:`numpy.ndarray`
+        Arrays of shape (ntime, ntraj).
+    n : int
+        Marker stride along the time axis.
+    colors : list, optional
+        One line color per trajectory. If not given, the lines are colored
+        by their trajectory index using `cmap`.
+    cmap : str or :class:`matplotlib.colors.Colormap`, optional
+        Colormap used when `colors` is not given.
+    """
+
+    # LineCollection expects one (ntime, 2) vertex array per trajectory
+    segments = np.stack((lon.T, lat.T), axis=-1)
+    if colors is None:
+        lines = LineCollection(segments, cmap=cmap, linewidths=0.4)
+        lines.set_array(np.arange(segments.shape[0]))
+    else:
+        lines = LineCollection(segments, colors=colors, linewidths=0.4)
+    ax.add_collection(lines)
+
+    # Plot every n-th timestep using strided views of the arrays
+    ax.scatter(lon[::n].ravel(),
+               lat[::n].ravel(),
+               color='black',
+               s=1,
+               zorder=2.5)
+
+    # Plot green starting point of each trajectory
+    ax.scatter(lon[0], lat[0], color='green', s=1, zorder=3)
 
 
 ###############################################################################
@@ -79,17 +105,10 @@ traj = [1, 10, 53, 67, 80]
 # Set colors of each trajectory line
 trajlinecolors = ["red", "blue", "green", "grey", "magenta"]
 
-# Plot each trajectory
-for i in range(len(traj)):
-
-    # Extract latitude
-    ypt = (np.array(sdata[1, :, traj[i]]) - 360)
-
-    # Extract longitude
-    xpt = np.array(sdata[2, :, traj[i]])
-
-    plt.plot(ypt, xpt, color=trajlinecolors[i], linewidth=0.4)
+# Extract longitude and latitude of all selected trajectories at once
+xpt = sdata[1, :, traj].values - 360
+ypt = sdata[2, :, traj].values
 
-    plot_nth_timestep(xpt, ypt, n=4)
+plot_trajectories(ax, xpt, ypt, n=4, colors=trajlinecolors)
 
 plt.show()
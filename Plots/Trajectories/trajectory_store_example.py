@@ -0,0 +1,286 @@
+"""
+trajectory_store_example.py
+===========================
+
+This script illustrates the following concepts:
+   - Converting a `traj_data.nc`-style (variable, time, trajectory) array into
+     a columnar, chunked on-disk trajectory store
+   - Building a per-trajectory bounding-box and time-range index
+   - Querying trajectories by bounding box and time window through memory-mapped
+     arrays, reading only the matching trajectories
+   - Plotting the query result with a single LineCollection
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following GitHub repositories to see further information about the function and to access data:
+    - For "traj_data.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import os
+import tempfile
+
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+from matplotlib.collections import LineCollection
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine. `sdata` is a
+# (variable, time, trajectory) array whose variables 1 and 2 are longitude
+# (0-360) and latitude. Nothing is loaded into memory yet.
+ds = xr.open_dataset(gdf.get('netcdf_files/traj_data.nc'))
+sdata = ds.get('sdata')
+
+###############################################################################
+# Define helper functions for the trajectory store:
+#
+# The store is a directory with one ``.npy`` file per variable, laid out as
+# (trajectory, time) so that the points of one trajectory are contiguous on
+# disk, plus an ``index.npy`` file with one row per trajectory holding its
+# bounding box and first/last valid time step. The conversion reads the
+# source in chunks of trajectories, so the full array never has to fit in
+# memory. Queries first filter the small index, then only read the rows of
+# the matching trajectories from the memory-mapped variable files. A
+# trajectory matches a region if one of its points lies in it or one of the
+# straight segments between consecutive points crosses it.
+
+# Columns of the index array
+INDEX_COLUMNS = ('lon_min', 'lon_max', 'lat_min', 'lat_max', 't_first',
+                 't_last')
+
+
+def write_trajectory_store(sdata, path, variables=None, chunk_size=10000):
+    """Convert a (variable, time, trajectory) array into a trajectory store.
+
+    Parameters
+    ----------
+    sdata : :class:`xarray.DataArray`
+        Source array, e.g. `sdata` from "traj_data.nc".
+    path : str
+        Directory the store is written to.
+    variables : dict, optional
+        Maps the name of each stored variable to its index along the first
+        dimension of `sdata`. 'lon' and 'lat' are required; longitudes are
+        converted to the range [-180, 180). Defaults to
+        ``{'lon': 1, 'lat': 2}``.
+    chunk_size : int, optional
+        Number of trajectories converted at a time.
+    """
+    if variables is None:
+        variables = {'lon': 1, 'lat': 2}
+
+    os.makedirs(path, exist_ok=True)
+    _, ntime, ntraj = sdata.shape
+
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(path, name + '.npy'),
+                                        mode='w+',
+                                        dtype=np.float32,
+                                        shape=(ntraj, ntime))
+        for name in variables
+    }
+    index = np.empty((ntraj, len(INDEX_COLUMNS)))
+
+    for start in range(0, ntraj, chunk_size):
+        stop = min(start + chunk_size, ntraj)
+
+        for name, ivar in variables.items():
+            values = sdata[ivar, :, start:stop].values.T
+            if name == 'lon':
+                values = ((values + 180) % 360) - 180
+            columns[name][start:stop] = values
+
+        lon = columns['lon'][start:stop]
+        lat = columns['lat'][start:stop]
+        valid = np.isfinite(lon) & np.isfinite(lat)
+        with np.errstate(invalid='ignore'):
+            index[start:stop, 0] = np.nanmin(lon, axis=1)
+            index[start:stop, 1] = np.nanmax(lon, axis=1)
+            index[start:stop, 2] = np.nanmin(lat, axis=1)
+            index[start:stop, 3] = np.nanmax(lat, axis=1)
+        index[start:stop, 4] = np.argmax(valid, axis=1)
+        index[start:stop, 5] = ntime - 1 - np.argmax(valid[:, ::-1], axis=1)
+
+    for column in columns.values():
+        column.flush()
+    np.save(os.path.join(path, 'index.npy'), index)
+
+
+def open_trajectory_store(path):
+    """Open a trajectory store as a dict of read-only memory-mapped arrays."""
+    return {
+        os.path.splitext(name)[0]: np.load(os.path.join(path, name),
+                                           mmap_mode='r')
+        for name in os.listdir(path)
+        if name.endswith('.npy')
+    }
+
+
+def _segments_cross(lon, lat, extent):
+    """Whether the segments between consecutive points of every trajectory
+    cross the box `extent`, with the Liang-Barsky clipping test. Segments
+    with a missing end or jumping across the date line never cross."""
+    x0, y0 = lon[:, :-1], lat[:, :-1]
+    dx, dy = np.diff(lon, axis=1), np.diff(lat, axis=1)
+
+    # Entry and exit parameters along every segment, for the four box edges
+    t_enter = np.zeros(dx.shape)
+    t_exit = np.ones(dx.shape)
+    parallel_outside = np.zeros(dx.shape, dtype=bool)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for p, q in [(-dx, x0 - extent[0]), (dx, extent[1] - x0),
+                     (-dy, y0 - extent[2]), (dy, extent[3] - y0)]:
+            t = q / p
+            t_enter = np.where(p < 0, np.maximum(t_enter, t), t_enter)
+            t_exit = np.where(p > 0, np.minimum(t_exit, t), t_exit)
+            parallel_outside |= (p == 0) & (q < 0)
+        return ((t_enter <= t_exit) & ~parallel_outside & np.isfinite(dx) &
+                np.isfinite(dy) & (np.abs(dx) < 180))
+
+
+def _runs(ids):
+    """Split sorted trajectory ids into slices of consecutive ids."""
+    breaks = np.flatnonzero(np.diff(ids) != 1) + 1
+    return [
+        slice(run[0], run[-1] + 1) for run in np.split(ids, breaks) if run.size
+    ]
+
+
+def query_trajectories(store, extent=None, time_window=None):
+    """Select the trajectories crossing a region during a time window.
+
+    Parameters
+    ----------
+    store : dict
+        Store opened with `open_trajectory_store`.
+    extent : sequence of float, optional
+        [lon_min, lon_max, lat_min, lat_max] of the region, longitudes in
+        [-180, 180).
+    time_window : tuple of int, optional
+        (first, last) time step, inclusive.
+
+    Returns
+    -------
+    ids : :class:`numpy.ndarray`
+        Indices of the matching trajectories.
+    result : dict
+        For every stored variable, a list of read-only memory-mapped arrays
+        of shape (run length, ntime_window), one per run of consecutive ids.
+        Concatenated along the first axis they hold the rows of `ids`.
+        Nothing is copied; values are read from disk when they are used.
+    """
+    index = store['index']
+    ntime = store['lon'].shape[1]
+    t0, t1 = (0, ntime - 1) if time_window is None else time_window
+    window = slice(t0, t1 + 1)
+
+    # Coarse filter on the per-trajectory index
+    candidate = (index[:, 4] <= t1) & (index[:, 5] >= t0)
+    if extent is not None:
+        candidate &= ((index[:, 0] <= extent[1]) & (index[:, 1] >= extent[0]) &
+                      (index[:, 2] <= extent[3]) & (index[:, 3] >= extent[2]))
+    ids = np.flatnonzero(candidate)
+
+    # Exact test on the candidate rows only: keep trajectories with a point
+    # or a segment in the region
+    if extent is not None and ids.size:
+        keep = []
+        for rows in _runs(ids):
+            lon = store['lon'][rows, window]
+            lat = store['lat'][rows, window]
+            with np.errstate(invalid='ignore'):
+                inside = ((lon >= extent[0]) & (lon <= extent[1]) &
+                          (lat >= extent[2]) & (lat <= extent[3]))
+            keep.append(
+                inside.any(axis=1) |
+                _segments_cross(lon, lat, extent).any(axis=1))
+        ids = ids[np.concatenate(keep)]
+
+    # Basic slices of a memmap are memmaps themselves
+    result = {
+        name: [column[rows, window] for rows in _runs(ids)
+              ] for name, column in store.items() if name != 'index'
+    }
+    return ids, result
+
+
+###############################################################################
+# Convert the data to a trajectory store and query it:
+
+# The store is written to a temporary directory, removed at the end of the
+# block
+with tempfile.TemporaryDirectory() as store_dir:
+    write_trajectory_store(sdata, store_dir, chunk_size=50)
+    store = open_trajectory_store(store_dir)
+
+    # Trajectories crossing a box off the coast of Argentina during the first
+    # half of the record
+    extent = [-55, -45, -50, -40]
+    ids, traj = query_trajectories(store,
+                                   extent=extent,
+                                   time_window=(0, sdata.shape[1] // 2))
+
+    print('{} of {} trajectories match the query'.format(
+        ids.size, store['lon'].shape[0]))
+
+    # Read the matching trajectories, as (trajectory, time, lon/lat) lines,
+    # before the store is removed
+    lines = [
+        np.stack((lon, lat), axis=-1)
+        for lon, lat in zip(traj['lon'], traj['lat'])
+    ]
+    lines = np.concatenate(lines) if lines else np.empty((0, 2, 2))
+    del store, traj
+
+###############################################################################
+# Plot:
+
+# Initialize axes
+ax = plt.axes(projection=ccrs.PlateCarree())
+ax.set_extent([-75, -25, -60, -20], crs=None)
+
+# Set title and subtitle
+plt.suptitle('Trajectories crossing the boxed region')
+plt.title('first half of the record', fontsize=10, pad=10)
+
+# Set land feature and change color to 'lightgrey'
+ax.add_feature(cfeature.LAND, color='lightgrey')
+
+# Use geocat.viz.util convenience function to make plots look like NCL plots by using latitude, longitude tick labels
+gvutil.add_lat_lon_ticklabels(ax)
+
+# Use geocat.viz.util convenience function to set axes tick values
+gvutil.set_axes_limits_and_ticks(ax,
+                                 xticks=np.linspace(-70, -30, 5),
+                                 yticks=np.linspace(-60, -20, 5))
+
+# Draw all matching trajectories as one collection, colored by trajectory id
+collection = LineCollection(lines, cmap='viridis', linewidths=0.6)
+collection.set_array(ids)
+ax.add_collection(collection)
+
+# Outline the query region
+ax.plot([extent[0], extent[1], extent[1], extent[0], extent[0]],
+        [extent[2], extent[2], extent[3], extent[3], extent[2]],
+        color='black',
+        linewidth=1)
+
+plt.show()
@@ -5,6 +5,7 @@ NCL_vector_5.py
 
 This script illustrates the following concepts:
    - Using streamplot to resemble curly vectors
+   - Resampling vector components to an evenly spaced grid with a separable interpolation
    - Drawing pressure/height vectors over filled contours
    - Using inset_axes() to create additional axes for color bars
    - Interpolate to user specified pressure levels
@@ -22,7 +23,6 @@ See following URLs to see the reproduced NCL plot & script:
 import numpy as np
 import xarray as xr
 from matplotlib import pyplot as plt
-from scipy.interpolate import interp2d
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 
 import geocat.datafiles as gdf
@@ -31,6 +31,76 @@ from geocat.comp import interp_hybrid_to_pressure
 
 import warnings
 
+###############################################################################
+# Define a helper function for resampling to a regular grid:
+#
+# The interpolation is separable: for each axis the neighbouring input points
+# and their weights are found once, and then applied to all components (and
+# any leading dimensions, e.g. time) with two gathers and weighted sums.
+
+
+def _axis_weights(src, dst, method='linear', log=False):
+    """Indices and weights of the input points around every output point of
+    one axis, for linear (2 points) or cubic Lagrange (4 points)
+    interpolation."""
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    if log:
+        src, dst = np.log(src), np.log(dst)
+    order = np.argsort(src)
+    src = src[order]
+
+    npts = 2 if method == 'linear' else 4
+    i = np.clip(np.searchsorted(src, dst) - 1, 0, src.size - 2)
+    first = np.clip(i - (npts // 2 - 1), 0, src.size - npts)
+    idx = first[:, np.newaxis] + np.arange(npts)
+    nodes = src[idx]
+
+    # Lagrange basis polynomials on the stencil of every output point
+    weights = np.ones(idx.shape)
+    for m in range(npts):
+        for n in range(npts):
+            if m != n:
+                spacing = nodes[:, m] - nodes[:, n]
+                weights[:, m] *= (dst - nodes[:, n]) / spacing
+    return order[idx], weights
+
+
+def resample_rectilinear(x,
+                         y,
+                         components,
+                         xi,
+                         yi,
+                         method='linear',
+                         log_y=False):
+    """Resample fields on the rectilinear grid (`y`, `x`) to (`yi`, `xi`).
+
+    Parameters
+    ----------
+    x, y : array_like
+        Input axes of the last and second-to-last dimension.
+    components : list of array_like
+        Fields of shape (..., y, x), e.g. both components of a vector.
+    xi, yi : array_like
+        Output axes.
+    method : {'linear', 'cubic'}, optional
+        Interpolation along each axis.
+    log_y : bool, optional
+        Interpolate in the logarithm of `y`, e.g. for pressure.
+
+    Returns
+    -------
+    resampled : list of :class:`numpy.ndarray`
+        The components on (..., yi, xi).
+    """
+    ix, wx = _axis_weights(x, xi, method)
+    iy, wy = _axis_weights(y, yi, method, log=log_y)
+    fields = np.stack([np.asarray(c, dtype=np.float64) for c in components])
+    fields = (fields[..., iy, :] * wy[..., np.newaxis]).sum(axis=-2)
+    fields = (fields[..., ix] * wx).sum(axis=-1)
+    return list(fields)
+
+
 ###############################################################################
 # Read in data:
 ds = xr.open_dataset(gdf.get("netcdf_files/atmos.nc"), decode_times=False)
@@ -118,18 +188,13 @@ colors = T.plot.contourf(ax=ax,
 # We attempt to recreate curly vectors with Matplotlib's streamplot function.
 # streamplot requires the input parameter x, y to be evenly spaced strictly increasing arrays.
 # Therefore we interpolate the original dataset onto an manually set, evenly spaced grid.
-# There are probably more suitable interpolation routines than scipy's interp2d,
-# but we do not have a standardized procedure for interpolation for streamplot as of this point.
 
 # regularly spaced grid spanning the domain of x and y
 xi = np.linspace(T['lat'].min(), T['lat'].max(), T['lat'].size)
 yi = np.linspace(T['plev'].min(), T['plev'].max(), T['plev'].size)
 
-# interp2d function creates interpolator classes
-u_func = interp2d(T['lat'], T['plev'], V)
-v_func = interp2d(T['lat'], T['plev'], wscale)
-uCi = u_func(xi, yi)
-vCi = v_func(xi, yi)
+# Resample both vector components in one call
+uCi, vCi = resample_rectilinear(T['lat'], T['plev'], [V, wscale], xi, yi)
 
 # Use streamplot to match curly vector
 ax.streamplot(xi,
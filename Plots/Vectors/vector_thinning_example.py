@@ -0,0 +1,230 @@
+"""
+vector_thinning_example.py
+==========================
+
+This script illustrates the following concepts:
+   - Thinning wind vectors by a minimum distance between arrows on the
+     plot (like NCL's ``vcMinDistanceF``), measured after the map
+     projection, instead of with fixed strides in grid space
+   - Selecting vectors with a vectorized grid-hash pass followed by a short
+     Poisson-disk pass over the remaining candidates
+   - Caching the selection per grid, projection, extent and density, and
+     reusing it for every time step
+   - Usage of geocat-datafiles for accessing NetCDF files
+   - Usage of geocat-viz plotting convenience functions
+
+See following URLs to see the related NCL-style examples:
+    - NCL_vector_3.py (``gvutil.set_vector_density``), NCL_vector_1.py and
+      NCL_overlay_11a.py in this gallery
+    - NCL's vcMinDistanceF resource: https://www.ncl.ucar.edu/Document/Graphics/Resources/vc.shtml#vcMinDistanceF
+    - For "uv300.nc" file: https://github.com/NCAR/geocat-datafiles/tree/main/netcdf_files
+
+Dependencies:
+    - geocat.datafiles (Not necessary but for conveniently accessing the NetCDF data file)
+    - geocat.viz (Not necessary but for plotting convenience)
+    - numpy
+    - xarray
+    - cartopy
+    - matplotlib
+"""
+
+###############################################################################
+# Import packages:
+
+import hashlib
+import time
+
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import matplotlib.pyplot as plt
+import numpy as np
+import xarray as xr
+
+import geocat.datafiles as gdf
+import geocat.viz.util as gvutil
+
+###############################################################################
+# Read in data:
+
+# Open a netCDF data file using xarray default engine and load the data into
+# xarray
+ds = xr.open_dataset(gdf.get("netcdf_files/uv300.nc"))
+
+###############################################################################
+# Define helper functions for vector thinning:
+#
+# Fixed strides (``isel(lat=slice(0, -1, 3))``) or a spacing in degrees (as
+# in ``gvutil.set_vector_density``) thin the grid evenly in latitude and
+# longitude. On a polar projection that still leaves the arrows crowded
+# together near the pole. Here all grid points are projected and scaled to
+# the axes, so the spacing is measured as it will appear on the plot.
+# A vectorized pass then keeps the grid point closest to the centre of every
+# cell of a hash grid with the requested spacing. The much smaller set of
+# candidates is finally checked point by point, using the same hash grid,
+# so that no two selected arrows are closer than the spacing. The result
+# only depends on the grid, the projection, the extent and axes shape, and
+# the spacing, so it is cached under these and reused for every time step.
+
+_thinning_cache = {}
+
+
+def _thinning_key(lon, lat, ax, min_distance):
+    """Cache key of a selection: a hash of the grid and the projection,
+    extent and shape of the axes."""
+    grid = hashlib.sha1(
+        np.ascontiguousarray(lon, dtype=np.float64).tobytes() +
+        np.ascontiguousarray(lat, dtype=np.float64).tobytes()).hexdigest()
+    bbox = ax.get_position()
+    aspect = (bbox.width * ax.figure.get_figwidth()) / (
+        bbox.height * ax.figure.get_figheight())
+    return (grid, ax.projection.proj4_init, tuple(np.round(ax.get_extent(), 6)),
+            round(aspect, 6), min_distance)
+
+
+def thin_vectors(lon, lat, ax, min_distance=0.03):
+    """Select grid points whose arrows are at least `min_distance` apart on
+    the axes.
+
+    Parameters
+    ----------
+    lon, lat : array_like
+        1-D coordinates of a rectilinear grid or 2-D coordinates of a
+        curvilinear grid, in degrees.
+    ax : :class:`cartopy.mpl.geoaxes.GeoAxes`
+        Axes the vectors are drawn on, with its extent already set.
+    min_distance : float, optional
+        Minimum distance between arrows, as a fraction of the axes width.
+
+    Returns
+    -------
+    j, i : :class:`numpy.ndarray`
+        Row (latitude) and column (longitude) indices of the selected grid
+        points.
+    """
+    key = _thinning_key(lon, lat, ax, min_distance)
+    if key in _thinning_cache:
+        return _thinning_cache[key]
+
+    lon, lat = np.asarray(lon), np.asarray(lat)
+    if lon.ndim == 1:
+        lon, lat = np.meshgrid(lon, lat)
+    shape = lon.shape
+
+    # Grid points in axes coordinates, with the same unit in x and y
+    xy = ax.projection.transform_points(ccrs.PlateCarree(), lon.ravel(),
+                                        lat.ravel())
+    x0, x1, y0, y1 = ax.get_extent()
+    bbox = ax.get_position()
+    aspect = (bbox.height * ax.figure.get_figheight()) / (
+        bbox.width * ax.figure.get_figwidth())
+    x = (xy[:, 0] - x0) / (x1 - x0)
+    y = (xy[:, 1] - y0) / (y1 - y0) * aspect
+    inside = (np.isfinite(x) & np.isfinite(y) & (x >= 0) & (x <= 1) & (y >= 0) &
+              (y <= aspect))
+    index = np.flatnonzero(inside)
+    x, y = x[inside], y[inside]
+
+    # Keep the point closest to the centre of every hash cell
+    cx = np.floor(x / min_distance).astype(int)
+    cy = np.floor(y / min_distance).astype(int)
+    offset = np.hypot(x / min_distance - cx - 0.5, y / min_distance - cy - 0.5)
+    order = np.lexsort((offset, cx, cy))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = (np.diff(cx[order]) != 0) | (np.diff(cy[order]) != 0)
+    candidates = order[first]
+
+    # Drop candidates that are too close to an already selected neighbour
+    cells = {}
+    keep = []
+    for c in candidates:
+        near = [
+            cells.get((cx[c] + dx, cy[c] + dy))
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+        ]
+        if all(n is None or np.hypot(x[c] - x[n], y[c] - y[n]) >= min_distance
+               for n in near):
+            cells[(cx[c], cy[c])] = c
+            keep.append(c)
+
+    selection = np.unravel_index(index[np.sort(keep)], shape)
+    _thinning_cache[key] = selection
+    return selection
+
+
+def select_vectors(da, selection, lat='lat', lon='lon'):
+    """Pick the selected grid points of `da` (with any leading dimensions)
+    as a 1-D `point` dimension."""
+    j, i = selection
+    return da.isel({
+        lat: xr.DataArray(j, dims='point'),
+        lon: xr.DataArray(i, dims='point')
+    })
+
+
+###############################################################################
+# Thin the vectors and draw all time steps:
+
+# Generate figure and two north polar stereographic axes
+fig, axs = plt.subplots(1,
+                        2,
+                        figsize=(12, 6.5),
+                        subplot_kw={'projection': ccrs.NorthPolarStereo()})
+for ax in axs:
+    ax.set_extent([-180, 180, 20, 90], crs=ccrs.PlateCarree())
+
+# Left: every third grid point, as in NCL_vector_3.py
+stride = ds.isel(lon=slice(0, -1, 3), lat=slice(1, -1, 3))
+
+# Right: at least 2.5% of the axes width between arrows
+start = time.perf_counter()
+selection = thin_vectors(ds.lon, ds.lat, axs[1], min_distance=0.025)
+print('Selection: {:.3f} s'.format(time.perf_counter() - start))
+print('Vectors: {} on the grid, {} with strides, {} thinned'.format(
+    ds.lat.size * ds.lon.size, stride.lat.size * stride.lon.size,
+    selection[0].size))
+
+# Every time step reuses the cached selection. The thinned vectors of all
+# time steps are collected, as they would be for an animation.
+frames = []
+for t in range(ds.time.size):
+    start = time.perf_counter()
+    selection = thin_vectors(ds.lon, ds.lat, axs[1], min_distance=0.025)
+    frames.append(select_vectors(ds.isel(time=t), selection).load())
+    print('Time step {}: {:.5f} s'.format(t, time.perf_counter() - start))
+
+###############################################################################
+# Plot:
+
+# Draw the last time step of both versions
+for ax, u, v, title in zip(axs, [stride.U.isel(time=-1), frames[-1].U],
+                           [stride.V.isel(time=-1), frames[-1].V],
+                           ['Every third grid point', 'Thinned on the map']):
+    lon, lat = u['lon'], u['lat']
+    if u.ndim == 2:
+        lon, lat = np.meshgrid(lon, lat)
+    ax.quiver(np.asarray(lon),
+              np.asarray(lat),
+              u.values,
+              v.values,
+              color='black',
+              pivot='middle',
+              width=0.002,
+              headwidth=4,
+              transform=ccrs.PlateCarree(),
+              zorder=1)
+    ax.add_feature(cfeature.LAND,
+                   edgecolor='lightgray',
+                   facecolor='lightgray',
+                   zorder=0)
+
+    # Use geocat.viz.util convenience function to add titles
+    gvutil.set_titles_and_labels(ax,
+                                 maintitle=title,
+                                 lefttitle=ds['U'].long_name,
+                                 righttitle=ds['U'].units,
+                                 maintitlefontsize=14,
+                                 lefttitlefontsize=10,
+                                 righttitlefontsize=10)
+
+plt.show()
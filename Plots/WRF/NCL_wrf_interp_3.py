@@ -19,7 +19,6 @@ from netCDF4 import Dataset
 import numpy as np
 import matplotlib.pyplot as plt
 import xarray as xr
-import os
 
 from wrf import (to_np, getvar, CoordPair, vertcross, latlon_coords)
 import geocat.datafiles as gdf
@@ -36,13 +35,14 @@ ds = xr.open_mfdataset([
     gdf.get('netcdf_files/wrfout_d03_2012-04-22_23_00_00_QV.nc')
 ])
 
-# specify a unique output file name to use to read in combined dataset later
-file3 = 'wrfout_d03_2012-04-22_23.nc'
-mrg = ds[toinclude].to_netcdf(file3)
-
-# Read in the data and extract variables
-wrfin = Dataset(('wrfout_d03_2012-04-22_23.nc'))
+# Hand the combined dataset to wrf-python in memory: without a path,
+# 'to_netcdf' returns the netCDF file as bytes, which netCDF4 opens directly.
+# The name only identifies the data; no file is written or read.
+wrfin = Dataset('wrfout_d03_2012-04-22_23.nc',
+                mode='r',
+                memory=ds[toinclude].to_netcdf())
 
+# Extract variables
 z = getvar(wrfin, "z")
 qv = getvar(wrfin, "QVAPOR")
 # Pull lat/lon coords from QVAPOR data using wrf-python tools
@@ -62,10 +62,8 @@ qv_cross = vertcross(qv,
                      end_point=end_point,
                      latlon=True)
 
-# Close 'wrfin' to prevent PermissionError if code is run more than once locally
+# Close 'wrfin' to release the in-memory data
 wrfin.close()
-# Remove created wrfout file from local directory
-os.remove('wrfout_d03_2012-04-22_23.nc')
 
 ###############################################################################
 # Plot the data